@@ -0,0 +1,151 @@
+"""
+cases.py - The benchmark cases: hot paths of the core data structures, the Game actions, and whole games.
+"""
+
+from benchmarks.harness import (
+    Benchmark,
+    )
+from splendor.core import (
+    DevCard,
+    DevCardCache,
+    DevCardDeck,
+    Gem,
+    PlayerTokenCache,
+    Token,
+    TokenCache,
+    )
+from splendor.game import (
+    Game,
+    play_runner_headless,
+    )
+from splendor.game_setup import (
+    DEV_CARD_DECK_1,
+    )
+from splendor.policy import (
+    policy_greedy,
+    )
+from typing import List
+
+MIDGAME_TURNS = 20
+
+def _new_game(players_count: int = 2) -> Game:
+    a_game = Game(players_count)
+    for i in range(players_count):
+        a_game.add_player_by_name(f"player_{i+1}")
+    return a_game
+
+def _new_midgame() -> Game:
+    """
+    A 2-player game after MIDGAME_TURNS greedy turns, so that states have some history and cards on hand.
+    """
+    a_game = _new_game()
+    for i in range(MIDGAME_TURNS):
+        a_game.play_turn(a_game.get_current_player(), interactive=False, policy=policy_greedy)
+        a_game.go_to_next_player()
+    return a_game
+
+def _setup_token_cache() -> TokenCache:
+    return TokenCache((Token("black"), Token("black"), Token("red"), Token("yellow")))
+
+def _setup_token_cache_full() -> TokenCache:
+    token_cache = _setup_token_cache()
+    token_cache.add_by_name("black", 10**9)
+    return token_cache
+
+def _setup_can_purchase():
+    token_cache = PlayerTokenCache((Token("black"),) * 3 + (Token("red"),) * 2 + (Token("yellow"),) * 2)
+    dev_card_cache = DevCardCache()
+    dev_card_cache.add(DevCard(level=1, gem=Gem("white"), ppoints=0, cost={"blue": 3}))
+    dev_card = DevCard(level=2, gem=Gem("green"), ppoints=2, cost={"white": 2, "black": 4, "red": 1})
+    return token_cache, dev_card, dev_card_cache
+
+def _setup_find_card():
+    dev_card_deck = DevCardDeck(1, list(DEV_CARD_DECK_1.get_list()))
+    return dev_card_deck, dev_card_deck.get_facing()[-1]
+
+def _setup_purchase():
+    a_game = _new_game()
+    player = a_game.get_current_player()
+    dev_card = min(
+        (dc for dc in a_game.get_current_dev_card_deck(1).get_facing() if dc is not None),
+        key=lambda dc: sum(dc.get_cost_dict().values()),
+        )
+    player.get_current_token_cache().add_by_name("yellow", sum(dev_card.get_cost_dict().values()))
+    return a_game, player, dev_card
+
+def _op_take_three_tokens(a_game: Game) -> None:
+    a_game.action_take_three_tokens(a_game.get_current_player(), "black", "blue", "red")
+
+def _op_take_two_tokens(a_game: Game) -> None:
+    a_game.action_take_two_tokens(a_game.get_current_player(), "green")
+
+def _op_reserve_dev_card(a_game: Game) -> None:
+    a_game.action_reserve_dev_card(a_game.get_current_player(), a_game.get_current_dev_card_deck(2).get_facing()[0])
+
+def _op_reserve_hidden_dev_card(a_game: Game) -> None:
+    a_game.action_reserve_hidden_dev_card(a_game.get_current_player(), 2)
+
+def _op_purchase_dev_card(args) -> None:
+    a_game, player, dev_card = args
+    a_game.action_purchase_dev_card(player, dev_card)
+
+def get_benchmarks() -> List[Benchmark]:
+    """
+    Return all benchmark cases, in reporting order.
+
+    >>> len(get_benchmarks()) > 0
+    True
+    >>> len(set(bench.name for bench in get_benchmarks())) == len(get_benchmarks())
+    True
+    """
+    return [
+        Benchmark("TokenCache.add", _setup_token_cache, lambda tc: tc.add(Token("green")), inner=100),
+        Benchmark("TokenCache.remove", _setup_token_cache_full, lambda tc: tc.remove(Token("black")), inner=100),
+        Benchmark("TokenCache.count", _setup_token_cache, lambda tc: tc.count(), inner=100),
+        Benchmark(
+            "PlayerTokenCache.can_purchase_dev_card",
+            _setup_can_purchase,
+            lambda args: args[0].can_purchase_dev_card(args[1], args[2]),
+            inner=100,
+            ),
+        Benchmark("DevCardDeck.find_card", _setup_find_card, lambda args: args[0].find_card(args[1]), inner=20),
+        Benchmark("DevCardDeck.get_facing", _setup_find_card, lambda args: args[0].get_facing(), inner=100),
+        Benchmark(
+            "NoblesInPlay.find_eligible",
+            _new_midgame,
+            lambda a_game: a_game.get_current_nobles_in_play().find_eligible(
+                a_game.get_current_player().get_current_dev_card_cache().get_bonuses_packed()),
+            inner=100,
+            ),
+        Benchmark("GameState.copy", _new_midgame, lambda a_game: a_game.get_current_game_state().copy(), inner=5),
+        Benchmark(
+            "PlayerState.copy",
+            _new_midgame,
+            lambda a_game: a_game.get_current_player().get_current_player_state().copy(),
+            inner=5,
+            ),
+        Benchmark("Game.__init__", lambda: None, lambda state: Game(4), inner=5),
+        Benchmark("Game.action_take_three_tokens", _new_game, _op_take_three_tokens, setup_each=True),
+        Benchmark("Game.action_take_two_tokens", _new_game, _op_take_two_tokens, setup_each=True),
+        Benchmark("Game.action_reserve_dev_card", _new_game, _op_reserve_dev_card, setup_each=True),
+        Benchmark("Game.action_reserve_hidden_dev_card", _new_game, _op_reserve_hidden_dev_card, setup_each=True),
+        Benchmark("Game.action_purchase_dev_card", _setup_purchase, _op_purchase_dev_card, setup_each=True),
+        Benchmark(
+            "Game.list_legal_actions",
+            _new_midgame,
+            lambda a_game: a_game.list_legal_actions(a_game.get_current_player()),
+            inner=5,
+            ),
+        Benchmark(
+            "Game.list_legal_actions(prune)",
+            _new_midgame,
+            lambda a_game: a_game.list_legal_actions(a_game.get_current_player(), prune=True),
+            inner=5,
+            ),
+        Benchmark(
+            "headless_game_2p_greedy",
+            lambda: None,
+            lambda state: play_runner_headless(2, policy_greedy),
+            samples=20,
+            ),
+        ]
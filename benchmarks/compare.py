@@ -0,0 +1,164 @@
+"""
+compare.py - Compare a benchmark run against a stored baseline, and decide whether anything regressed.
+
+A benchmark regressed if its median latency grew by more than the threshold *and* a one-sided Mann-Whitney U
+test says the current samples are slower than the baseline samples with p below alpha.  The test makes no
+assumption about the latency distribution, and it keeps run-to-run noise from failing the gate.
+"""
+
+import math
+from benchmarks.harness import (
+    percentile,
+    )
+import sys
+from typing import Dict, List, Tuple
+
+DEFAULT_THRESHOLD = 0.10
+DEFAULT_ALPHA = 0.01
+
+STATUS_OK = "ok"
+STATUS_REGRESSED = "REGRESSED"
+STATUS_IMPROVED = "improved"
+STATUS_NEW = "new"
+STATUS_MISSING = "missing"
+
+def _ranks(values: List[float]) -> Tuple[List[float], float]:
+    """
+    Return the (1-based, tie-averaged) rank of each value, and the tie correction term sum(t^3 - t).
+    """
+    order = sorted(range(len(values)), key=lambda i: values[i])
+    ranks = [0.0] * len(values)
+    tie_term = 0.0
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        rank_avg = (i + j) / 2.0 + 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = rank_avg
+        tie_count = j - i + 1
+        tie_term += tie_count ** 3 - tie_count
+        i = j + 1
+    return ranks, tie_term
+
+def mann_whitney_u_greater(
+    current: List[float],
+    baseline: List[float],
+    ) -> float:
+    """
+    Return the one-sided p-value (normal approximation, tie- and continuity-corrected) that current tends to be
+    greater than baseline.
+
+    >>> mann_whitney_u_greater([10, 11, 12, 13, 14] * 4, [1, 2, 3, 4, 5] * 4) < 0.001
+    True
+    >>> mann_whitney_u_greater([1, 2, 3, 4, 5] * 4, [10, 11, 12, 13, 14] * 4) > 0.999
+    True
+    >>> mann_whitney_u_greater([1, 2, 3], [1, 2, 3])
+    0.5
+    >>> mann_whitney_u_greater([4, 4, 4], [4, 4, 4])
+    0.5
+    """
+    n1 = len(current)
+    n2 = len(baseline)
+    if n1 == 0 or n2 == 0:
+        raise Exception("cannot compare empty samples")
+    ranks, tie_term = _ranks(list(current) + list(baseline))
+    u1 = sum(ranks[:n1]) - n1 * (n1 + 1) / 2.0
+    n = n1 + n2
+    variance = n1 * n2 / 12.0 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return 0.5
+    delta = u1 - n1 * n2 / 2.0
+    if delta == 0:
+        return 0.5
+    z = (delta - math.copysign(0.5, delta)) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+def compare_result(
+    baseline_result: Dict,
+    current_result: Dict,
+    threshold: float = DEFAULT_THRESHOLD,
+    alpha: float = DEFAULT_ALPHA,
+    ) -> Dict:
+    """
+    Compare one benchmark's results (dicts as produced by Benchmark.run(), including latencies_ns).
+
+    >>> baseline = {"latencies_ns": [100.0 + i % 7 for i in range(100)]}
+    >>> compare_result(baseline, {"latencies_ns": [130.0 + i % 7 for i in range(100)]})["status"]
+    'REGRESSED'
+    >>> compare_result(baseline, {"latencies_ns": [101.0 + i % 7 for i in range(100)]})["status"]
+    'ok'
+    >>> compare_result(baseline, {"latencies_ns": [70.0 + i % 7 for i in range(100)]})["status"]
+    'improved'
+    """
+    baseline_latencies = baseline_result["latencies_ns"]
+    current_latencies = current_result["latencies_ns"]
+    baseline_p50 = percentile(baseline_latencies, 50)
+    current_p50 = percentile(current_latencies, 50)
+    delta = (current_p50 - baseline_p50) / baseline_p50 if baseline_p50 > 0 else 0.0
+    p_slower = mann_whitney_u_greater(current_latencies, baseline_latencies)
+    p_faster = mann_whitney_u_greater(baseline_latencies, current_latencies)
+    if delta > threshold and p_slower < alpha:
+        status = STATUS_REGRESSED
+    elif delta < -threshold and p_faster < alpha:
+        status = STATUS_IMPROVED
+    else:
+        status = STATUS_OK
+    return {
+        "baseline_p50_ns": baseline_p50,
+        "current_p50_ns": current_p50,
+        "delta": delta,
+        "p_slower": p_slower,
+        "status": status,
+    }
+
+def compare_results(
+    baseline_results: Dict[str, Dict],
+    current_results: Dict[str, Dict],
+    threshold: float = DEFAULT_THRESHOLD,
+    alpha: float = DEFAULT_ALPHA,
+    ) -> Dict[str, Dict]:
+    """
+    Compare every benchmark in current_results against baseline_results; return name -> comparison dict.  A
+    baseline benchmark missing from current_results (renamed, or crashed) is STATUS_MISSING; callers running a
+    subset of the suite drop the rest from baseline_results first.
+
+    >>> baseline_results = {"a": {"latencies_ns": [100.0] * 10}, "b": {"latencies_ns": [100.0] * 10}}
+    >>> comparisons = compare_results(baseline_results, {"a": {"latencies_ns": [100.0] * 10}})
+    >>> comparisons["b"]["status"], has_regression(comparisons)
+    ('missing', True)
+    """
+    comparisons = {}
+    for name, current_result in current_results.items():
+        baseline_result = baseline_results.get(name)
+        if baseline_result is None or "latencies_ns" not in baseline_result:
+            comparisons[name] = {"status": STATUS_NEW}
+            continue
+        comparisons[name] = compare_result(baseline_result, current_result, threshold, alpha)
+    for name in baseline_results.keys():
+        if name not in current_results:
+            comparisons[name] = {"status": STATUS_MISSING}
+    return comparisons
+
+def has_regression(comparisons: Dict[str, Dict]) -> bool:
+    """
+    Return True if any benchmark regressed, or is missing from the current run: the gate fails on both.
+    """
+    return any(comparison["status"] in (STATUS_REGRESSED, STATUS_MISSING) for comparison in comparisons.values())
+
+def print_delta_table(
+    comparisons: Dict[str, Dict],
+    out=sys.stdout,
+    ) -> None:
+    print(f"{'benchmark':<40} {'base p50 us':>12} {'cur p50 us':>12} {'delta':>8} {'p':>8}  status", file=out)
+    for name, comparison in comparisons.items():
+        if "delta" not in comparison:
+            print(f"{name:<40} {'':>12} {'':>12} {'':>8} {'':>8}  {comparison['status']}", file=out)
+            continue
+        print(
+            f"{name:<40} {comparison['baseline_p50_ns'] / 1000:>12.2f} {comparison['current_p50_ns'] / 1000:>12.2f} "
+            f"{comparison['delta']:>+8.1%} {comparison['p_slower']:>8.4f}  {comparison['status']}",
+            file=out,
+            )
+    return
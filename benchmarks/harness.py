@@ -0,0 +1,214 @@
+"""
+harness.py - Timing and allocation measurement for the benchmark cases.
+
+Each Benchmark is measured as a number of samples; a sample times `inner` back-to-back calls of the op, so
+that very fast ops aren't dominated by timer overhead.  Latencies are reported per op.
+"""
+
+import gc
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+BENCH_SEED = 1234
+
+DEFAULT_SAMPLES = 200
+DEFAULT_WARMUP_SAMPLES = 10
+ALLOC_OPS = 20
+
+RESULTS_FORMAT_VERSION = 1
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Return the pct-th percentile of values (nearest-rank, on a sorted copy).
+
+    >>> percentile([5, 1, 4, 2, 3], 50)
+    3
+    >>> percentile(list(range(1, 101)), 99)
+    99
+    >>> percentile([7], 99)
+    7
+    """
+    if len(values) == 0:
+        raise Exception("cannot take percentile of no values")
+    values_sorted = sorted(values)
+    rank = max(math.ceil(pct / 100.0 * len(values_sorted)) - 1, 0)
+    return values_sorted[min(rank, len(values_sorted) - 1)]
+
+
+class Benchmark:
+    """
+    A named op to time.
+
+    setup() is called once (with the random module seeded to BENCH_SEED) and returns the state passed to op().
+    If setup_each is True, setup() is instead called before every op, untimed, for ops that consume their state.
+
+    >>> bench = Benchmark("sum", lambda: list(range(100)), sum, inner=10)
+    >>> result = bench.run(samples=5, warmup_samples=1)
+    >>> sorted(result.keys())
+    ['alloc_blocks_per_op', 'alloc_bytes_per_op', 'inner', 'latencies_ns', 'mean_ns', 'ops_per_sec', 'p50_ns', 'p99_ns', 'samples']
+    >>> result["samples"]
+    5
+    >>> bench.run(samples=5, warmup_samples=1, repeat=3)["samples"]
+    15
+    >>> len(bench.measure_latencies_ns(samples=3, warmup_samples=0))
+    3
+    """
+
+    name: str
+    setup: Callable
+    op: Callable
+    inner: int
+    setup_each: bool
+    samples: int
+
+    def __init__(
+        self,
+        name: str,
+        setup: Callable,
+        op: Callable,
+        inner: int = 1,
+        setup_each: bool = False,
+        samples: int = None,
+        ) -> None:
+        self.name = name
+        self.setup = setup
+        self.op = op
+        self.inner = inner if not setup_each else 1
+        self.setup_each = setup_each
+        self.samples = samples
+
+    def _new_state(self):
+        random.seed(BENCH_SEED)
+        return self.setup()
+
+    def measure_latencies_ns(
+        self,
+        samples: int = DEFAULT_SAMPLES,
+        warmup_samples: int = DEFAULT_WARMUP_SAMPLES,
+        ) -> List[float]:
+        """
+        Return samples per-op latencies in nanoseconds, after warmup_samples untimed samples.
+        """
+        if self.samples is not None:
+            samples = min(samples, self.samples)
+        op = self.op
+        inner_range = range(self.inner)
+        state = None if self.setup_each else self._new_state()
+        latencies_ns = []
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for i in range(warmup_samples + samples):
+                if self.setup_each:
+                    state = self._new_state()
+                t_start = time.perf_counter_ns()
+                for j in inner_range:
+                    op(state)
+                t_end = time.perf_counter_ns()
+                if i >= warmup_samples:
+                    latencies_ns.append((t_end - t_start) / self.inner)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        return latencies_ns
+
+    def measure_allocations(self, ops: int = ALLOC_OPS) -> Dict[str, float]:
+        """
+        Return the mean bytes and blocks allocated per op (peak during the op), traced with tracemalloc.
+        """
+        state = None if self.setup_each else self._new_state()
+        bytes_total = 0
+        blocks_total = 0
+        tracemalloc.start()
+        try:
+            for i in range(ops):
+                if self.setup_each:
+                    state = self._new_state()
+                snapshot_before = tracemalloc.take_snapshot()
+                current_before, peak_before = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                self.op(state)
+                current_after, peak_after = tracemalloc.get_traced_memory()
+                snapshot_after = tracemalloc.take_snapshot()
+                bytes_total += peak_after - current_before
+                blocks_total += sum(
+                    max(stat.count_diff, 0) for stat in snapshot_after.compare_to(snapshot_before, "lineno")
+                    )
+        finally:
+            tracemalloc.stop()
+        return {
+            "alloc_bytes_per_op": bytes_total / ops,
+            "alloc_blocks_per_op": blocks_total / ops,
+        }
+
+    def run(
+        self,
+        samples: int = DEFAULT_SAMPLES,
+        warmup_samples: int = DEFAULT_WARMUP_SAMPLES,
+        alloc_ops: int = ALLOC_OPS,
+        repeat: int = 1,
+        ) -> Dict[str, float]:
+        """
+        Time the op and measure its allocations; return a dict of the results, including the raw latencies.
+
+        With repeat > 1, the timing (setup and warmup included) is repeated and the samples of all repeats are
+        pooled, which evens out slow drifts such as CPU frequency changes.
+        """
+        latencies_ns = []
+        for i in range(repeat):
+            latencies_ns += self.measure_latencies_ns(samples, warmup_samples)
+        mean_ns = sum(latencies_ns) / len(latencies_ns)
+        result = {
+            "samples": len(latencies_ns),
+            "inner": self.inner,
+            "ops_per_sec": 1e9 / mean_ns if mean_ns > 0 else float("inf"),
+            "mean_ns": mean_ns,
+            "p50_ns": percentile(latencies_ns, 50),
+            "p99_ns": percentile(latencies_ns, 99),
+            "latencies_ns": latencies_ns,
+        }
+        result.update(self.measure_allocations(min(alloc_ops, result["samples"])))
+        return result
+
+    def __repr__(self) -> str:
+        return f"<Benchmark: {self.name}>"
+
+
+def get_environment() -> Dict[str, str]:
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+def write_results_json(
+    path: str,
+    results: Dict[str, Dict[str, float]],
+    ) -> None:
+    """
+    Write results (benchmark name -> result dict) to path as JSON, along with the environment they came from.
+    """
+    doc = {
+        "version": RESULTS_FORMAT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "seed": BENCH_SEED,
+        "environment": get_environment(),
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(doc, f, indent=2, sort_keys=True)
+    return
+
+def read_results_json(path: str) -> Dict:
+    with open(path) as f:
+        doc = json.load(f)
+    if doc.get("version") != RESULTS_FORMAT_VERSION:
+        raise Exception(f"unsupported benchmark results version in {path}: {doc.get('version')}")
+    return doc
@@ -0,0 +1,96 @@
+"""
+run.py - Run the benchmark suite and write the results as JSON, or check them against a stored baseline.
+
+    python -m benchmarks.run --output baseline.json
+    python -m benchmarks.run --filter Game. --samples 50
+    python -m benchmarks.run --compare baseline.json --repeat 3 --threshold 0.10
+
+With --compare, a table of deltas is printed and the exit status is 1 if any benchmark regressed, or is in the
+baseline but did not run (see benchmarks/compare.py).  Baseline benchmarks excluded by --filter are not compared;
+benchmarks not yet in the baseline run too, and are reported as new.
+"""
+
+import argparse
+from benchmarks.cases import (
+    get_benchmarks,
+    )
+from benchmarks.compare import (
+    compare_results,
+    DEFAULT_ALPHA,
+    DEFAULT_THRESHOLD,
+    has_regression,
+    print_delta_table,
+    )
+from benchmarks.harness import (
+    DEFAULT_SAMPLES,
+    DEFAULT_WARMUP_SAMPLES,
+    read_results_json,
+    write_results_json,
+    )
+import sys
+from typing import Dict, List
+
+EXIT_REGRESSION = 1
+
+def run_benchmarks(
+    name_filter: str = "",
+    samples: int = DEFAULT_SAMPLES,
+    warmup_samples: int = DEFAULT_WARMUP_SAMPLES,
+    repeat: int = 1,
+    out=sys.stdout,
+    ) -> Dict[str, Dict[str, float]]:
+    """
+    Run every benchmark whose name contains name_filter; print a line per benchmark
+    and return the results.
+    """
+    results = {}
+    print(f"{'benchmark':<40} {'ops/sec':>12} {'p50 us':>10} {'p99 us':>10} {'alloc B/op':>11}", file=out)
+    for bench in get_benchmarks():
+        if name_filter not in bench.name:
+            continue
+        result = bench.run(samples, warmup_samples, repeat=repeat)
+        results[bench.name] = result
+        print(
+            f"{bench.name:<40} {result['ops_per_sec']:>12.1f} {result['p50_ns'] / 1000:>10.2f} "
+            f"{result['p99_ns'] / 1000:>10.2f} {result['alloc_bytes_per_op']:>11.0f}",
+            file=out,
+            flush=True,
+            )
+    return results
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the splendor benchmark suite.")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES)
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP_SAMPLES)
+    parser.add_argument("--repeat", type=int, default=1, help="repeat each benchmark and pool the samples")
+    parser.add_argument("--output", default=None, help="write results JSON here")
+    parser.add_argument("--compare", default=None, metavar="BASELINE", help="compare against this results JSON")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative p50 slowdown that counts as a regression")
+    parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA,
+                        help="significance level of the Mann-Whitney U test")
+    args = parser.parse_args(argv)
+
+    baseline_results = None
+    if args.compare:
+        baseline_results = {
+            name: result for name, result in read_results_json(args.compare)["results"].items()
+            if args.filter in name
+            }
+
+    results = run_benchmarks(args.filter, args.samples, args.warmup, args.repeat)
+    if args.output:
+        write_results_json(args.output, results)
+
+    if baseline_results is not None:
+        comparisons = compare_results(baseline_results, results, args.threshold, args.alpha)
+        print()
+        print_delta_table(comparisons)
+        if has_regression(comparisons):
+            print(f"\nregression beyond {args.threshold:.0%}, or a missing benchmark, detected", file=sys.stderr)
+            return EXIT_REGRESSION
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
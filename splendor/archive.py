@@ -0,0 +1,210 @@
+"""
+archive.py - Append-only archive of GameRecords, with an offset index for random access.
+
+An archive is two files: the data file (GameRecord bytes, back to back) and the index file (path + ".idx"),
+which holds one fixed-width INDEX_ENTRY_STRUCT per game.  Readers mmap both, so game K, or game K at turn t,
+is found without parsing anything before it.
+"""
+
+import mmap
+import os
+import struct
+from splendor.record import (
+    ACTION_FIELDS_LEN,
+    ACTION_STRUCT,
+    GameRecord,
+    )
+from typing import Tuple
+
+# record offset within the data file, record length, actions offset within the record
+INDEX_ENTRY_STRUCT = struct.Struct("<QII")
+
+INDEX_PATH_SUFFIX = ".idx"
+
+def get_index_path(path: str) -> str:
+    return path + INDEX_PATH_SUFFIX
+
+
+class GameArchiveWriter:
+    """
+    Appends GameRecords to an archive.  Only one writer should have an archive open at a time.
+
+    The record is written and flushed before its index entry, so readers never see a partial game.
+
+    >>> import tempfile
+    >>> tmp_dir = tempfile.TemporaryDirectory()
+    >>> path = os.path.join(tmp_dir.name, "games.spla")
+    >>> record = GameRecord(2, [[0, 1, 2, 3, 4], [40, 41, 42, 43, 44], [70, 71, 72, 73, 74]], [0, 4, 7], ["Ava", "Bo"])
+    >>> record.append_action(1, 0, 0, 1, 2)
+    >>> record.append_action(2, 1, 3)
+
+    >>> with GameArchiveWriter(path) as writer:
+    ...     writer.append(record)
+    ...     writer.append(record)
+    0
+    1
+    >>> with GameArchiveWriter(path) as writer:
+    ...     writer.count()
+    ...     writer.append(record)
+    2
+    2
+
+    >>> reader = GameArchiveReader(path)
+    >>> reader.count()
+    3
+    >>> reader.get_game_record(2) == record
+    True
+    >>> reader.count_turns(2)
+    2
+    >>> reader.get_action(2, 1)
+    (2, 1, 3, 255, 255, 255)
+    >>> reader.get_position(1, 1).get_actions()
+    [(1, 0, 0, 1, 2, 255)]
+    >>> reader.get_action(2, 2) #doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    Exception: ...
+    >>> reader.close()
+    >>> tmp_dir.cleanup()
+    """
+
+    path: str
+    data_file: object
+    index_file: object
+    games_count: int
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.data_file = open(path, "ab")
+        self.index_file = open(get_index_path(path), "ab")
+        self.games_count = self.index_file.tell() // INDEX_ENTRY_STRUCT.size
+        return
+
+    def count(self) -> int:
+        return self.games_count
+
+    def append(self, game_record: GameRecord) -> int:
+        """
+        Append game_record and return its game id (its zero-based position in the archive).
+        """
+        record_bytes = game_record.to_bytes()
+        record_offset = self.data_file.tell()
+        self.data_file.write(record_bytes)
+        self.data_file.flush()
+        self.index_file.write(INDEX_ENTRY_STRUCT.pack(
+            record_offset,
+            len(record_bytes),
+            game_record.get_actions_offset(),
+            ))
+        self.index_file.flush()
+        game_id = self.games_count
+        self.games_count += 1
+        return game_id
+
+    def close(self) -> None:
+        self.data_file.close()
+        self.index_file.close()
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+        return
+
+
+def _mmap_file(f) -> mmap.mmap:
+    """
+    mmap f read-only, or return None if it is empty (an empty file cannot be mmapped).
+    """
+    if os.fstat(f.fileno()).st_size == 0:
+        return None
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class GameArchiveReader:
+    """
+    Random-access reader over an archive.  See GameArchiveWriter for examples.
+
+    The reader sees the games that were in the archive when it was opened; call refresh() to pick up newer ones.
+    """
+
+    path: str
+    data_map: mmap.mmap
+    index_map: mmap.mmap
+    games_count: int
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.data_map = None
+        self.index_map = None
+        self.games_count = 0
+        self.refresh()
+        return
+
+    def refresh(self) -> None:
+        self.close()
+        with open(self.path, "rb") as data_file:
+            self.data_map = _mmap_file(data_file)
+        with open(get_index_path(self.path), "rb") as index_file:
+            self.index_map = _mmap_file(index_file)
+        if self.index_map is None:
+            self.games_count = 0
+        else:
+            self.games_count = len(self.index_map) // INDEX_ENTRY_STRUCT.size
+        return
+
+    def count(self) -> int:
+        return self.games_count
+
+    def get_index_entry(self, game_id: int) -> Tuple[int, int, int]:
+        """
+        Return (record offset, record length, actions offset within the record) for game_id.
+        """
+        if game_id < 0 or game_id >= self.games_count:
+            raise Exception(f"no such game in archive: {game_id}")
+        return INDEX_ENTRY_STRUCT.unpack_from(self.index_map, game_id * INDEX_ENTRY_STRUCT.size)
+
+    def count_turns(self, game_id: int) -> int:
+        record_offset, record_len, actions_offset = self.get_index_entry(game_id)
+        return (record_len - actions_offset) // ACTION_STRUCT.size
+
+    def get_game_record(self, game_id: int) -> GameRecord:
+        record_offset, record_len, actions_offset = self.get_index_entry(game_id)
+        return GameRecord.from_bytes(self.data_map, record_offset)
+
+    def get_position(self, game_id: int, turn: int) -> GameRecord:
+        """
+        Return the GameRecord of game_id truncated to its first turn actions, i.e. the game as it stood before
+        the action of turn (zero-based) was taken.
+        """
+        if turn < 0 or turn > self.count_turns(game_id):
+            raise Exception(f"no such turn in game {game_id}: {turn}")
+        record_offset, record_len, actions_offset = self.get_index_entry(game_id)
+        return GameRecord.from_bytes(self.data_map, record_offset, actions_limit=turn)
+
+    def get_action(self, game_id: int, turn: int) -> Tuple[int, int, int, int, int, int]:
+        """
+        Return the action taken at turn (zero-based) of game_id, without decoding the rest of the record.
+        """
+        if turn < 0 or turn >= self.count_turns(game_id):
+            raise Exception(f"no such turn in game {game_id}: {turn}")
+        record_offset, record_len, actions_offset = self.get_index_entry(game_id)
+        action_offset = record_offset + actions_offset + turn * ACTION_STRUCT.size
+        return ACTION_STRUCT.unpack_from(self.data_map, action_offset)[:ACTION_FIELDS_LEN]
+
+    def close(self) -> None:
+        if self.data_map is not None:
+            self.data_map.close()
+            self.data_map = None
+        if self.index_map is not None:
+            self.index_map.close()
+            self.index_map = None
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+        return
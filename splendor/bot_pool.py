@@ -0,0 +1,186 @@
+"""
+bot_pool.py - Choose bot moves in a pool of worker processes, off the server's event loop.
+
+A bot move is sent to a worker as the game's compact record (GameRecord.to_bytes(): the initial deal plus the
+packed actions), so only a few hundred bytes cross the process boundary.  Each worker keeps the Games it has
+rebuilt, keyed by game, and on the next move of the same game only replays the new actions.  The pool is started
+with warm_up(), so the workers' imports and caches (the catalogs, list_discard_idxs(), ...) are resident before
+the first move.  Workers run at a lower CPU priority than the server, so a host short of cores runs the event
+loop first.
+
+Every move has a deadline.  A move still queued when its deadline passes is cancelled, and a worker skips a move
+whose deadline passed while it was queued; either way choose_action() returns None, and the caller falls back to
+a cheap move of its own.
+
+    >>> import asyncio
+    >>> from splendor.game import Game
+    >>> a_game = Game(2)
+    >>> a_game.add_player_by_name("Ava")
+    >>> a_game.add_player_by_name("Bernardo")
+    >>> async def demo():
+    ...     with BotPool(workers_count=1) as bot_pool:
+    ...         await bot_pool.warm_up()
+    ...         action = await bot_pool.choose_action(0, a_game.get_game_record(), 0, "greedy")
+    ...         late_action = await bot_pool.choose_action(0, a_game.get_game_record(), 0, "greedy", deadline_s=0)
+    ...     return action, late_action
+    >>> action, late_action = asyncio.run(demo())
+    >>> action in a_game.list_legal_actions(a_game.get_player_by_idx(0)), late_action
+    (True, None)
+"""
+
+import asyncio
+import collections
+from concurrent.futures import ProcessPoolExecutor
+import os
+from splendor.game import (
+    Game,
+    generate_game_from_record,
+    )
+from splendor.policy import (
+    get_policy_by_name,
+    )
+from splendor.record import (
+    GameRecord,
+    )
+import time
+from typing import Tuple
+
+# worker processes; one core is left to the event loop
+BOT_WORKERS_COUNT = max(1, (os.cpu_count() or 2) - 1)
+# added to the workers' niceness, so that on a busy host the event loop (and so the human players) comes first
+BOT_WORKER_NICENESS = 10
+# time allowed for a bot move, from when it is asked for
+BOT_DEADLINE_S = 1.0
+# Games kept rebuilt per worker, least recently used dropped first
+WORKER_GAMES_CACHE_MAX = 256
+
+# per worker process: game key -> Game, in least recently used order
+_games_cache: "collections.OrderedDict[int, Game]" = collections.OrderedDict()
+
+
+def _is_record_prefix(
+    game_record: GameRecord,
+    other_game_record: GameRecord,
+    ) -> bool:
+    """
+    Return True if other_game_record is game_record played on, i.e. same players and deal, and game_record's
+    actions are the first of its actions.
+    """
+    actions_count = game_record.count_actions()
+    return (
+        game_record.get_player_names() == other_game_record.get_player_names()
+        and all(game_record.get_dev_card_deck_ids(no) == other_game_record.get_dev_card_deck_ids(no) for no in range(1, 4))
+        and game_record.get_noble_ids() == other_game_record.get_noble_ids()
+        and actions_count <= other_game_record.count_actions()
+        and game_record.get_actions() == other_game_record.get_actions()[:actions_count]
+        )
+
+def get_cached_game(
+    game_key: int,
+    game_record: GameRecord,
+    ) -> Game:
+    """
+    Return a Game in game_record's position: the one cached under game_key played on to it, or else a rebuilt one.
+    """
+    a_game = _games_cache.pop(game_key, None)
+    if a_game is None or not _is_record_prefix(a_game.get_game_record(), game_record):
+        a_game = generate_game_from_record(game_record)
+    else:
+        for action in game_record.get_actions()[a_game.get_game_record().count_actions():]:
+            a_game.apply_action(action)
+            a_game.go_to_next_player()
+    _games_cache[game_key] = a_game
+    while len(_games_cache) > WORKER_GAMES_CACHE_MAX:
+        _games_cache.popitem(last=False)
+    return a_game
+
+def _init_worker() -> None:
+    if hasattr(os, "nice"):
+        os.nice(BOT_WORKER_NICENESS)
+    return
+
+def _warm_up_worker() -> None:
+    a_game = Game(2)
+    a_game.add_player_by_name("warm_up_1")
+    a_game.add_player_by_name("warm_up_2")
+    a_game.list_legal_actions(a_game.get_player_by_idx(0))
+    return
+
+def _choose_action_in_worker(
+    game_key: int,
+    game_record_bytes: bytes,
+    seat: int,
+    policy_name: str,
+    deadline_ts: float,
+    ) -> Tuple[int, int, int, int, int, int]:
+    """
+    Run in a worker: return policy_name's action for seat in the recorded position, or None past deadline_ts.
+    """
+    if time.time() >= deadline_ts:
+        return None
+    a_game = get_cached_game(game_key, GameRecord.from_bytes(game_record_bytes))
+    if a_game.get_current_player_idx() != seat:
+        raise Exception(f"not seat {seat}'s turn in the recorded position")
+    return get_policy_by_name(policy_name)(a_game, a_game.get_player_by_idx(seat))
+
+
+class BotPool:
+    """
+    A warm pool of worker processes choosing bot moves (see the module docstring).
+    """
+
+    workers_count: int
+    deadline_s: float
+
+    def __init__(
+        self,
+        workers_count: int = BOT_WORKERS_COUNT,
+        deadline_s: float = BOT_DEADLINE_S,
+        ) -> None:
+        self.workers_count = workers_count
+        self.deadline_s = deadline_s
+        self.executor = ProcessPoolExecutor(max_workers=workers_count, initializer=_init_worker)
+
+    async def warm_up(self) -> None:
+        """
+        Start every worker and load its imports and caches, so the first moves don't pay for it.
+        """
+        loop = asyncio.get_running_loop()
+        # the executor starts another worker for each job submitted while the others are busy
+        await asyncio.gather(*[loop.run_in_executor(self.executor, _warm_up_worker) for i in range(self.workers_count)])
+        return
+
+    async def choose_action(
+        self,
+        game_key: int,
+        game_record: GameRecord,
+        seat: int,
+        policy_name: str,
+        deadline_s: float = None,
+        ) -> Tuple[int, int, int, int, int, int]:
+        """
+        Return the action policy_name chooses for seat in game_record's position, or None if it isn't chosen
+        within deadline_s (default: the pool's).  game_key names the game for the workers' caches.
+        """
+        if deadline_s is None:
+            deadline_s = self.deadline_s
+        deadline_ts = time.time() + deadline_s
+        future = asyncio.get_running_loop().run_in_executor(
+            self.executor, _choose_action_in_worker, game_key, game_record.to_bytes(), seat, policy_name, deadline_ts,
+            )
+        try:
+            action = await asyncio.wait_for(future, deadline_s)
+        except asyncio.TimeoutError:
+            return None
+        return tuple(action) if action is not None else None
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.shutdown()
+        return
@@ -0,0 +1,199 @@
+"""
+broadcast.py - Fan a Game's action diffs out to many subscribers, with periodic keyframes for late joiners.
+
+A GameBroadcast listens to its Game's diffs (see Game.add_diff_listener() and generate_diff()), encodes each one
+once, as a compact JSON message, and hands the same bytes to every subscriber, so a turn costs one encoding no
+matter how many are watching.  Every keyframe_interval diffs it also encodes a keyframe, the full public position
+(see get_keyframe_dict()).  It keeps the latest keyframe and the diffs since, so a subscriber joining late is
+sent those first and is then caught up.
+
+Messages are {"type": "keyframe", "turn": t, "state": {...}} and {"type": "diff", "turn": t, ...the diff}, where
+a keyframe's turn is the number of actions it includes, and lastly {"type": "end", "turn": t, "winner": seat}.
+
+    >>> from splendor.game import Game
+    >>> a_game = Game(2)
+    >>> a_game.add_player_by_name("Ava")
+    >>> a_game.add_player_by_name("Bernardo")
+    >>> broadcast = GameBroadcast(a_game, keyframe_interval=2)
+    >>> early, late = [], []
+    >>> broadcast.subscribe(early.append)
+    >>> a_game.action_take_two_tokens(a_game.get_player_by_idx(0), "green")
+    >>> a_game.action_take_two_tokens(a_game.get_player_by_idx(1), "red")
+    >>> a_game.action_take_two_tokens(a_game.get_player_by_idx(0), "blue")
+    >>> broadcast.subscribe(late.append)
+    >>> a_game.action_pass(a_game.get_player_by_idx(1))
+    >>> [(message["type"], message["turn"]) for message in map(json.loads, early)]
+    [('keyframe', 0), ('diff', 0), ('diff', 1), ('diff', 2), ('diff', 3)]
+    >>> [(message["type"], message["turn"]) for message in map(json.loads, late)]
+    [('keyframe', 2), ('diff', 2), ('diff', 3)]
+    >>> json.loads(late[0])["state"]["players"][1]["tokens"]
+    [0, 0, 0, 2, 0, 0]
+    >>> early[-1] is late[-1]
+    True
+
+A blind reserve keeps its card from the subscribers: the diff only names the deck, and keyframes count the
+player's blind-reserved cards instead of listing them.
+
+    >>> a_game.action_reserve_hidden_dev_card(a_game.get_player_by_idx(0), 2)
+    >>> card_id = a_game.get_game_record().get_action(4)[3]
+    >>> json.loads(late[-1])["action"][3] == card_id, json.loads(late[-1])["changes"][-1]
+    (False, {'kind': 'card_reserved', 'seat': 0, 'deck': 2})
+    >>> ava_view = get_keyframe_dict(a_game)["players"][0]
+    >>> ava_view["reserve"], ava_view["hidden_reserve"]
+    ([], 1)
+    >>> broadcast.end(1)
+    >>> late[-1]
+    b'{"type":"end","turn":5,"winner":1}'
+    >>> broadcast.close()
+    >>> late[-1] is None
+    True
+"""
+
+import json
+from splendor.game import (
+    Game,
+    )
+from splendor.game_setup import (
+    get_dev_card_id,
+    get_noble_id,
+    )
+from splendor.record import (
+    ACTION_RESERVE_HIDDEN_DEV_CARD,
+    )
+from typing import Callable, Dict, List
+
+# diffs between keyframes
+KEYFRAME_INTERVAL = 20
+
+
+def get_keyframe_dict(a_game: Game) -> Dict:
+    """
+    Return the public position of a_game, as a JSON-able dict: everything a spectator sees.  Cards and nobles are
+    catalog ids and token counts are in gem index order (see splendor.record).  A player's reserve lists the cards
+    reserved face up; those reserved blind are only counted (hidden_reserve).  next_seat is the seat to act after
+    the last recorded action (diffs are sent before the game moves on to it).
+    """
+    game_state = a_game.get_current_game_state()
+    game_record = a_game.get_game_record()
+    blind_reserved_ids = set(
+        action[3] for action in game_record.get_actions() if action[0] == ACTION_RESERVE_HIDDEN_DEV_CARD
+        )
+    next_seat = a_game.get_current_player_idx()
+    if game_record.count_actions() > 0:
+        next_seat = (game_record.get_action(game_record.count_actions() - 1)[1] + 1) % len(a_game.players)
+    scoreboard = a_game.get_scoreboard()
+    players = []
+    for idx, player in enumerate(a_game.players):
+        reserve_ids = [get_dev_card_id(dev_card) for dev_card in player.get_current_dev_card_reserve().get_list()]
+        players.append({
+            "name": player.get_name(),
+            "score": scoreboard.get_score(idx),
+            "tokens": list(player.get_current_token_cache().get_counts()),
+            "dev_cards": [get_dev_card_id(dev_card) for dev_card in player.get_current_dev_card_cache().get_list()],
+            "reserve": [dev_card_id for dev_card_id in reserve_ids if dev_card_id not in blind_reserved_ids],
+            "hidden_reserve": sum(1 for dev_card_id in reserve_ids if dev_card_id in blind_reserved_ids),
+            "nobles": [get_noble_id(noble) for noble in player.get_current_nobles()],
+        })
+    return {
+        "players": players,
+        "next_seat": next_seat,
+        "tokens": list(game_state.get_token_cache().get_counts()),
+        "decks": [
+            [get_dev_card_id(dev_card) if dev_card is not None else None for dev_card in deck.get_facing()]
+            for deck in game_state.dev_card_decks
+            ],
+        "hidden": [deck.count_hidden() for deck in game_state.dev_card_decks],
+        "nobles": [get_noble_id(noble) for noble in game_state.get_nobles_in_play().get_list()],
+        "winner": a_game.winning_player_idx if a_game.winning_player_idx != -1 else None,
+    }
+
+def encode_message(obj: Dict) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+class GameBroadcast:
+    """
+    The subscribers to one Game's diffs (see the module docstring).
+    """
+
+    game: Game
+    keyframe_interval: int
+    subscribers: List[Callable[[bytes], None]]
+    keyframe_message: bytes
+    diff_messages: List[bytes] # since the keyframe
+    is_ended: bool
+
+    def __init__(
+        self,
+        a_game: Game,
+        keyframe_interval: int = KEYFRAME_INTERVAL,
+        ) -> None:
+        self.game = a_game
+        self.keyframe_interval = keyframe_interval
+        self.subscribers = []
+        self.diff_messages = []
+        self.is_ended = False
+        self.update_keyframe()
+        a_game.add_diff_listener(self.on_diff)
+
+    def update_keyframe(self) -> None:
+        """
+        Encode the game's current position as the keyframe, and drop the diffs it includes.
+        """
+        self.keyframe_message = encode_message({
+            "type": "keyframe",
+            "turn": self.game.get_game_record().count_actions(),
+            "state": get_keyframe_dict(self.game),
+        })
+        self.diff_messages = []
+        return
+
+    def subscribe(self, subscriber: Callable[[bytes], None]) -> None:
+        """
+        Send subscriber(message) the keyframe and the diffs since, then every message from now on.
+        """
+        subscriber(self.keyframe_message)
+        for message in self.diff_messages:
+            subscriber(message)
+        self.subscribers.append(subscriber)
+        return
+
+    def unsubscribe(self, subscriber: Callable[[bytes], None]) -> None:
+        self.subscribers.remove(subscriber)
+        return
+
+    def count_subscribers(self) -> int:
+        return len(self.subscribers)
+
+    def on_diff(self, diff: Dict) -> None:
+        message = encode_message(dict(type="diff", **diff))
+        # a subscriber may unsubscribe (e.g. a spectator dropped for falling behind) while being sent a message
+        for subscriber in list(self.subscribers):
+            subscriber(message)
+        self.diff_messages.append(message)
+        if len(self.diff_messages) >= self.keyframe_interval:
+            self.update_keyframe()
+        return
+
+    def end(self, winning_player_idx: int) -> None:
+        """
+        Send the end of the game, and make the final position the keyframe.
+        """
+        self.is_ended = True
+        turn = self.game.get_game_record().count_actions()
+        message = encode_message({"type": "end", "turn": turn, "winner": winning_player_idx})
+        for subscriber in list(self.subscribers):
+            subscriber(message)
+        self.update_keyframe()
+        self.diff_messages.append(message)
+        return
+
+    def close(self) -> None:
+        """
+        Stop listening to the game, and drop the subscribers, calling each one last with None.
+        """
+        self.game.remove_diff_listener(self.on_diff)
+        for subscriber in list(self.subscribers):
+            subscriber(None)
+        self.subscribers = []
+        return
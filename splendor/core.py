@@ -3,13 +3,11 @@ core.py - Core splendor classes/functions.  Used heavily by the other splendor m
 """
 
 from enum import Enum
+import itertools
 import json
 import random
 from typing import List, Dict, Set, Tuple
 
-import logging
-logging.basicConfig(level=logging.INFO)
-
 GEM_NAME_COMMON_STR_DICT = {
     "black": "onyx",
     "blue": "sapphire",
@@ -30,6 +28,40 @@ GEM_NAME_ALL_STR_DICT = {
 def is_joker(gem_str: str) -> bool:
     return gem_str == "yellow"
 
+# Bonus and noble requirement vectors are packed into one int, with a BONUS_FIELD_BITS-bit field per common gem
+# (in GEM_NAME_COMMON_STR_DICT order): the low bits hold the count, saturated at BONUS_COUNT_MAX, and the top
+# bit is a guard bit.  Setting the guard bits of a bonus vector and subtracting a requirement vector can't
+# borrow across fields, and leaves a field's guard bit set exactly when its bonus covers its requirement.
+BONUS_FIELD_BITS = 4
+BONUS_COUNT_MAX = (1 << (BONUS_FIELD_BITS - 1)) - 1
+BONUS_FIELD_SHIFT_DICT = {gem_name: idx * BONUS_FIELD_BITS for idx, gem_name in enumerate(GEM_NAME_COMMON_STR_DICT)}
+BONUS_GUARD_MASK = sum(1 << (shift + BONUS_FIELD_BITS - 1) for shift in BONUS_FIELD_SHIFT_DICT.values())
+
+def pack_gem_counts(counts: Dict) -> int:
+    """
+    Pack counts (common gem name or Gem -> count) into a bonus vector, saturating each count at BONUS_COUNT_MAX.
+
+    >>> pack_gem_counts({"black": 1, "blue": 2}) == 1 | 2 << BONUS_FIELD_BITS
+    True
+    >>> pack_gem_counts({"white": 12}) == BONUS_COUNT_MAX << BONUS_FIELD_SHIFT_DICT["white"]
+    True
+    """
+    packed = 0
+    for gem, count in counts.items():
+        packed |= min(count, BONUS_COUNT_MAX) << BONUS_FIELD_SHIFT_DICT[str(gem)]
+    return packed
+
+def is_requirement_met(bonuses_packed: int, requirement_packed: int) -> bool:
+    """
+    Return True if every gem count of bonuses_packed is at least that of requirement_packed.
+
+    >>> is_requirement_met(pack_gem_counts({"red": 4, "green": 5}), pack_gem_counts({"red": 4, "green": 4}))
+    True
+    >>> is_requirement_met(pack_gem_counts({"red": 7, "green": 3}), pack_gem_counts({"red": 4, "green": 4}))
+    False
+    """
+    return ((bonuses_packed | BONUS_GUARD_MASK) - requirement_packed) & BONUS_GUARD_MASK == BONUS_GUARD_MASK
+
 # class GemType:
 #     """
 #     Hashable class representing the type of a gem.
@@ -268,9 +300,7 @@ class DevCardCache:
     def add(self, dev_card: DevCard,) -> None:
         dc_gem = dev_card.get_gem()
         if self.d.get(dc_gem) is None:
-            logging.debug("creating new key within self.d")
             self.d[dc_gem] = list()
-        logging.debug("adding card to self.d")
         self.d[dc_gem].append(dev_card)
         return
 
@@ -278,7 +308,7 @@ class DevCardCache:
         """
         Remove dev_card matching some DevCard in the Cache, or raise exception.  For undoing.
         """
-        dc_gem = dev_card.get_type()
+        dc_gem = dev_card.get_gem()
         if dc_gem not in self.d.keys():
             raise Exception("cannot remove card from DevCardCache: card not found")
         try:
@@ -300,6 +330,12 @@ class DevCardCache:
             total_count += len(self.d[gem])
         return total_count
 
+    def get_list(self) -> List[DevCard]:
+        """
+        Return (as a new List) the dev cards in the cache, grouped by gem.
+        """
+        return [dev_card for dev_cards in self.d.values() for dev_card in dev_cards]
+
     def calc_ppoints(self) -> int:
         """
         Calculate ppoints across this cache
@@ -310,6 +346,15 @@ class DevCardCache:
                 ret += dc.ppoints
         return ret
 
+    def get_bonuses_packed(self) -> int:
+        """
+        Return the bonuses of the cards in this cache as a packed bonus vector (see pack_gem_counts()).
+        """
+        packed = 0
+        for gem, dev_cards in self.d.items():
+            packed |= min(len(dev_cards), BONUS_COUNT_MAX) << BONUS_FIELD_SHIFT_DICT[gem.get_name()]
+        return packed
+
     def calc_discount(self, gem: Gem) -> int:
         """
         Return current discount for DevCardType arg
@@ -414,6 +459,18 @@ class DevCardReserve:
 
         return
 
+    def get_list(self) -> List[DevCard]:
+        return self.l
+
+    def find_card(self, card_seeking: DevCard) -> int:
+        """
+        Find card_seeking within this reserve; return its index or -1 if not found.
+        """
+        for idx in range(self.count()):
+            if self.l[idx] == card_seeking:
+                return idx
+        return -1
+
     def count(self) -> int:
         return len(self.l)
 
@@ -441,8 +498,8 @@ class DevCardReserve:
         if self.count() > 0:
             ret += ": "
             ret_list = []
-            for t in self.l:
-                ret_list.append(self.l.get(t).__repr__())
+            for dev_card in self.l:
+                ret_list.append(dev_card.__repr__())
             ret += ",".join(ret_list)
         ret += ">"
         return ret
@@ -452,9 +509,11 @@ UPFACING_CARDS_LEN = 4
 
 class DevCardDeck:
     """
-    A list of all the dev cards of one level, representing one of the three game decks.
+    One of the three game decks: UPFACING_CARDS_LEN face-up slots, plus the face-down draw pile.
 
-    Includes face-up and face-down cards.  Face-up cards are at lowest indices.
+    The draw pile is the deck's cards in dealt order, with a draw pointer to its top card; it is never modified,
+    so copies of the deck share it.  Taking a face-up card refills its slot from the top of the pile in O(1),
+    so the other face-up cards keep their positions.  A slot stays empty (None) once the pile runs out.
 
     >>> dc0 = DevCard(level=1, gem=Gem("black"), ppoints=2, cost={"blue": 2, "red": 1})
     >>> dc1 = DevCard(level=1, gem=Gem("black"), ppoints=0, cost={"blue": 3})
@@ -484,12 +543,12 @@ class DevCardDeck:
 
     >>> dev_card_deck.pop_by_idx(2) == dc2
     True
+    >>> dev_card_deck.get_facing() == [dc0, dc1, dc4, dc3]
+    True
     >>> dev_card_deck.pop_hidden_card() == dc5
     True
     >>> dev_card_deck.count()
     5
-    >>> dev_card_deck.get_facing() == [dc0, dc1, dc3, dc4]
-    True
     >>> dev_card_deck.count_facing()
     4
     >>> dev_card_deck.is_hidden_empty()
@@ -499,11 +558,11 @@ class DevCardDeck:
 
     >>> dev_card_deck.pop_by_idx(0) == dc0
     True
-    >>> dev_card_deck.pop_by_idx(0) == dc1
+    >>> dev_card_deck.pop_by_idx(0) == dc6
     True
     >>> dev_card_deck.count()
     3
-    >>> dev_card_deck.get_facing() == [dc3, dc4, dc6]
+    >>> dev_card_deck.get_facing() == [None, dc1, dc4, dc3]
     True
     >>> dev_card_deck.count_facing()
     3
@@ -511,6 +570,9 @@ class DevCardDeck:
     True
     >>> dev_card_deck.count_hidden()
     0
+    >>> dev_card_deck.pop_by_idx(0) #doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    Exception:...
 
     >>> dev_card_deck = DevCardDeck(1, dev_cards_list.copy())
     >>> dev_card_deck.shuffle()
@@ -520,76 +582,141 @@ class DevCardDeck:
     >>> dev_card_deck = DevCardDeck(1, dev_cards_list.copy())
     >>> dev_card_deck.find_card(dc0)
     0
+    >>> dev_card_deck.find_card(dc3)
+    3
     >>> dev_card_deck.find_card(dc4)
-    4
+    -1
     >>> dc7 = DevCard(level=2, gem=Gem("green"), ppoints=2, cost={"white": 4, "green": 3})
     >>> dev_card_deck.find_card(dc7)
     -1
+
+    >>> from copy import deepcopy
+    >>> dev_card_deck_copy = deepcopy(dev_card_deck)
+    >>> dev_card_deck_copy.pop_by_idx(1) == dc1
+    True
+    >>> dev_card_deck.get_facing() == [dc0, dc1, dc2, dc3]
+    True
+    >>> dev_card_deck_copy.get_facing() == [dc0, dc4, dc2, dc3]
+    True
     """
     # TODO: is there a good way to doctest shuffle()?
 
     level: int
-    l: List[DevCard] # indices 0..3 are the face-up cards; 4..n are the face-down, where 4 is the top-most
+    facing: List[DevCard] # UPFACING_CARDS_LEN slots; None if empty
+    facing_count: int
+    pile: List[DevCard] # the cards dealt to the pile in order, drawn ones included; shared by copies, never modified
+    draw_idx: int # index into pile of the top face-down card
 
     def __init__(self, level: int, l: List[DevCard] = None) -> None:
         """
-        Load all of this level's cards
+        Load all of this level's cards: l[0..3] are dealt face-up, and l[4] is the top of the face-down pile.
         """
         self.level = level
-        self.l = l
+        self._deal(l if l is not None else [])
+
+    def _deal(self, l: List[DevCard]) -> None:
+        self.pile = l
+        self.facing = [None] * UPFACING_CARDS_LEN
+        self.facing_count = min(len(l), UPFACING_CARDS_LEN)
+        for idx in range(self.facing_count):
+            self.facing[idx] = l[idx]
+        self.draw_idx = self.facing_count
+        return
+
+    def __deepcopy__(self, memo):
+        # the pile and the (immutable) cards are shared; only the slots are the copy's own
+        ret = DevCardDeck.__new__(DevCardDeck)
+        ret.level = self.level
+        ret.facing = self.facing.copy()
+        ret.facing_count = self.facing_count
+        ret.pile = self.pile
+        ret.draw_idx = self.draw_idx
+        memo[id(self)] = ret
+        return ret
 
     def get_level(self) -> int:
         return self.level
 
     def get_list(self) -> List[DevCard]:
-        return self.l
+        """
+        Return (as a new List) the cards in the deck: the face-up ones in slot order, then the face-down ones from
+        the top.
+        """
+        return [dev_card for dev_card in self.facing if dev_card is not None] + self.pile[self.draw_idx:]
 
     def get_facing(self) -> List[DevCard]:
         """
-        Return cards at indices 0..3 (if they exist), which are the facing ones, as a List
+        Return the face-up slots (None for an empty one).  This is the deck's own List; don't modify it.
         """
-        return self.l[0:min(self.count(), UPFACING_CARDS_LEN)]
+        return self.facing
 
     def count(self) -> int:
-        return len(self.l)
+        return self.facing_count + self.count_hidden()
             
     def count_facing(self) -> int:
-        return min(self.count(), UPFACING_CARDS_LEN)
+        return self.facing_count
     
     def count_hidden(self) -> int:
-        if self.count() <= UPFACING_CARDS_LEN:
-            return 0
-        return self.count() - UPFACING_CARDS_LEN
+        return len(self.pile) - self.draw_idx
 
     def shuffle(self) -> None:
-        random.shuffle(self.l)
+        """
+        Shuffle all of the deck's remaining cards together and deal them again.
+        """
+        l = self.get_list()
+        random.shuffle(l)
+        self._deal(l)
+        return
+
+    def set_hidden(self, l: List[DevCard]) -> None:
+        """
+        Replace the face-down pile with l (top first), keeping the face-up cards; e.g. for a search to deal the
+        cards it can't see at random.
+
+        >>> dev_card_deck = DevCardDeck(1, [DevCard(level=1, gem=Gem("black"), ppoints=ppoints, cost={}) for ppoints in range(6)])
+        >>> dev_card_deck.set_hidden(dev_card_deck.get_list()[:3:-1])
+        >>> [dev_card.get_ppoints() for dev_card in dev_card_deck.get_list()], dev_card_deck.count_hidden()
+        ([0, 1, 2, 3, 5, 4], 2)
+        """
+        self.pile = l
+        self.draw_idx = 0
         return
 
     def find_card(self, card_seeking: DevCard) -> int:
         """
-        Find dev_card within this deck; return its index or -1 if not found.
+        Find card_seeking among the face-up cards; return its slot index or -1 if not found.
         """
-        for idx in range(self.count()): 
-            if self.l[idx] == card_seeking:
+        for idx in range(UPFACING_CARDS_LEN):
+            dev_card = self.facing[idx]
+            if dev_card is not None and dev_card == card_seeking:
                 return idx
         return -1
 
     def pop_by_idx(self, idx: int) -> DevCard:
         """
-        Remove DevCard at index idx and return it, or raise exc if oob
+        Remove the face-up DevCard in slot idx and return it, refilling the slot from the top of the pile; raise
+        exception if the slot doesn't exist or is empty.
         """
-        try:
-            return self.l.pop(idx)
-        except IndexError:
-            raise
+        dev_card = self.facing[idx]
+        if dev_card is None:
+            raise Exception(f"no face-up card in slot {idx}")
+        if self.draw_idx < len(self.pile):
+            self.facing[idx] = self.pile[self.draw_idx]
+            self.draw_idx += 1
+        else:
+            self.facing[idx] = None
+            self.facing_count -= 1
+        return dev_card
 
     def pop_hidden_card(self) -> DevCard:
         """
-        Remove DevCard at index 4, which is the top of the deck, and return it
+        Remove the top DevCard of the face-down pile and return it
         """
-        if self.count() < UPFACING_CARDS_LEN + 1:
+        if self.draw_idx >= len(self.pile):
             raise Exception("not enough cards remain to get hidden one")
-        return self.l.pop(UPFACING_CARDS_LEN)
+        dev_card = self.pile[self.draw_idx]
+        self.draw_idx += 1
+        return dev_card
 
     def is_empty(self) -> bool:
         if self.count() <= 0:
@@ -597,7 +724,7 @@ class DevCardDeck:
         return False
 
     def is_hidden_empty(self) -> bool:
-        if self.count() < UPFACING_CARDS_LEN + 1:
+        if self.count_hidden() <= 0:
             return True
         return False
 
@@ -609,7 +736,8 @@ class DevCardDeck:
 
         ret_list = []
         for card in self.get_facing():
-            ret_list.append(card.__str__())
+            if card is not None:
+                ret_list.append(card.__str__())
         ret_str += "\n".join(ret_list)
 
         return ret_str
@@ -646,11 +774,15 @@ class Noble:
     ppoints: int
     cost: Dict[Gem, int]
     image: bytes
+    requirement_packed: int # cost as a packed bonus vector
 
     def __init__(self, ppoints: int, cost: Dict[Gem, int], image: bytes = None):
+        if max(cost.values(), default=0) > BONUS_COUNT_MAX:
+            raise Exception(f"noble requirement above {BONUS_COUNT_MAX} cards of a gem: {cost}")
         self.ppoints = ppoints
         self.cost = cost
         self.image = image
+        self.requirement_packed = pack_gem_counts(cost)
 
     def get_ppoints(self) -> int:
         return self.ppoints
@@ -661,6 +793,9 @@ class Noble:
     def get_image(self) -> bytes:
         return self.image
 
+    def get_requirement_packed(self) -> int:
+        return self.requirement_packed
+
     def __eq__(self, other) -> bool:
         return (
                 self.ppoints == other.ppoints
@@ -705,11 +840,18 @@ class NoblesInPlay:
     >>> n3 = Noble(3, cost_dict_4)
     >>> nobles_in_play.find(n3)
     -1
+
+    >>> nobles_in_play.find_eligible(pack_gem_counts({"black": 4, "white": 3, "green": 4}))
+    1
+    >>> nobles_in_play.find_eligible(pack_gem_counts({"black": 3, "white": 9}))
+    -1
     """
 
     l: List[Noble] # this can be a set, but well make it a list for ease of mutability.
 
-    def __init__(self, l: List[Noble] = list()) -> None:
+    def __init__(self, l: List[Noble] = None) -> None:
+        if l is None:
+            l = list()
         self.l = l
 
     def count(self) -> int:
@@ -724,6 +866,16 @@ class NoblesInPlay:
                 return idx
         return -1
 
+    def find_eligible(self, bonuses_packed: int) -> int:
+        """
+        Return the index of the first Noble whose requirement the packed bonus vector meets, or -1 if none.
+        """
+        guarded = bonuses_packed | BONUS_GUARD_MASK
+        for idx in range(len(self.l)):
+            if (guarded - self.l[idx].requirement_packed) & BONUS_GUARD_MASK == BONUS_GUARD_MASK:
+                return idx
+        return -1
+
     def pop_by_idx(self, idx: int) -> Noble:
         """
         Remove Noble at index idx and return it, or raise exc if oob
@@ -733,6 +885,9 @@ class NoblesInPlay:
         except IndexError:
             raise
 
+    def get_list(self) -> List[Noble]:
+        return self.l
+
     def __str__(self) -> str:
         retstr = ""
         retstr += f"Nobles in play ({self.count()}):\n"
@@ -771,7 +926,7 @@ class Token:
     A token.
 
     >>> token = Token("black")
-    >>> token.get_gem_str()
+    >>> token.get_gem_name()
     'black'
     >>> token.get_image() == None
     True
@@ -779,7 +934,7 @@ class Token:
     False
 
     >>> token = Token("yellow")
-    >>> token.get_gem_str()
+    >>> token.get_gem_name()
     'yellow'
     >>> token.is_joker()
     True
@@ -811,13 +966,14 @@ class Token:
         return self.gem.__str__()
     
     def __repr__(self) -> str:
-        return f"<Token: {self.gem.__repr__()}, image {len(self.image)} bytes>"
+        return f"<Token: {self.gem.__repr__()}, image {len(self.image) if self.image else 0} bytes>"
 
 
 class TokenCache:
     """
     The set of Tokens currently held by a player (PlayerTokenCache) or game (GameTokenCache).
 
+    >>> t_black_1 = Token("black")
     >>> t_black_2 = Token("black")
     >>> t_yellow = Token("yellow")
     >>> t_blue = Token("blue")
@@ -828,8 +984,10 @@ class TokenCache:
     2
     >>> token_cache.count_token(t_black_2)
     2
+    >>> token_cache.count_by_name("black")
+    2
     >>> t_red = Token("red")
-    >>> token_cache.count_token(t_red
+    >>> token_cache.count_token(t_red)
     0
     >>> token_cache.is_token_empty(t_black_1)
     False
@@ -859,7 +1017,7 @@ class TokenCache:
     5
     """
 
-    d: Dict[Token, int]
+    d: Dict[Gem, int]
 
     def __init__(self, t: Tuple[Token] = ()) -> None:
         self.d = {}
@@ -870,7 +1028,13 @@ class TokenCache:
         self.d = {}
 
     def get_tokens_list(self) -> List[Token]:
-        return list(self.d.keys())
+        return [Token(gem.get_name()) for gem in self.d.keys()]
+
+    def get_counts(self) -> Tuple[int, ...]:
+        """
+        Return the count of each token type, in GEM_NAME_ALL_STR_DICT order.
+        """
+        return tuple(self.count_by_name(gem_name) for gem_name in GEM_NAME_ALL_STR_DICT.keys())
  
     def add(self, token: Token, how_many: int=1) -> None:
         """
@@ -883,18 +1047,26 @@ class TokenCache:
         """
         Add how_many tokens (by a string describing a token).
         """
-        self.d[Token(gem_name)] = self.d.setdefault(Token(gem_name), 0) + how_many
+        gem = Gem(gem_name)
+        self.d[gem] = self.d.setdefault(gem, 0) + how_many
 
     def remove(self, token: Token, how_many: int=1) -> None:
         """
-        Remove tokens from this cache, by a string describing a token type.
+        Remove how_many tokens (by Token, not by a string describing a token).
+        """
+        self.remove_by_name(token.get_gem_name(), how_many)
+
+    def remove_by_name(self, gem_name: str, how_many: int=1) -> None:
         """
-        if self.d.get(token) and self.d.get(token) >= how_many:
-            self.d[token] -= how_many
+        Remove how_many tokens (by a string describing a token), or raise exception if there aren't enough.
+        """
+        gem = Gem(gem_name)
+        if self.d.get(gem) and self.d.get(gem) >= how_many:
+            self.d[gem] -= how_many
             return
         else:
             raise Exception(
-                f"{how_many} of token type {token} not found in token cache"
+                f"{how_many} of token type {gem_name} not found in token cache"
             )
 
     def count(self) -> int:
@@ -904,16 +1076,17 @@ class TokenCache:
         return count
 
     def count_token(self, token: Token) -> int:
-        count = self.d.get(token)
+        return self.count_by_name(token.get_gem_name())
+
+    def count_by_name(self, gem_name: str) -> int:
+        count = self.d.get(Gem(gem_name))
         if count:
             return count
         else:
             return 0
 
     def is_token_empty(self, token: Token) -> bool:
-        if not self.d.get(token) or self.d.get(token) < 0:
-            return True
-        return False
+        return self.count_token(token) <= 0
 
     def __str__(self) -> str:
         ret = ""
@@ -930,6 +1103,72 @@ class TokenCache:
 
 PLAYER_TOKEN_CACHE_MAX = 10
 
+# A player left over PLAYER_TOKEN_CACHE_MAX by taking tokens discards back down to it: at most TOKEN_DISCARD_MAX
+# tokens, when taking three at the max.  Every distinct discard (a count per token type, in GEM_NAME_ALL_STR_DICT
+# order) is enumerated once here, so that a discard is just its index into TOKEN_DISCARDS_LIST.
+TOKEN_DISCARD_MAX = 3
+TOKEN_GEM_IDX_MAP = {gem_name: idx for idx, gem_name in enumerate(GEM_NAME_ALL_STR_DICT)}
+
+def _enumerate_discards() -> List[Tuple[int, ...]]:
+    discards = []
+    for size in range(1, TOKEN_DISCARD_MAX + 1):
+        for gem_idxs in itertools.combinations_with_replacement(range(len(GEM_NAME_ALL_STR_DICT)), size):
+            discard = [0] * len(GEM_NAME_ALL_STR_DICT)
+            for gem_idx in gem_idxs:
+                discard[gem_idx] += 1
+            discards.append(tuple(discard))
+    return discards
+
+TOKEN_DISCARDS_LIST = _enumerate_discards()
+# discard size -> indices into TOKEN_DISCARDS_LIST of the discards of that many tokens
+TOKEN_DISCARD_IDXS_BY_SIZE = {
+    size: [idx for idx, discard in enumerate(TOKEN_DISCARDS_LIST) if sum(discard) == size]
+    for size in range(1, TOKEN_DISCARD_MAX + 1)
+}
+# token counts -> list_discard_idxs(); filled in as over-limit token counts are seen
+_discard_idxs_cache: Dict[Tuple[int, ...], List[int]] = {}
+
+def list_discard_idxs(token_counts: Tuple[int, ...]) -> List[int]:
+    """
+    Return the indices into TOKEN_DISCARDS_LIST of the distinct discards that bring token_counts (see
+    TokenCache.get_counts()) down to PLAYER_TOKEN_CACHE_MAX, or an empty list if token_counts isn't over it.
+
+    >>> len(TOKEN_DISCARDS_LIST)
+    83
+    >>> [TOKEN_DISCARDS_LIST[idx] for idx in list_discard_idxs((9, 0, 1, 0, 0, 1))]
+    [(1, 0, 0, 0, 0, 0), (0, 0, 1, 0, 0, 0), (0, 0, 0, 0, 0, 1)]
+    >>> len(list_discard_idxs((3, 3, 3, 2, 1, 1)))
+    43
+    >>> list_discard_idxs((2, 2, 2, 2, 2, 0))
+    []
+    """
+    idxs = _discard_idxs_cache.get(token_counts)
+    if idxs is not None:
+        return idxs
+    excess = sum(token_counts) - PLAYER_TOKEN_CACHE_MAX
+    if excess <= 0:
+        return []
+    if excess > TOKEN_DISCARD_MAX:
+        raise Exception(f"cannot discard {excess} tokens: at most {TOKEN_DISCARD_MAX} at once")
+    idxs = [
+        idx for idx in TOKEN_DISCARD_IDXS_BY_SIZE[excess]
+        if all(discard_count <= count for discard_count, count in zip(TOKEN_DISCARDS_LIST[idx], token_counts))
+        ]
+    _discard_idxs_cache[token_counts] = idxs
+    return idxs
+
+def get_discard_gem_names(discard_idx: int) -> List[str]:
+    """
+    Return the gem name of every token in a discard, e.g. ["black", "black", "yellow"].
+
+    >>> get_discard_gem_names(list_discard_idxs((9, 0, 1, 0, 0, 1))[0])
+    ['black']
+    """
+    gem_names = []
+    for gem_name, count in zip(GEM_NAME_ALL_STR_DICT.keys(), TOKEN_DISCARDS_LIST[discard_idx]):
+        gem_names += [gem_name] * count
+    return gem_names
+
 class PlayerTokenCache(TokenCache):
     """
     The set of tokens currently held by a player.
@@ -1000,7 +1239,8 @@ class PlayerTokenCache(TokenCache):
     >>> dev_card_1 = DevCard(level=1, gem=Gem("black"), ppoints=2, cost=cost_dict_1)
     >>> player_token_cache.can_purchase_dev_card(dev_card_1)
     True
-    >>> player_token_cache.purchase_dev_card(dev_card_1)
+    >>> player_token_cache.purchase_dev_card(dev_card_1).count()
+    3
     >>> player_token_cache.count()
     5
     >>> player_token_cache.count_token(t_black)
@@ -1015,7 +1255,8 @@ class PlayerTokenCache(TokenCache):
     >>> dev_card_2 = DevCard(level=1, gem=Gem("black"), ppoints=2, cost=cost_dict_2)
     >>> player_token_cache.can_purchase_dev_card(dev_card_2)
     True
-    >>> player_token_cache.purchase_dev_card(dev_card_2)
+    >>> player_token_cache.purchase_dev_card(dev_card_2).count_token(t_yellow)
+    1
     >>> player_token_cache.count()
     2
     >>> player_token_cache.count_token(t_black)
@@ -1033,6 +1274,29 @@ class PlayerTokenCache(TokenCache):
     >>> player_token_cache.purchase_dev_card(dev_card_3) #doctest: +ELLIPSIS
     Traceback (most recent call last):
     Exception:...
+
+    >>> dev_card_cache = DevCardCache()
+    >>> dev_card_cache.add(DevCard(level=1, gem=Gem("black"), ppoints=0, cost={"red": 1}))
+    >>> player_token_cache.can_purchase_dev_card(dev_card_3, dev_card_cache)
+    True
+    >>> player_token_cache.purchase_dev_card(dev_card_3, dev_card_cache).count()
+    6
+    >>> player_token_cache.count()
+    2
+
+    >>> player_token_cache = PlayerTokenCache(initial_tokens + (t_red, t_red, t_white, t_white))
+    >>> player_token_cache.get_counts()
+    (4, 0, 0, 5, 2, 1)
+    >>> discard_idx = list_discard_idxs(player_token_cache.get_counts())[-1]
+    >>> get_discard_gem_names(discard_idx)
+    ['white', 'yellow']
+    >>> player_token_cache.discard(discard_idx).count()
+    2
+    >>> player_token_cache.get_counts()
+    (4, 0, 0, 5, 1, 0)
+    >>> player_token_cache.discard(discard_idx) #doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    Exception:...
     """
 
     def is_max(self) -> bool:
@@ -1051,11 +1315,24 @@ class PlayerTokenCache(TokenCache):
         """
         return max(PLAYER_TOKEN_CACHE_MAX - self.count(), 0)
 
-    def _purchase_dev_card_tokens_needed(self, dev_card) -> TokenCache:
+    def discard(self, discard_idx: int) -> TokenCache:
+        """
+        Remove the tokens of a discard (an index into TOKEN_DISCARDS_LIST), and return them.  Raise exception if
+        it isn't one of list_discard_idxs() for this cache.
+        """
+        if discard_idx not in list_discard_idxs(self.get_counts()):
+            raise Exception(f"not a discard down to {PLAYER_TOKEN_CACHE_MAX} tokens: {TOKEN_DISCARDS_LIST[discard_idx]}")
+        tokens_discarded = TokenCache()
+        for gem_name in get_discard_gem_names(discard_idx):
+            self.remove_by_name(gem_name)
+            tokens_discarded.add_by_name(gem_name)
+        return tokens_discarded
+
+    def _purchase_dev_card_tokens_needed(self, dev_card, dev_card_cache: DevCardCache = None) -> TokenCache:
         """
         Return a TokenCache of the tokens needed to purchase dev_card, or None if the card cannot be purchased.
 
-        Considers jokers.
+        Considers jokers, and the bonuses of the cards in dev_card_cache (if given).
         """
         token_cache_needed = TokenCache()
         jokers_needed = 0
@@ -1063,31 +1340,34 @@ class PlayerTokenCache(TokenCache):
         cost_dict = dev_card.get_cost_dict()
         for gem_name in cost_dict.keys():
             cost_count_this = cost_dict[gem_name]
-            cache_count_this = self.count_token(gem_name)
+            if dev_card_cache is not None:
+                cost_count_this = max(cost_count_this - dev_card_cache.calc_discount(Gem(gem_name)), 0)
+            cache_count_this = self.count_by_name(gem_name)
             token_cache_needed.add_by_name(gem_name, min(cost_count_this, cache_count_this))
             if cost_count_this > cache_count_this:
                 jokers_needed += (cost_count_this - cache_count_this)
-        if jokers_needed > self.count_token(Token("yellow")):
+        if jokers_needed > self.count_by_name("yellow"):
             return None
         token_cache_needed.add_by_name("yellow", jokers_needed)
         return token_cache_needed
 
-    def can_purchase_dev_card(self, dev_card) -> bool:
+    def can_purchase_dev_card(self, dev_card, dev_card_cache: DevCardCache = None) -> bool:
         """
-        Return True if dev_card can be purchased given the tokens in this token cache.
+        Return True if dev_card can be purchased given the tokens in this token cache (and bonuses in dev_card_cache).
         """
-        return self._purchase_dev_card_tokens_needed(dev_card) != None
+        return self._purchase_dev_card_tokens_needed(dev_card, dev_card_cache) != None
 
-    def purchase_dev_card(self, dev_card) -> None:
+    def purchase_dev_card(self, dev_card, dev_card_cache: DevCardCache = None) -> TokenCache:
         """
-        Remove tokens needed to purchase dev card.  Raise exception if there aren't enough tokens.
+        Remove tokens needed to purchase dev card, and return them.  Raise exception if there aren't enough tokens.
         """
-        token_cache_needed = self._purchase_dev_card_tokens_needed(dev_card)
+        token_cache_needed = self._purchase_dev_card_tokens_needed(dev_card, dev_card_cache)
         if token_cache_needed == None:
             raise Exception(f"insufficient tokens to purchase dev card {dev_card}")
         for token in token_cache_needed.get_tokens_list():
-            self.remove(token, token_cache_needed.count_token(token))
-        return
+            if token_cache_needed.count_token(token) > 0:
+                self.remove(token, token_cache_needed.count_token(token))
+        return token_cache_needed
 
     def __repr__(self) -> str:
         return f"<PlayerTokenCache: {self.count()} total>"
@@ -1144,8 +1424,8 @@ class GameTokenCache(TokenCache):
         if players_count not in TOKEN_COUNT_MAP.keys():
             raise Exception("invalid players_count")
         for gem_name in GEM_NAME_COMMON_STR_DICT.keys():
-            self.d[Token(gem_name)] = TOKEN_COUNT_MAP[players_count]
-        self.d[Token("yellow")] = 5
+            self.d[Gem(gem_name)] = TOKEN_COUNT_MAP[players_count]
+        self.d[Gem("yellow")] = 5
 
     # def can_action_take_three_tokens(token_types_set: Set[TokenType]) -> bool
     # def can_action_take_two_tokens(token_types_set: Set[TokenType]) -> bool
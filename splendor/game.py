@@ -3,35 +3,71 @@ game.py - TODO
 """
 
 from copy import deepcopy
+import itertools
 from splendor.core import (
+        BONUS_FIELD_BITS,
         DevCard,
         DevCardDeck,
-        DevCardType,
+        Gem,
+        GEM_NAME_ALL_STR_DICT,
+        GEM_NAME_COMMON_STR_DICT,
         GameTokenCache,
+        is_joker,
         Noble,
         NoblesInPlay,
+        PLAYER_TOKEN_CACHE_MAX,
         PlayerTokenCache,
         Token,
-        TokenType,
+        TokenCache,
+        TOKEN_DISCARD_MAX,
+        TOKEN_DISCARDS_LIST,
         )
 from splendor.game_setup import (
         create_dev_card_deck_shuffled,
         create_nobles_in_play_shuffled,
+        DEV_CARD_GEM_COST_MAX,
         GAME_INTRO,
+        get_dev_card_by_id,
+        get_dev_card_id,
+        get_noble_by_id,
+        get_noble_id,
         )
 from splendor.interactive import (
+        CONSOLE_INPUT,
+        InputSource,
         prompt_number,
         prompt_string,
         prompt_yn,
         )
 from splendor.player import (
         Player,
+        PlayerState,
+        PlayerStateHistory,
+        purchase_dev_card_in_player_state,
+        reserve_dev_card_in_player_state,
+        take_tokens_in_player_state,
+        )
+from splendor.policy import (
+        policy_greedy,
+        )
+from splendor.record import (
+        ACTION_PASS,
+        ACTION_PURCHASE_DEV_CARD,
+        ACTION_RESERVE_DEV_CARD,
+        ACTION_RESERVE_HIDDEN_DEV_CARD,
+        ACTION_TAKE_THREE_TOKENS,
+        ACTION_TAKE_TWO_TOKENS,
+        GameRecord,
+        gem_idx_to_name,
+        gem_name_to_idx,
+        NO_ARG,
+        )
+from splendor.render import (
+        describe_dev_card,
+        TerminalRenderer,
         )
 import sys
-from typing import List, Dict, Set, Tuple
-
-import logging
-logging.basicConfig(level=logging.INFO)
+from typing import Callable, List, Dict, Set, Tuple
 
 PLAYERS_COUNT_MIN = 2
 PLAYERS_COUNT_MAX = 4
@@ -40,40 +76,52 @@ WINNING_SCORE = 15
 
 TAKE_TWO_TOKENS_MINIMUM = 4
 
+# headless games that reach this many rounds without a winning score are ended
+MAX_ROUNDS_HEADLESS = 100
+
+# When pruning dominated actions, an action's effective token gain (a count per token type, in
+# GEM_NAME_ALL_STR_DICT order, between -TOKEN_DISCARD_MAX and 2) is packed like core's bonus vectors: one
+# BONUS_FIELD_BITS-bit field per token type holding the gain plus TOKEN_GAIN_OFFSET, under a guard bit.  One
+# subtraction then tells whether a gain is at least another in every token type.
+TOKEN_GAIN_OFFSET = TOKEN_DISCARD_MAX
+TOKEN_GAIN_GUARD_MASK = sum(
+    1 << (idx * BONUS_FIELD_BITS + BONUS_FIELD_BITS - 1) for idx in range(len(GEM_NAME_ALL_STR_DICT))
+    )
+
 class GameState:
     """
     Record of a particular state of the game.  Does not include Players.
 
-    >>> dc0 = DevCard(level=1, t=DevCardType("black"), ppoints=2, cost={"blue": 2, "red": 1})
-    >>> dc1 = DevCard(level=1, t=DevCardType("black"), ppoints=0, cost={"blue": 3})
-    >>> dc2 = DevCard(level=1, t=DevCardType("blue"), ppoints=1, cost={"white": 1, "red": 1, "green": 3})
-    >>> dc3 = DevCard(level=1, t=DevCardType("red"), ppoints=4, cost={"white": 1, "red": 1, "green": 3})
-    >>> dc4 = DevCard(level=1, t=DevCardType("red"), ppoints=4, cost={"white": 1, "red": 1, "green": 3})
-    >>> dc5 = DevCard(level=1, t=DevCardType("red"), ppoints=0, cost={"red": 1, "green": 3})
-    >>> dc6 = DevCard(level=1, t=DevCardType("white"), ppoints=0, cost={"white": 1, "green": 3})
+    >>> dc0 = DevCard(level=1, gem=Gem("black"), ppoints=2, cost={"blue": 2, "red": 1})
+    >>> dc1 = DevCard(level=1, gem=Gem("black"), ppoints=0, cost={"blue": 3})
+    >>> dc2 = DevCard(level=1, gem=Gem("blue"), ppoints=1, cost={"white": 1, "red": 1, "green": 3})
+    >>> dc3 = DevCard(level=1, gem=Gem("red"), ppoints=4, cost={"white": 1, "red": 1, "green": 3})
+    >>> dc4 = DevCard(level=1, gem=Gem("red"), ppoints=4, cost={"white": 1, "red": 1, "green": 3})
+    >>> dc5 = DevCard(level=1, gem=Gem("red"), ppoints=0, cost={"red": 1, "green": 3})
+    >>> dc6 = DevCard(level=1, gem=Gem("white"), ppoints=0, cost={"white": 1, "green": 3})
     >>> dev_card_deck_1 = DevCardDeck(1, [dc0, dc1, dc2, dc3, dc4, dc5, dc6])
 
-    >>> dc0 = DevCard(level=2, t=DevCardType("black"), ppoints=2, cost={"blue": 2, "red": 1})
-    >>> dc1 = DevCard(level=2, t=DevCardType("black"), ppoints=0, cost={"blue": 3})
-    >>> dc2 = DevCard(level=2, t=DevCardType("blue"), ppoints=1, cost={"white": 1, "red": 1, "green": 3})
-    >>> dc3 = DevCard(level=2, t=DevCardType("red"), ppoints=4, cost={"white": 1, "red": 1, "green": 3})
-    >>> dc4 = DevCard(level=2, t=DevCardType("red"), ppoints=4, cost={"white": 1, "red": 1, "green": 3})
+    >>> dc0 = DevCard(level=2, gem=Gem("black"), ppoints=2, cost={"blue": 2, "red": 1})
+    >>> dc1 = DevCard(level=2, gem=Gem("black"), ppoints=0, cost={"blue": 3})
+    >>> dc2 = DevCard(level=2, gem=Gem("blue"), ppoints=1, cost={"white": 1, "red": 1, "green": 3})
+    >>> dc3 = DevCard(level=2, gem=Gem("red"), ppoints=4, cost={"white": 1, "red": 1, "green": 3})
+    >>> dc4 = DevCard(level=2, gem=Gem("red"), ppoints=4, cost={"white": 1, "red": 1, "green": 3})
     >>> dev_card_deck_2 = DevCardDeck(2, [dc0, dc1, dc2, dc3, dc4])
     
-    >>> dc0 = DevCard(level=3, t=DevCardType("black"), ppoints=4, cost={"blue": 2, "red": 5})
-    >>> dc1 = DevCard(level=3, t=DevCardType("black"), ppoints=5, cost={"blue": 6})
-    >>> dc2 = DevCard(level=3, t=DevCardType("blue"), ppoints=5, cost={"white": 3, "red": 5, "green": 3})
-    >>> dc3 = DevCard(level=3, t=DevCardType("red"), ppoints=4, cost={"white": 3, "red": 3, "green": 3})
-    >>> dc4 = DevCard(level=3, t=DevCardType("red"), ppoints=4, cost={"white": 3, "red": 3, "green": 3})
-    >>> dc5 = DevCard(level=3, t=DevCardType("red"), ppoints=5, cost={"red": 4, "green": 3})
-    >>> dc6 = DevCard(level=3, t=DevCardType("white"), ppoints=4, cost={"white": 5, "green": 3})
+    >>> dc0 = DevCard(level=3, gem=Gem("black"), ppoints=4, cost={"blue": 2, "red": 5})
+    >>> dc1 = DevCard(level=3, gem=Gem("black"), ppoints=5, cost={"blue": 6})
+    >>> dc2 = DevCard(level=3, gem=Gem("blue"), ppoints=5, cost={"white": 3, "red": 5, "green": 3})
+    >>> dc3 = DevCard(level=3, gem=Gem("red"), ppoints=4, cost={"white": 3, "red": 3, "green": 3})
+    >>> dc4 = DevCard(level=3, gem=Gem("red"), ppoints=4, cost={"white": 3, "red": 3, "green": 3})
+    >>> dc5 = DevCard(level=3, gem=Gem("red"), ppoints=5, cost={"red": 4, "green": 3})
+    >>> dc6 = DevCard(level=3, gem=Gem("white"), ppoints=4, cost={"white": 5, "green": 3})
     >>> dev_card_deck_3 = DevCardDeck(3, [dc0, dc1, dc2, dc3, dc4, dc5, dc6])
 
     >>> n1 = Noble(3, {'black': 4, 'white': 4})
     >>> n2 = Noble(3, {'black': 3, 'white': 3, 'blue': 3})
     >>> n3 = Noble(3, {'black': 4, 'green': 4})
     >>> n4 = Noble(3, {'white': 4, 'red': 4})
-    >>> nobles_in_play = NoblesInPlay(set((n1, n2, n3, n4)))
+    >>> nobles_in_play = NoblesInPlay([n1, n2, n3, n4])
 
     >>> game_token_cache = GameTokenCache(players_count=2)
     
@@ -150,36 +198,36 @@ class GameStateHistory:
     """
     Record of all of the historical states of the game.
 
-    >>> dc0 = DevCard(level=1, t=DevCardType("black"), ppoints=2, cost={"blue": 2, "red": 1})
-    >>> dc1 = DevCard(level=1, t=DevCardType("black"), ppoints=0, cost={"blue": 3})
-    >>> dc2 = DevCard(level=1, t=DevCardType("blue"), ppoints=1, cost={"white": 1, "red": 1, "green": 3})
-    >>> dc3 = DevCard(level=1, t=DevCardType("red"), ppoints=4, cost={"white": 1, "red": 1, "green": 3})
-    >>> dc4 = DevCard(level=1, t=DevCardType("red"), ppoints=4, cost={"white": 1, "red": 1, "green": 3})
-    >>> dc5 = DevCard(level=1, t=DevCardType("red"), ppoints=0, cost={"red": 1, "green": 3})
-    >>> dc6 = DevCard(level=1, t=DevCardType("white"), ppoints=0, cost={"white": 1, "green": 3})
+    >>> dc0 = DevCard(level=1, gem=Gem("black"), ppoints=2, cost={"blue": 2, "red": 1})
+    >>> dc1 = DevCard(level=1, gem=Gem("black"), ppoints=0, cost={"blue": 3})
+    >>> dc2 = DevCard(level=1, gem=Gem("blue"), ppoints=1, cost={"white": 1, "red": 1, "green": 3})
+    >>> dc3 = DevCard(level=1, gem=Gem("red"), ppoints=4, cost={"white": 1, "red": 1, "green": 3})
+    >>> dc4 = DevCard(level=1, gem=Gem("red"), ppoints=4, cost={"white": 1, "red": 1, "green": 3})
+    >>> dc5 = DevCard(level=1, gem=Gem("red"), ppoints=0, cost={"red": 1, "green": 3})
+    >>> dc6 = DevCard(level=1, gem=Gem("white"), ppoints=0, cost={"white": 1, "green": 3})
     >>> dev_card_deck_1 = DevCardDeck(1, [dc0, dc1, dc2, dc3, dc4, dc5, dc6])
 
-    >>> dc0 = DevCard(level=2, t=DevCardType("black"), ppoints=2, cost={"blue": 2, "red": 1})
-    >>> dc1 = DevCard(level=2, t=DevCardType("black"), ppoints=0, cost={"blue": 3})
-    >>> dc2 = DevCard(level=2, t=DevCardType("blue"), ppoints=1, cost={"white": 1, "red": 1, "green": 3})
-    >>> dc3 = DevCard(level=2, t=DevCardType("red"), ppoints=4, cost={"white": 1, "red": 1, "green": 3})
-    >>> dc4 = DevCard(level=2, t=DevCardType("red"), ppoints=4, cost={"white": 1, "red": 1, "green": 3})
+    >>> dc0 = DevCard(level=2, gem=Gem("black"), ppoints=2, cost={"blue": 2, "red": 1})
+    >>> dc1 = DevCard(level=2, gem=Gem("black"), ppoints=0, cost={"blue": 3})
+    >>> dc2 = DevCard(level=2, gem=Gem("blue"), ppoints=1, cost={"white": 1, "red": 1, "green": 3})
+    >>> dc3 = DevCard(level=2, gem=Gem("red"), ppoints=4, cost={"white": 1, "red": 1, "green": 3})
+    >>> dc4 = DevCard(level=2, gem=Gem("red"), ppoints=4, cost={"white": 1, "red": 1, "green": 3})
     >>> dev_card_deck_2 = DevCardDeck(2, [dc0, dc1, dc2, dc3, dc4])
     
-    >>> dc0 = DevCard(level=3, t=DevCardType("black"), ppoints=4, cost={"blue": 2, "red": 5})
-    >>> dc1 = DevCard(level=3, t=DevCardType("black"), ppoints=5, cost={"blue": 6})
-    >>> dc2 = DevCard(level=3, t=DevCardType("blue"), ppoints=5, cost={"white": 3, "red": 5, "green": 3})
-    >>> dc3 = DevCard(level=3, t=DevCardType("red"), ppoints=4, cost={"white": 3, "red": 3, "green": 3})
-    >>> dc4 = DevCard(level=3, t=DevCardType("red"), ppoints=4, cost={"white": 3, "red": 3, "green": 3})
-    >>> dc5 = DevCard(level=3, t=DevCardType("red"), ppoints=5, cost={"red": 4, "green": 3})
-    >>> dc6 = DevCard(level=3, t=DevCardType("white"), ppoints=4, cost={"white": 5, "green": 3})
+    >>> dc0 = DevCard(level=3, gem=Gem("black"), ppoints=4, cost={"blue": 2, "red": 5})
+    >>> dc1 = DevCard(level=3, gem=Gem("black"), ppoints=5, cost={"blue": 6})
+    >>> dc2 = DevCard(level=3, gem=Gem("blue"), ppoints=5, cost={"white": 3, "red": 5, "green": 3})
+    >>> dc3 = DevCard(level=3, gem=Gem("red"), ppoints=4, cost={"white": 3, "red": 3, "green": 3})
+    >>> dc4 = DevCard(level=3, gem=Gem("red"), ppoints=4, cost={"white": 3, "red": 3, "green": 3})
+    >>> dc5 = DevCard(level=3, gem=Gem("red"), ppoints=5, cost={"red": 4, "green": 3})
+    >>> dc6 = DevCard(level=3, gem=Gem("white"), ppoints=4, cost={"white": 5, "green": 3})
     >>> dev_card_deck_3 = DevCardDeck(3, [dc0, dc1, dc2, dc3, dc4, dc5, dc6])
 
     >>> n1 = Noble(3, {'black': 4, 'white': 4})
     >>> n2 = Noble(3, {'black': 3, 'white': 3, 'blue': 3})
     >>> n3 = Noble(3, {'black': 4, 'green': 4})
     >>> n4 = Noble(3, {'white': 4, 'red': 4})
-    >>> nobles_in_play = NoblesInPlay(set((n1, n2, n3, n4)))
+    >>> nobles_in_play = NoblesInPlay([n1, n2, n3, n4])
 
     >>> game_token_cache = GameTokenCache(players_count=2)
     
@@ -282,6 +330,87 @@ def clone_gameState(
         ret.set_token_cache(new_token_cache)
     return ret
 
+# The rule effects of each action on a GameState and the acting player's PlayerState, applied in place and without
+# validation (the player's side is splendor.player's *_in_player_state()).  Game.action_*() apply them to copies
+# of the current states, and splendor.replay to its one position, so the rules live only here.
+
+def return_tokens_to_game_state(
+    game_state: GameState,
+    token_cache: TokenCache,
+    ) -> None:
+    game_token_cache = game_state.get_token_cache()
+    for token in token_cache.get_tokens_list():
+        game_token_cache.add(token, token_cache.count_token(token))
+    return
+
+def take_tokens_in_states(
+    game_state: GameState,
+    player_state: PlayerState,
+    token_type_str_list: List[str],
+    discard_idx: int = None,
+    ) -> None:
+    """
+    Move the given tokens from the game to the player, and the player's discards (discard_idx, if given) back.
+    """
+    game_token_cache = game_state.get_token_cache()
+    for token_type_str in token_type_str_list:
+        game_token_cache.remove_by_name(token_type_str)
+    return_tokens_to_game_state(game_state, take_tokens_in_player_state(player_state, token_type_str_list, discard_idx))
+    return
+
+def pop_facing_dev_card_in_game_state(
+    game_state: GameState,
+    dev_card: DevCard,
+    ) -> None:
+    """
+    Remove the face-up dev_card from its deck (dealing the next card into its slot), or raise exception if it
+    isn't face up.
+    """
+    dev_card_deck = game_state.get_dev_card_deck(dev_card.get_level())
+    found_idx = dev_card_deck.find_card(dev_card)
+    if found_idx == -1:
+        raise Exception(f"could not find card in given deck")
+    dev_card_deck.pop_by_idx(found_idx)
+    return
+
+def reserve_dev_card_in_states(
+    game_state: GameState,
+    player_state: PlayerState,
+    dev_card: DevCard,
+    discard_idx: int = None,
+    ) -> None:
+    """
+    Add dev_card (already removed from its deck) to the player's reserve, with a yellow token from the game if
+    any are left, and move the player's discards (discard_idx, if given) back to the game.
+    """
+    game_token_cache = game_state.get_token_cache()
+    gold = game_token_cache.count_by_name("yellow") >= 1
+    if gold:
+        game_token_cache.remove_by_name("yellow")
+    return_tokens_to_game_state(game_state, reserve_dev_card_in_player_state(player_state, dev_card, gold, discard_idx))
+    return
+
+def purchase_dev_card_in_states(
+    game_state: GameState,
+    player_state: PlayerState,
+    dev_card: DevCard,
+    ) -> Noble:
+    """
+    Purchase dev_card for the player, from the player's reserve or else face up, and return the tokens spent to
+    the game.  Then the first noble in play (in play order) whose requirement the player's bonuses meet visits
+    the player.  Return that noble, or None.
+    """
+    if player_state.get_dev_card_reserve().find_card(dev_card) == -1:
+        pop_facing_dev_card_in_game_state(game_state, dev_card)
+    return_tokens_to_game_state(game_state, purchase_dev_card_in_player_state(player_state, dev_card))
+    nobles_in_play = game_state.get_nobles_in_play()
+    noble_idx = nobles_in_play.find_eligible(player_state.get_dev_card_cache().get_bonuses_packed())
+    if noble_idx == -1:
+        return None
+    noble = nobles_in_play.pop_by_idx(noble_idx)
+    player_state.get_nobles().append(noble)
+    return noble
+
 def generate_initial_game_state(
     players_count: int,
     ) -> GameState:
@@ -294,8 +423,263 @@ def generate_initial_game_state(
     nobles_in_play = create_nobles_in_play_shuffled(players_count)
     game_token_cache = GameTokenCache(players_count)
     return GameState(dev_card_deck_1, dev_card_deck_2, dev_card_deck_3, nobles_in_play, game_token_cache)
+
+def generate_initial_game_state_from_record(
+    game_record: GameRecord,
+    ) -> GameState:
+    """
+    Generate the initial state of the game dealt out as recorded in game_record.
+    """
+    dev_card_decks = []
+    for no in range(1, 4):
+        dev_card_ids = game_record.get_dev_card_deck_ids(no)
+        dev_card_decks.append(DevCardDeck(no, [get_dev_card_by_id(card_id) for card_id in dev_card_ids]))
+    nobles_in_play = NoblesInPlay([get_noble_by_id(noble_id) for noble_id in game_record.get_noble_ids()])
+    game_token_cache = GameTokenCache(game_record.get_players_count())
+    return GameState(dev_card_decks[0], dev_card_decks[1], dev_card_decks[2], nobles_in_play, game_token_cache)
+
+def generate_game_record(
+    players_count: int,
+    initial_game_state: GameState,
+    ) -> GameRecord:
+    """
+    Generate an (action-less) GameRecord of the initial deal in initial_game_state.
+    """
+    dev_card_deck_ids = []
+    for no in range(1, 4):
+        dev_card_deck = initial_game_state.get_dev_card_deck(no)
+        dev_card_deck_ids.append([get_dev_card_id(dc) for dc in dev_card_deck.get_list()])
+    noble_ids = [get_noble_id(noble) for noble in initial_game_state.get_nobles_in_play().l]
+    return GameRecord(players_count, dev_card_deck_ids, noble_ids)
+
+def get_board_view(game_state: GameState) -> Tuple:
+    """
+    Return the parts of game_state that actions change, as plain ids and counts: the game's token counts, each
+    deck's face-up card ids (None for an empty slot), each deck's face-down count, and the ids of the nobles in play.
+    """
+    return (
+        game_state.get_token_cache().get_counts(),
+        tuple(
+            tuple(get_dev_card_id(dev_card) if dev_card is not None else None for dev_card in deck.get_facing())
+            for deck in game_state.dev_card_decks
+            ),
+        tuple(deck.count_hidden() for deck in game_state.dev_card_decks),
+        tuple(get_noble_id(noble) for noble in game_state.get_nobles_in_play().get_list()),
+        )
+
+def generate_diff(
+    turn: int,
+    action: Tuple[int, int, int, int, int, int],
+    board_view_before: Tuple,
+    board_view_after: Tuple,
+    ) -> Dict:
+    """
+    Return the diff of action, the turn-th action of a game, given the board views (see get_board_view()) before
+    and after it.  A diff is a JSON-able dict of the turn, the acting seat, the action tuple, and its changes:
+
+        {"kind": "tokens", "seat": s, "gained": [6 counts]}         tokens seat gained (negative: gave back)
+        {"kind": "card_removed", "deck": n, "slot": i, "card": id}  a face-up card left deck n's slot i
+        {"kind": "card_revealed", "deck": n, "slot": i, "card": id} and the card dealt into its place
+        {"kind": "card_drawn", "deck": n}                           a face-down card drawn by a blind reserve
+        {"kind": "card_reserved", "seat": s, "card": id}
+        {"kind": "card_reserved", "seat": s, "deck": n}             a blind reserve from deck n
+        {"kind": "card_purchased", "seat": s, "card": id}
+        {"kind": "noble_awarded", "seat": s, "noble": id}
+
+    Token counts are in gem index order (see splendor.record).  Diffs are public (spectators see them), so the card
+    a blind reserve drew is left out, of its change and of the action tuple (its card field is NO_ARG); it is only
+    told once the card is purchased.
+
+    >>> board_view_before = ((4, 4, 4, 4, 4, 5), ((1, 2, 3, 4), (41, 42, 43, 44), (71, 72, 73, 74)), (36, 26, 16), (0, 1, 2))
+    >>> board_view_after = ((5, 5, 4, 4, 4, 5), ((1, 2, 5, 4), (41, 42, 43, 44), (71, 72, 73, 74)), (35, 26, 16), (0, 2))
+    >>> diff = generate_diff(6, (ACTION_PURCHASE_DEV_CARD, 0, 3, 1, NO_ARG, NO_ARG), board_view_before, board_view_after)
+    >>> diff["turn"], diff["seat"]
+    (6, 0)
+    >>> for change in diff["changes"]:
+    ...     print(change)
+    {'kind': 'tokens', 'seat': 0, 'gained': [-1, -1, 0, 0, 0, 0]}
+    {'kind': 'card_removed', 'deck': 1, 'slot': 2, 'card': 3}
+    {'kind': 'card_revealed', 'deck': 1, 'slot': 2, 'card': 5}
+    {'kind': 'card_purchased', 'seat': 0, 'card': 3}
+    {'kind': 'noble_awarded', 'seat': 0, 'noble': 1}
+    """
+    kind, seat, arg0, arg1, arg2, discard = action
+    tokens_before, facing_before, hidden_before, noble_ids_before = board_view_before
+    tokens_after, facing_after, hidden_after, noble_ids_after = board_view_after
+    changes = []
+
+    # tokens only move between the game and the acting player
+    gained = [count_before - count_after for count_before, count_after in zip(tokens_before, tokens_after)]
+    if any(gained):
+        changes.append({"kind": "tokens", "seat": seat, "gained": gained})
+
+    for deck_idx in range(len(facing_before)):
+        revealed_count = 0
+        for slot in range(len(facing_before[deck_idx])):
+            card_before = facing_before[deck_idx][slot]
+            card_after = facing_after[deck_idx][slot]
+            if card_before == card_after:
+                continue
+            changes.append({"kind": "card_removed", "deck": deck_idx + 1, "slot": slot, "card": card_before})
+            if card_after is not None:
+                changes.append({"kind": "card_revealed", "deck": deck_idx + 1, "slot": slot, "card": card_after})
+                revealed_count += 1
+        if hidden_before[deck_idx] - hidden_after[deck_idx] > revealed_count:
+            changes.append({"kind": "card_drawn", "deck": deck_idx + 1})
+
+    if kind == ACTION_RESERVE_DEV_CARD:
+        changes.append({"kind": "card_reserved", "seat": seat, "card": arg0})
+    elif kind == ACTION_RESERVE_HIDDEN_DEV_CARD:
+        changes.append({"kind": "card_reserved", "seat": seat, "deck": arg0})
+        action = (kind, seat, arg0, NO_ARG, arg2, discard)
+    elif kind == ACTION_PURCHASE_DEV_CARD:
+        changes.append({"kind": "card_purchased", "seat": seat, "card": arg0})
+        for noble_id in noble_ids_before:
+            if noble_id not in noble_ids_after:
+                changes.append({"kind": "noble_awarded", "seat": seat, "noble": noble_id})
+
+    return {"turn": turn, "seat": seat, "action": list(action), "changes": changes}
  
 
+def _append_with_discards(
+    legal_actions: List[Tuple[int, int, int, int, int, int]],
+    action: Tuple[int, int, int, int, int],
+    discard_idxs: List[int],
+    ) -> None:
+    """
+    Append action (without its discard field) to legal_actions, once per discard in discard_idxs, or once with no
+    discard if discard_idxs is empty.
+    """
+    if len(discard_idxs) == 0:
+        legal_actions.append(action + (NO_ARG,))
+        return
+    for discard_idx in discard_idxs:
+        legal_actions.append(action + (discard_idx,))
+    return
+
+def describe_action(
+    action: Tuple[int, int, int, int, int, int],
+    ) -> str:
+    """
+    Return a GameRecord action tuple in words, for a player choosing among their legal actions.
+
+    >>> describe_action((ACTION_TAKE_THREE_TOKENS, 0, 0, 1, 2, NO_ARG))
+    'take black, blue, green'
+    >>> describe_action((ACTION_TAKE_TWO_TOKENS, 1, 3, NO_ARG, NO_ARG, 4))
+    'take two red, discard white'
+    >>> describe_action((ACTION_PURCHASE_DEV_CARD, 0, 5, NO_ARG, NO_ARG, NO_ARG))
+    "purchase level 1 black card, 0 points, cost {'blue': 2, 'red': 1, 'white': 2}"
+    """
+    kind, player_idx, arg0, arg1, arg2, discard = action
+    if kind == ACTION_TAKE_THREE_TOKENS:
+        text = "take " + ", ".join(gem_idx_to_name(gem_idx) for gem_idx in (arg0, arg1, arg2))
+    elif kind == ACTION_TAKE_TWO_TOKENS:
+        text = f"take two {gem_idx_to_name(arg0)}"
+    elif kind == ACTION_RESERVE_DEV_CARD:
+        text = f"reserve {describe_dev_card(get_dev_card_by_id(arg0))}"
+    elif kind == ACTION_PURCHASE_DEV_CARD:
+        text = f"purchase {describe_dev_card(get_dev_card_by_id(arg0))}"
+    elif kind == ACTION_RESERVE_HIDDEN_DEV_CARD:
+        text = f"reserve the top card of deck {arg0}"
+    elif kind == ACTION_PASS:
+        text = "pass"
+    else:
+        raise Exception(f"unknown action kind: {kind}")
+    if discard != NO_ARG:
+        text += ", discard " + ", ".join(
+            ", ".join([gem_idx_to_name(gem_idx)] * count) for gem_idx, count in enumerate(TOKEN_DISCARDS_LIST[discard]) if count > 0
+            )
+    return text
+
+def list_pondering_policies(seat_policies: Dict[int, Callable]) -> List[Callable]:
+    """
+    Return the policies of seat_policies that ponder (have ponder(game, seats) and pause() methods, like
+    splendor.search.PonderingBot), each once however many seats it plays.
+
+    >>> from splendor.policy import policy_greedy
+    >>> class Bot:
+    ...     def ponder(self, a_game, seats): pass
+    ...     def pause(self): pass
+    >>> bot = Bot()
+    >>> list_pondering_policies({1: bot, 2: policy_greedy, 3: bot}) == [bot]
+    True
+    """
+    policies = {id(seat_policy): seat_policy for seat_policy in seat_policies.values()}
+    return [seat_policy for seat_policy in policies.values() if hasattr(seat_policy, "ponder")]
+
+
+class Scoreboard:
+    """
+    Live per-player totals, kept up to date by the Game's actions: prestige points (dev cards plus nobles), dev
+    cards purchased, and turns taken.  Indexed by player index.
+
+    >>> scoreboard = Scoreboard()
+    >>> scoreboard.add_player()
+    >>> scoreboard.add_player()
+    >>> scoreboard.add_dev_card(0, 3)
+    >>> scoreboard.add_dev_card(1, 2)
+    >>> scoreboard.add_noble(1, 3)
+    >>> scoreboard.add_turn(0)
+    >>> scoreboard.get_score(1), scoreboard.get_dev_cards_count(1), scoreboard.get_turns_count(0)
+    (5, 1, 1)
+    >>> scoreboard.get_leader_idx()
+    1
+    >>> scoreboard.add_dev_card(0, 2)
+    >>> scoreboard.get_leader_idx() # tied on points: the player with fewer dev cards leads
+    1
+    """
+
+    scores: List[int]
+    dev_cards_counts: List[int]
+    turns_counts: List[int]
+
+    def __init__(self) -> None:
+        self.scores = list()
+        self.dev_cards_counts = list()
+        self.turns_counts = list()
+
+    def add_player(self) -> None:
+        self.scores.append(0)
+        self.dev_cards_counts.append(0)
+        self.turns_counts.append(0)
+        return
+
+    def add_turn(self, idx: int) -> None:
+        self.turns_counts[idx] += 1
+        return
+
+    def add_dev_card(self, idx: int, ppoints: int) -> None:
+        self.scores[idx] += ppoints
+        self.dev_cards_counts[idx] += 1
+        return
+
+    def add_noble(self, idx: int, ppoints: int) -> None:
+        self.scores[idx] += ppoints
+        return
+
+    def get_score(self, idx: int) -> int:
+        return self.scores[idx]
+
+    def get_dev_cards_count(self, idx: int) -> int:
+        return self.dev_cards_counts[idx]
+
+    def get_turns_count(self, idx: int) -> int:
+        return self.turns_counts[idx]
+
+    def get_leader_idx(self) -> int:
+        """
+        Return the index of the player with the most prestige points, breaking ties by the fewest dev cards
+        purchased, then by the lowest index.
+        """
+        leader_idx = 0
+        for idx in range(1, len(self.scores)):
+            if self.scores[idx] > self.scores[leader_idx] or (
+                    self.scores[idx] == self.scores[leader_idx]
+                    and self.dev_cards_counts[idx] < self.dev_cards_counts[leader_idx]):
+                leader_idx = idx
+        return leader_idx
+
+
 class Game:
     """
     A game.  Includes game states and players.
@@ -319,11 +703,11 @@ class Game:
     20
     >>> a_game.get_current_nobles_in_play().count()
     4
-    >>> a_game.get_current_game_token_cache().count_type("black")
+    >>> a_game.get_current_game_token_cache().count_by_name("black")
     5
-    >>> a_game.get_current_game_token_cache().count_type("blue")
+    >>> a_game.get_current_game_token_cache().count_by_name("blue")
     5
-    >>> a_game.get_current_game_token_cache().count_type("yellow")
+    >>> a_game.get_current_game_token_cache().count_by_name("yellow")
     5
 
     >>> a_game.get_current_player_idx()
@@ -333,6 +717,12 @@ class Game:
     1
     >>> a_game.get_current_player().get_name()
     'Bernardo'
+
+    >>> a_game.action_take_three_tokens(a_game.get_current_player(), "black", "blue", "red")
+    >>> a_game.get_game_record().get_player_names()
+    ['Ava', 'Bernardo', 'Charlie']
+    >>> a_game.get_game_record().get_actions()
+    [(1, 1, 0, 1, 3, 255)]
     """
 
     number_of_players: int
@@ -341,6 +731,10 @@ class Game:
     current_player_idx: int
 
     game_state_history: GameStateHistory
+    game_record: GameRecord
+    scoreboard: Scoreboard
+    diff_listeners: List[Callable[[Dict], None]]
+    board_view: Tuple # board view (see get_board_view()) after the last action, while there are diff listeners
     round_number_idx: int
     
     winning_score: int
@@ -356,15 +750,21 @@ class Game:
         self.current_player_idx = 0
         self.game_state_history = GameStateHistory()
         self.game_state_history.append(generate_initial_game_state(self.number_of_players))
+        self.game_record = generate_game_record(self.number_of_players, self.get_current_game_state())
+        self.scoreboard = Scoreboard()
+        self.diff_listeners = []
+        self.board_view = None
         self.round_number_idx = 0
         self.winning_score = WINNING_SCORE
-        self.winning_score_idx = -1
+        self.winning_player_idx = -1
         return
 
     def add_player(self, player: Player) -> None:
         if len(self.players) + 1 > self.number_of_players:
             raise Exception("already have enough players")
         self.players.append(player)
+        self.game_record.add_player_name(player.get_name())
+        self.scoreboard.add_player()
         return
     
     def add_player_by_name(self, player_name: str) -> None:
@@ -377,6 +777,12 @@ class Game:
         ) -> Player:
         return self.players[idx]
 
+    def get_player_idx(self, player: Player) -> int:
+        for i in range(len(self.players)):
+            if self.players[i] == player:
+                return i
+        raise Exception(f"could not find player {player.get_name()}")
+
     def get_current_player_idx(self) -> int:
         return self.current_player_idx
 
@@ -412,7 +818,7 @@ class Game:
         self,
         player: Player,
         ) -> bool:
-        return player.calc_score() >= self.winning_score
+        return self.scoreboard.get_score(self.get_player_idx(player)) >= self.winning_score
     
     def determine_winning_player(self) -> int:
         """
@@ -421,37 +827,101 @@ class Game:
         The player who then has the highest number of prestige points
         is declared the winner (don’t forget to count your nobles).
         In case of a tie, the player who has purchased the fewest
-        development cards wins.
-        """
-        highest_score = -1
-        highest_score_player_idx = []
-        for idx in range(len(self.players)):
-            player_calc_score = self.get_player_by_idx(idx).calc_score()
-            if player_calc_score == highest_score:
-                highest_score_player_idx.append(idx)
-            elif player_calc_score > highest_score:
-                highest_score_player_idx = [idx]
-                highest_score = player_calc_score
-        
-        len_highest_score_player_idx = len(highest_score_player_idx)  
-        if len_highest_score_player_idx == 1:
-            return highest_score_player_idx[0]
-        elif len_highest_score_player_idx > 1:
-            fewest_dev_cards = 999999
-            fewest_dev_cards_idx = -1
-            for idx in len_highest_score_player_idx:
-                dev_cards_this_player = self.get_player_by_idx(idx).get_current_dev_card_cache_count()
-                if dev_cards_this_player < fewest_dev_cards:
-                    fewest_dev_cards = dev_cards_this_player
-                    fewest_dev_cards_idx = idx
-            return fewest_dev_cards_idx
-            # TODO: there can still be a tie here, though rare.  How to handle it?  Rules don't say.
-        else:
-            raise Exception("internal error") 
+        development cards wins.  The rules don't settle a tie that
+        remains; the lowest index (the earliest seat) wins it (see
+        Scoreboard.get_leader_idx()).
+
+        Read from the scoreboard, so O(players).
+        """
+        if len(self.players) == 0:
+            raise Exception("no players")
+        return self.scoreboard.get_leader_idx()
+
+    def get_scoreboard(self) -> Scoreboard:
+        return self.scoreboard
+
+    def _append_action(self, kind: int, player_idx: int, *args: int, discard_idx: int = NO_ARG) -> None:
+        """
+        Append an action to the game record (see GameRecord.append_action()), count the player's turn, and send
+        the action's diff to the diff listeners.
+        """
+        self.game_record.append_action(kind, player_idx, *args, discard_idx=discard_idx)
+        self.scoreboard.add_turn(player_idx)
+        if len(self.diff_listeners) > 0:
+            board_view = get_board_view(self.get_current_game_state())
+            turn = self.game_record.count_actions() - 1
+            diff = generate_diff(turn, self.game_record.get_action(turn), self.board_view, board_view)
+            self.board_view = board_view
+            for listener in self.diff_listeners:
+                listener(diff)
+        return
+
+    def add_diff_listener(self, listener: Callable[[Dict], None]) -> None:
+        """
+        Have listener(diff) called with the diff (see generate_diff()) of every action from now on.  The diffs are
+        only worked out while there are listeners.
+
+        >>> a_game = Game(2)
+        >>> a_game.add_player_by_name("Ava")
+        >>> a_game.add_player_by_name("Bernardo")
+        >>> diffs = []
+        >>> a_game.add_diff_listener(diffs.append)
+        >>> a_game.action_take_two_tokens(a_game.get_player_by_idx(0), "green")
+        >>> a_game.action_reserve_hidden_dev_card(a_game.get_player_by_idx(1), 3)
+        >>> a_game.remove_diff_listener(diffs.append)
+        >>> a_game.action_pass(a_game.get_player_by_idx(0))
+        >>> [change["kind"] for diff in diffs for change in diff["changes"]]
+        ['tokens', 'tokens', 'card_drawn', 'card_reserved']
+        >>> diffs[0]["changes"][0]["gained"], diffs[1]["changes"][0]["gained"]
+        ([0, 0, 2, 0, 0, 0], [0, 0, 0, 0, 0, 1])
+        >>> diffs[1]["changes"][-1], diffs[1]["action"][3] == NO_ARG
+        ({'kind': 'card_reserved', 'seat': 1, 'deck': 3}, True)
+        """
+        if len(self.diff_listeners) == 0:
+            self.board_view = get_board_view(self.get_current_game_state())
+        self.diff_listeners.append(listener)
+        return
+
+    def remove_diff_listener(self, listener: Callable[[Dict], None]) -> None:
+        self.diff_listeners.remove(listener)
+        if len(self.diff_listeners) == 0:
+            self.board_view = None
+        return
+
+    def copy_position(self):
+        """
+        Return a copy of this Game in its current position, for playing on (e.g. by a search): its state histories
+        hold only the current states, so a copy costs the same at any turn, and it has no diff listeners.
+
+        >>> a_game = Game(2)
+        >>> a_game.add_player_by_name("Ava")
+        >>> a_game.add_player_by_name("Bernardo")
+        >>> a_game.action_take_two_tokens(a_game.get_player_by_idx(0), "green")
+        >>> a_game.go_to_next_player()
+        >>> b_game = a_game.copy_position()
+        >>> b_game.get_game_state_history().count(), b_game.get_game_record() == a_game.get_game_record()
+        (1, True)
+        >>> b_game.action_take_two_tokens(b_game.get_player_by_idx(1), "red")
+        >>> a_game.get_current_game_token_cache().get_counts(), b_game.get_current_game_token_cache().get_counts()
+        ((4, 4, 2, 4, 4, 5), (4, 4, 2, 2, 4, 5))
+        """
+        # deepcopy() takes what is in memo as already copied
+        memo = {id(self.diff_listeners): []}
+        game_state_history = GameStateHistory()
+        game_state_history.append(deepcopy(self.get_current_game_state(), memo))
+        memo[id(self.game_state_history)] = game_state_history
+        for player in self.players:
+            player_state_history = PlayerStateHistory()
+            player_state_history.append(deepcopy(player.get_current_player_state(), memo))
+            memo[id(player.get_player_state_history())] = player_state_history
+        return deepcopy(self, memo)
 
     def get_game_state_history(self) -> GameStateHistory:
         return self.game_state_history
 
+    def get_game_record(self) -> GameRecord:
+        return self.game_record
+
     def append_game_state(self, new_state) -> None:
         self.get_game_state_history().append(new_state)
         return
@@ -475,54 +945,385 @@ class Game:
         self,
         player: Player,
         interactive: bool=True,
+        policy=None,
+        source: InputSource=CONSOLE_INPUT,
+        out=sys.stdout,
+        hint_engine=None,
         ) -> None:
         """
         Player takes a turn.  Used by play().
+
+        If policy is given, it chooses the player's action: policy(game, player) returns one of
+        list_legal_actions(player).  Otherwise, if interactive, the player chooses one of them by number, from
+        source (see splendor.interactive).  If hint_engine is given (see splendor.search.HintEngine), the player
+        may also enter "hint" to be shown its best moves.
         """
-        # TODO add logic
-        sys.exit()
+        if policy is not None:
+            action = policy(self, player)
+            self.apply_action(action)
+            if interactive:
+                print(f"{player.get_name()}: {describe_action(action)}", file=out)
+            return
+        if not interactive:
+            raise Exception("a turn that isn't interactive needs a policy")
+        legal_actions = self.list_legal_actions(player)
+        for i, action in enumerate(legal_actions):
+            print(f"{i + 1}: {describe_action(action)}", file=out)
+        commands = ("hint",) if hint_engine is not None else ()
+        while True:
+            choice = prompt_number(f"{player.get_name()}, choose an action", int, (1, len(legal_actions)), out, source, commands)
+            if choice != "hint":
+                break
+            for action, visits, win_probability in hint_engine.list_hints(self):
+                number = legal_actions.index(action) + 1 if action in legal_actions else "-"
+                # the engine leaves out the win probability of a move searched too little to estimate it
+                odds_text = f"wins {win_probability:.0%}" if win_probability is not None else "too few visits to tell"
+                print(f"hint: {number}: {describe_action(action)} ({odds_text}, {visits} visits)", file=out)
+        self.apply_action(legal_actions[choice - 1])
+        return
+
+    def is_stalled(self) -> bool:
+        """
+        Return True if every player passed on their last turn, i.e. nobody can do anything anymore.
+        """
+        actions = self.game_record.get_actions()
+        if len(actions) < len(self.players):
+            return False
+        for action in actions[-len(self.players):]:
+            if action[0] != ACTION_PASS:
+                return False
+        return True
+
+    def get_turn_policy(
+            self,
+            policy,
+            seat_policies: Dict[int, Callable]=None,
+            ):
+        """
+        Return the policy playing the current player's turn in play(): the seat's own in seat_policies, or else
+        policy.  None means a human plays it; then every policy of seat_policies that can ponder (has a
+        ponder(game, seats) method, like splendor.search.PonderingBot) is told to, as the seats it plays, while the
+        human thinks, and paused once the game is over.
+        """
+        if seat_policies is None:
+            return policy
+        seat_policy = seat_policies.get(self.get_current_player_idx(), policy)
+        if seat_policy is None:
+            for bot_policy in list_pondering_policies(seat_policies):
+                seats = [seat for seat, other_policy in seat_policies.items() if other_policy is bot_policy]
+                bot_policy.ponder(self, seats)
+        return seat_policy
 
     def play(
             self,
             is_interactive: bool=True,
+            policy=None,
+            max_rounds: int=None,
+            source: InputSource=CONSOLE_INPUT,
+            out=sys.stdout,
+            seat_policies: Dict[int, Callable]=None,
+            hint_engine=None,
             ) -> None:
         """
         Play a game of Splendor.
 
         Assume that the Game has already been initialized by the caller.
 
-        # TODO add tests
+        If policy is given, it plays every player's turns (see play_turn()); otherwise the players choose their
+        actions from source.  seat_policies (seat -> policy), if given, plays those seats instead, e.g. bots among
+        humans (see get_turn_policy()), and hint_engine, if given, answers the humans' hints (see play_turn()).  An
+        interactive game is drawn on out.  The game also ends if it is stalled,
+        or once max_rounds rounds (if given) have been played.
+
+        >>> import random
+        >>> from splendor.policy import policy_greedy
+        >>> random.seed(7)
+        >>> a_game = Game(2)
+        >>> a_game.add_player_by_name("Ava")
+        >>> a_game.add_player_by_name("Bernardo")
+        >>> a_game.play(is_interactive=False, policy=policy_greedy, max_rounds=MAX_ROUNDS_HEADLESS)
+        >>> a_game.get_round_number_idx() < MAX_ROUNDS_HEADLESS
+        True
+        >>> max(player.calc_score() for player in a_game.players) >= WINNING_SCORE
+        True
+        >>> a_game.get_current_player_idx() == a_game.start_player_idx
+        True
+        >>> [a_game.get_scoreboard().get_score(idx) for idx in range(2)] == [player.calc_score() for player in a_game.players]
+        True
+        >>> sum(a_game.get_scoreboard().get_turns_count(idx) for idx in range(2)) == a_game.get_game_record().count_actions()
+        True
+
         # TODO use interactive argument
         """
 
+        # an interactive game is drawn once per turn, rebuilding only what changed (see splendor.render)
+        renderer = TerminalRenderer(out) if is_interactive else None
         is_last_turns = False
         while is_last_turns == False:
 
             # show the current state of the game
             if is_interactive == True:
-                print(self)
+                renderer.render(self)
 
             # current player takes a turn
             current_player = self.get_current_player()
-            self.play_turn(current_player, is_interactive)
+            self.play_turn(current_player, is_interactive, self.get_turn_policy(policy, seat_policies), source, out, hint_engine)
             if self.player_has_winning_score(current_player):
                 is_last_turns = True
             self.go_to_next_player()
+            if self.is_stalled():
+                break
+            if max_rounds is not None and self.round_number_idx >= max_rounds:
+                break
 
         # make sure all players get an equal number of turns    
         while self.get_current_player_idx() != self.start_player_idx:
 
             # show the current state of the game
             if is_interactive == True:
-                print(self)
+                renderer.render(self)
 
             current_player = self.get_current_player()
-            self.play_turn(current_player, is_interactive)
+            self.play_turn(current_player, is_interactive, self.get_turn_policy(policy, seat_policies), source, out, hint_engine)
             self.go_to_next_player()
 
+        # the bots stop pondering a game that is over
+        if seat_policies is not None:
+            for bot_policy in list_pondering_policies(seat_policies):
+                bot_policy.pause()
+
         # determine the winner
         self.winning_player_idx = self.determine_winning_player()
-        print(f"winner is {self.get_player_by_idx(self.winning_player_idx).get_name()}")
+        if is_interactive == True:
+            print(f"winner is {self.get_player_by_idx(self.winning_player_idx).get_name()}", file=out)
+        return
+
+    def list_legal_actions(
+            self,
+            player: Player,
+            prune: bool = False,
+            ) -> List[Tuple[int, int, int, int, int, int]]:
+        """
+        Return the actions that player can legally take now, as GameRecord action tuples (see apply_action()).
+
+        An action that takes the player over the token limit is listed once per distinct discard back down to it.
+        If prune is True, dominated actions are left out (see prune_dominated_actions()).  If there are none, the
+        only legal action is to pass.
+        """
+        player_idx = self.get_player_idx(player)
+        game_token_cache = self.get_current_game_token_cache()
+        legal_actions = []
+
+        # tokens
+        gem_names_available = [
+            gem_name for gem_name in GEM_NAME_COMMON_STR_DICT.keys()
+            if game_token_cache.count_by_name(gem_name) >= 1
+            ]
+        for gem_names in itertools.combinations(gem_names_available, 3):
+            action = (ACTION_TAKE_THREE_TOKENS, player_idx) + tuple(gem_name_to_idx(gem_name) for gem_name in gem_names)
+            _append_with_discards(legal_actions, action, player.list_discard_idxs_after_take(gem_names))
+        for gem_name in GEM_NAME_COMMON_STR_DICT.keys():
+            if game_token_cache.count_by_name(gem_name) >= TAKE_TWO_TOKENS_MINIMUM:
+                _append_with_discards(
+                    legal_actions,
+                    (ACTION_TAKE_TWO_TOKENS, player_idx, gem_name_to_idx(gem_name), NO_ARG, NO_ARG),
+                    player.list_discard_idxs_after_take([gem_name, gem_name]),
+                    )
+
+        # dev cards
+        dev_cards_facing = []
+        for no in range(1, 4):
+            for dev_card in self.get_current_dev_card_deck(no).get_facing():
+                if dev_card is not None:
+                    dev_cards_facing.append(dev_card)
+        if not player.get_current_dev_card_reserve().is_max():
+            discard_idxs = player.list_discard_idxs_after_take(self.get_reserve_token_names())
+            for dev_card in dev_cards_facing:
+                _append_with_discards(
+                    legal_actions,
+                    (ACTION_RESERVE_DEV_CARD, player_idx, get_dev_card_id(dev_card), NO_ARG, NO_ARG),
+                    discard_idxs,
+                    )
+            for no in range(1, 4):
+                if not self.get_current_dev_card_deck(no).is_hidden_empty():
+                    _append_with_discards(
+                        legal_actions,
+                        (ACTION_RESERVE_HIDDEN_DEV_CARD, player_idx, no, NO_ARG, NO_ARG),
+                        discard_idxs,
+                        )
+        for dev_card in dev_cards_facing + player.get_current_dev_card_reserve().get_list():
+            if player.can_purchase_dev_card(dev_card):
+                legal_actions.append((ACTION_PURCHASE_DEV_CARD, player_idx, get_dev_card_id(dev_card), NO_ARG, NO_ARG, NO_ARG))
+
+        if prune:
+            legal_actions = self.prune_dominated_actions(player, legal_actions)
+        if len(legal_actions) == 0:
+            legal_actions.append((ACTION_PASS, player_idx, NO_ARG, NO_ARG, NO_ARG, NO_ARG))
+        return legal_actions
+
+    def prune_dominated_actions(
+            self,
+            player: Player,
+            legal_actions: List[Tuple[int, int, int, int, int, int]],
+            ) -> List[Tuple[int, int, int, int, int, int]]:
+        """
+        Return legal_actions (in order) without the actions that another of them dominates.
+
+        Tokens are compared by their effective gain: a player can never spend more tokens of a gem than the most
+        any card costs in it (DEV_CARD_GEM_COST_MAX) less the player's bonus in it, so tokens beyond that count
+        as nothing; yellow tokens always count.
+        - Among the token takes, and among the reserves of any one card, an action whose effective gain is at
+          most another's in every token type is dropped (of equal ones, the first is kept).  This is what
+          collapses the many discards after taking at the token limit.
+        - A token take with no effective gain at all (the tokens taken can only be discarded) is dropped.
+        - With the gold pool empty, reserving a face-up card worth no prestige points that no other player can
+          purchase now is dropped: it gains nothing and denies nothing.
+
+        >>> a_game = Game(2)
+        >>> a_game.add_player_by_name("Ava")
+        >>> a_game.add_player_by_name("Bernardo")
+        >>> ava = a_game.get_player_by_idx(0)
+        >>> for gem_name in ["black", "black", "blue", "blue", "green", "green", "red", "red", "white", "white"]:
+        ...     ava.get_current_token_cache().add_by_name(gem_name)
+        >>> len(a_game.list_legal_actions(ava)), len(a_game.list_legal_actions(ava, prune=True))
+        (497, 242)
+        >>> for i in range(8):
+        ...     ava.get_current_dev_card_cache().add(DevCard(level=1, gem=Gem("white"), ppoints=0, cost={}))
+        >>> pruned = a_game.list_legal_actions(ava, prune=True)
+        >>> [action for action in pruned if action[0] == ACTION_TAKE_TWO_TOKENS and action[2] == gem_name_to_idx("white")]
+        []
+        """
+        player_idx = self.get_player_idx(player)
+        token_counts = player.get_current_token_cache().get_counts()
+        dev_card_cache = player.get_current_dev_card_cache()
+        token_caps = [
+            max(DEV_CARD_GEM_COST_MAX - dev_card_cache.calc_discount(Gem(gem_name)), 0)
+            for gem_name in GEM_NAME_COMMON_STR_DICT.keys()
+            ] + [PLAYER_TOKEN_CACHE_MAX]
+        reserve_gold = len(self.get_reserve_token_names()) > 0
+        yellow_idx = gem_name_to_idx("yellow")
+
+        # (group, sum of effective gain, position, packed effective gain) of every action compared by its tokens
+        candidates = []
+        kept_idxs = set()
+        for idx in range(len(legal_actions)):
+            kind, _, arg0, arg1, arg2, discard = legal_actions[idx]
+            net = [0] * len(GEM_NAME_ALL_STR_DICT)
+            if kind == ACTION_TAKE_THREE_TOKENS:
+                group = kind
+                for gem_idx in (arg0, arg1, arg2):
+                    net[gem_idx] += 1
+            elif kind == ACTION_TAKE_TWO_TOKENS:
+                group = ACTION_TAKE_THREE_TOKENS
+                net[arg0] += 2
+            elif kind == ACTION_RESERVE_DEV_CARD or kind == ACTION_RESERVE_HIDDEN_DEV_CARD:
+                if kind == ACTION_RESERVE_DEV_CARD and not reserve_gold and self._is_reserve_useless(player, arg0):
+                    continue
+                group = (kind, arg0)
+                if reserve_gold:
+                    net[yellow_idx] += 1
+            else:
+                kept_idxs.add(idx)
+                continue
+            if discard != NO_ARG:
+                for gem_idx, count in enumerate(TOKEN_DISCARDS_LIST[discard]):
+                    net[gem_idx] -= count
+
+            gain_sum = 0
+            gain_max = 0
+            gain_packed = 0
+            for gem_idx in range(len(net)):
+                cap = token_caps[gem_idx]
+                gain = min(token_counts[gem_idx] + net[gem_idx], cap) - min(token_counts[gem_idx], cap)
+                gain_sum += gain
+                gain_max = max(gain_max, gain)
+                gain_packed |= (gain + TOKEN_GAIN_OFFSET) << (gem_idx * BONUS_FIELD_BITS)
+            if group == ACTION_TAKE_THREE_TOKENS and gain_max <= 0:
+                continue
+            candidates.append((group, -gain_sum, idx, gain_packed))
+
+        # a gain can only be dominated by one with at least its sum, so visiting by decreasing sum, every action
+        # is compared with the undominated ones kept so far
+        candidates.sort(key=lambda candidate: (candidate[1], candidate[2]))
+        kept_gains_by_group = {}
+        for group, _, idx, gain_packed in candidates:
+            kept_gains = kept_gains_by_group.setdefault(group, [])
+            is_dominated = False
+            for kept_gain in kept_gains:
+                if ((kept_gain | TOKEN_GAIN_GUARD_MASK) - gain_packed) & TOKEN_GAIN_GUARD_MASK == TOKEN_GAIN_GUARD_MASK:
+                    is_dominated = True
+                    break
+            if not is_dominated:
+                kept_gains.append(gain_packed)
+                kept_idxs.add(idx)
+        return [legal_actions[idx] for idx in range(len(legal_actions)) if idx in kept_idxs]
+
+    def _is_reserve_useless(
+            self,
+            player: Player,
+            dev_card_id: int,
+            ) -> bool:
+        """
+        Return True if reserving the card (without gold) gains player nothing and denies the other players nothing.
+        """
+        dev_card = get_dev_card_by_id(dev_card_id)
+        if dev_card.get_ppoints() > 0:
+            return False
+        for other_player in self.players:
+            if other_player is not player and other_player.can_purchase_dev_card(dev_card):
+                return False
+        return True
+
+    def apply_action(
+            self,
+            action: Tuple[int, int, int, int, int, int],
+            ) -> None:
+        """
+        Complete an action given as a GameRecord action tuple, by calling the matching action_*().
+
+        >>> a_game = Game(2)
+        >>> a_game.add_player_by_name("Ava")
+        >>> a_game.add_player_by_name("Bernardo")
+        >>> legal_actions = a_game.list_legal_actions(a_game.get_player_by_idx(0))
+        >>> len(legal_actions)
+        30
+        >>> a_game.apply_action(legal_actions[0])
+        >>> a_game.get_player_by_idx(0).get_current_token_cache().count()
+        3
+        >>> a_game.get_game_record().get_actions() == legal_actions[0:1]
+        True
+        """
+        kind, player_idx, arg0, arg1, arg2, discard = action
+        player = self.get_player_by_idx(player_idx)
+        discard_idx = discard if discard != NO_ARG else None
+        if kind == ACTION_TAKE_THREE_TOKENS:
+            self.action_take_three_tokens(
+                player, gem_idx_to_name(arg0), gem_idx_to_name(arg1), gem_idx_to_name(arg2), discard_idx,
+                )
+        elif kind == ACTION_TAKE_TWO_TOKENS:
+            self.action_take_two_tokens(player, gem_idx_to_name(arg0), discard_idx)
+        elif kind == ACTION_RESERVE_DEV_CARD:
+            self.action_reserve_dev_card(player, get_dev_card_by_id(arg0), discard_idx)
+        elif kind == ACTION_RESERVE_HIDDEN_DEV_CARD:
+            # the card drawn (arg1) is not chosen; it is the top of the deck's face-down pile
+            self.action_reserve_hidden_dev_card(player, arg0, discard_idx)
+        elif kind == ACTION_PURCHASE_DEV_CARD:
+            # a noble visit (arg1) is not chosen; action_purchase_dev_card() awards it
+            self.action_purchase_dev_card(player, get_dev_card_by_id(arg0))
+        elif kind == ACTION_PASS:
+            self.action_pass(player)
+        else:
+            raise Exception(f"unknown action kind: {kind}")
+        return
+
+    def action_pass(
+            self,
+            player: Player,
+            ) -> None:
+        """
+        Complete the action of a player passing, which is only allowed when the player has no other legal action.
+        """
+        self._append_action(ACTION_PASS, self.get_player_idx(player))
         return
     
     def action_take_three_tokens(
@@ -531,11 +1332,14 @@ class Game:
             token_type_str_1: str,
             token_type_str_2: str,
             token_type_str_3: str,
+            discard_idx: int = None,
             ) -> None:
         """
         Complete the player action of taking three tokens.
 
         This function makes sure that the tokens are all of different type, and that none are yellow (jokers).
+        If the player goes over the token limit, discard_idx gives the tokens it discards, which are returned to
+        the game's token cache (see Player.list_discard_idxs_after_take()).
         """
         if (
             token_type_str_1 == token_type_str_2
@@ -543,129 +1347,193 @@ class Game:
             or token_type_str_2 == token_type_str_3
         ):
             raise Exception("action not allowed: chosen tokens must be all different")
-        if TokenType(token_type_str_1).is_joker() or TokenType(token_type_str_2).is_joker() or TokenType(token_type_str_3).is_joker():
+        if is_joker(token_type_str_1) or is_joker(token_type_str_2) or is_joker(token_type_str_3):
             raise Exception("action not allowed: chosen tokens must not be jokers")
 
-        # make sure player isn't over his/her max
-        if not player.can_fit_tokens(3):
-            raise Exception(
-                f"not enough space in player's token cache to add 3 tokens"
-            )
-            # TODO: instead of above, we need to allow the player to get rid of some of his/her current tokens
-
         current_game_state = self.get_current_game_state()
         game_token_cache = current_game_state.get_token_cache()
         
         # make sure game has the right tokens
-        if game_token_cache.count_type(token_type_str_1) < 1:
+        if game_token_cache.count_by_name(token_type_str_1) < 1:
             raise Exception(f"not enough tokens of type {token_type_str_1} in the game's token cache")
-        if game_token_cache.count_type(token_type_str_2) < 1:
+        if game_token_cache.count_by_name(token_type_str_2) < 1:
             raise Exception(f"not enough tokens of type {token_type_str_2} in the game's token cache")
-        if game_token_cache.count_type(token_type_str_3) < 1:
+        if game_token_cache.count_by_name(token_type_str_3) < 1:
             raise Exception(f"not enough tokens of type {token_type_str_3} in the game's token cache")
 
-        # update player
-        player.action_take_three_tokens(
-                token_type_str_1,
-                token_type_str_2,
-                token_type_str_3,
-                )
-
-        # update game
-        for token_type_str_to_remove in [token_type_str_1, token_type_str_2, token_type_str_3]:
-            game_token_cache.remove(token_type_str_to_remove)
-        new_state = clone_gameState_new_token_cache(
-            current_game_state,
-            game_token_cache,
-        )
-        self.append_game_state(new_state)
+        token_type_str_list = [token_type_str_1, token_type_str_2, token_type_str_3]
+        player.check_discard_after_take(token_type_str_list, discard_idx)
+
+        # update game and player
+        new_game_state, new_player_state = self._copy_states(player)
+        take_tokens_in_states(new_game_state, new_player_state, token_type_str_list, discard_idx)
+        self._append_states(player, new_game_state, new_player_state)
+        self._append_action(
+            ACTION_TAKE_THREE_TOKENS,
+            self.get_player_idx(player),
+            gem_name_to_idx(token_type_str_1),
+            gem_name_to_idx(token_type_str_2),
+            gem_name_to_idx(token_type_str_3),
+            discard_idx=discard_idx if discard_idx is not None else NO_ARG,
+            )
         return
 
     def action_take_two_tokens(
             self,
             player: Player,
             token_type_str: str,
+            discard_idx: int = None,
             ) -> None:
         """
-        Complete the player action of taking two tokens.
+        Complete the player action of taking two tokens, then discarding as in action_take_three_tokens().
         """
-        if TokenType(token_type_str).is_joker():
+        if is_joker(token_type_str):
             raise Exception("action not allowed: chosen tokens must not be jokers")
         
-        # make sure player isn't over his/her max
-        if not player.can_fit_tokens(2):
-            raise Exception(
-                f"not enough space in player's token cache to add 2 tokens"
-            )
-            # instead of above, we need to allow the player to get rid of some of his/her current tokens
-        
         current_game_state = self.get_current_game_state()
         game_token_cache = current_game_state.get_token_cache()
         
         # make sure game has the right tokens
-        if game_token_cache.count_type(token_type_str) < 2:
+        if game_token_cache.count_by_name(token_type_str) < 2:
             raise Exception(f"not enough tokens of type {token_type_str} in the game's token cache")
 
         # make sure we're not breaking a rule
-        if game_token_cache.count_type(token_type_str) < TAKE_TWO_TOKENS_MINIMUM:
+        if game_token_cache.count_by_name(token_type_str) < TAKE_TWO_TOKENS_MINIMUM:
             raise Exception(f"cannot take two tokens from a stack with fewer than {TAKE_TWO_TOKENS_MINIMUM}")
 
-        # update player
-        player.action_take_two_tokens(
-                token_type_str,
-                )
-
-        # update game
-        for token_type_str_to_remove in [token_type_str, token_type_str]:
-            game_token_cache.remove(token_type_str_to_remove)
-        new_state = clone_gameState_new_token_cache(
-            current_game_state,
-            game_token_cache,
-        )
-        self.append_game_state(new_state)
+        token_type_str_list = [token_type_str, token_type_str]
+        player.check_discard_after_take(token_type_str_list, discard_idx)
+
+        # update game and player
+        new_game_state, new_player_state = self._copy_states(player)
+        take_tokens_in_states(new_game_state, new_player_state, token_type_str_list, discard_idx)
+        self._append_states(player, new_game_state, new_player_state)
+        self._append_action(
+            ACTION_TAKE_TWO_TOKENS,
+            self.get_player_idx(player),
+            gem_name_to_idx(token_type_str),
+            discard_idx=discard_idx if discard_idx is not None else NO_ARG,
+            )
         return
 
     def action_reserve_dev_card(
             self,
             player: Player,
             dev_card: DevCard, # instead of dev_card, args could include deck_no and idx into deck
+            discard_idx: int = None,
             ) -> None:
         """
-        Complete the action of a player reserving a dev card.
+        Complete the action of a player reserving a face-up dev card.
+
+        The player takes a yellow token from the game's token cache, if any are left, then discards as in
+        action_take_three_tokens().
+
+        >>> a_game = Game(2)
+        >>> a_game.add_player_by_name("Ava")
+        >>> a_game.add_player_by_name("Bernardo")
+        >>> ava = a_game.get_player_by_idx(0)
+        >>> a_game.action_reserve_dev_card(ava, a_game.get_current_dev_card_deck(2).get_facing()[1])
+        >>> a_game.get_current_game_token_cache().count_by_name("yellow"), ava.get_current_token_cache().count_by_name("yellow")
+        (4, 1)
+        >>> a_game.get_current_dev_card_deck(2).count_facing()
+        4
         """
-        # make sure player isn't over his/her max tokens and reserve cards
-        if player.get_dev_card_reserve().is_max():
-            raise Exception(f"player at max reserve cards")
+        self._check_can_reserve(player, discard_idx)
+
+        # remove card from deck (which deals out a new facing card), and add it to the player's reserve
+        new_game_state, new_player_state = self._copy_states(player)
+        pop_facing_dev_card_in_game_state(new_game_state, dev_card)
+        reserve_dev_card_in_states(new_game_state, new_player_state, dev_card, discard_idx)
+        self._append_states(player, new_game_state, new_player_state)
+
+        self._append_action(
+            ACTION_RESERVE_DEV_CARD,
+            self.get_player_idx(player),
+            get_dev_card_id(dev_card),
+            discard_idx=discard_idx if discard_idx is not None else NO_ARG,
+            )
+        return
 
-        if not player.can_fit_tokens(1):
-            raise Exception(
-                f"not enough space in player's token cache to add 1 token"
+    def action_reserve_hidden_dev_card(
+            self,
+            player: Player,
+            deck_no: int,
+            discard_idx: int = None,
+            ) -> None:
+        """
+        Complete the action of a player reserving the top card of a deck's face-down pile, without seeing it first.
+
+        Gold and discards are as in action_reserve_dev_card().
+
+        >>> a_game = Game(2)
+        >>> a_game.add_player_by_name("Ava")
+        >>> a_game.add_player_by_name("Bernardo")
+        >>> ava = a_game.get_player_by_idx(0)
+        >>> hidden_count = a_game.get_current_dev_card_deck(3).count_hidden()
+        >>> a_game.action_reserve_hidden_dev_card(ava, 3)
+        >>> a_game.get_current_dev_card_deck(3).count_hidden() == hidden_count - 1
+        True
+        >>> ava.get_current_dev_card_reserve().get_list()[0].get_level()
+        3
+        >>> a_game.get_current_game_token_cache().count_by_name("yellow")
+        4
+        >>> action = a_game.get_game_record().get_action(0)
+        >>> action[2], get_dev_card_by_id(action[3]) == ava.get_current_dev_card_reserve().get_list()[0]
+        (3, True)
+        """
+        self._check_can_reserve(player, discard_idx)
+        if self.get_current_dev_card_deck(deck_no).is_hidden_empty():
+            raise Exception(f"no face-down cards left in deck {deck_no}")
+        new_game_state, new_player_state = self._copy_states(player)
+        dev_card = new_game_state.get_dev_card_deck(deck_no).pop_hidden_card()
+        reserve_dev_card_in_states(new_game_state, new_player_state, dev_card, discard_idx)
+        self._append_states(player, new_game_state, new_player_state)
+
+        self._append_action(
+            ACTION_RESERVE_HIDDEN_DEV_CARD,
+            self.get_player_idx(player),
+            deck_no,
+            get_dev_card_id(dev_card),
+            discard_idx=discard_idx if discard_idx is not None else NO_ARG,
             )
-            # instead of above, we need to allow the player to get rid of some of his/her current tokens
-        
-        current_game_state = self.get_current_game_state()
-        dev_card_level = dev_card.get_level()
-        dev_card_deck = current_game_state.get_dev_card_deck(dev_card_level)
-        
-        # make sure card actually exists in the deck
-        found_idx = dev_card_deck.find_card(dev_card)
-        if found_idx == -1:
-            raise Exception(f"could not find card in given deck")
-
-        # remove card from deck
-        # we ignore the return since we already have the card
-        # note that the popping essentially deals out a new facing card
-        dev_card_deck.pop_by_idx(found_idx)
-        new_state = clone_gameState_new_dev_card_deck(
-                current_game_state,
-                dev_card_level,
-                dev_card_deck,
-                )
-        self.append_game_state(new_state)
+        return
 
-        # add card to player's reserve, and yellow token to player's token cache
-        player.action_reserve_dev_card(dev_card)
+    def get_reserve_token_names(self) -> List[str]:
+        """
+        Return the tokens a player reserving a dev card receives: a yellow token, if the game has any left.
+        """
+        if self.get_current_game_token_cache().count_by_name("yellow") >= 1:
+            return ["yellow"]
+        return []
 
+    def _check_can_reserve(
+            self,
+            player: Player,
+            discard_idx: int,
+            ) -> None:
+        """
+        Make sure player isn't at his/her max reserve cards, and discards correctly if going over max tokens.
+        """
+        if player.get_current_dev_card_reserve().is_max():
+            raise Exception(f"player at max reserve cards")
+        player.check_discard_after_take(self.get_reserve_token_names(), discard_idx)
+        return
+
+    def _copy_states(self, player: Player) -> Tuple[GameState, PlayerState]:
+        """
+        Return copies of the current GameState and player's current PlayerState, for an action to change (see
+        the *_in_states() functions) and then append with _append_states().
+        """
+        return self.get_current_game_state().copy(), player.get_current_player_state().copy()
+
+    def _append_states(
+            self,
+            player: Player,
+            new_game_state: GameState,
+            new_player_state: PlayerState,
+            ) -> None:
+        self.append_game_state(new_game_state)
+        player.append_player_state(new_player_state)
         return
 
     def action_purchase_dev_card(
@@ -674,36 +1542,60 @@ class Game:
             dev_card: DevCard, # instead of dev_card, args could include deck_no and idx into deck
             ) -> None:
         """
-        Complete the action of a player purchasing a dev card.
+        Complete the action of a player purchasing a dev card, either from a deck or from the player's reserve.
+
+        The tokens the player spends are returned to the game's token cache.  If the player's bonuses then meet
+        the requirement of a noble in play, the first such noble (in play order) visits the player; a player
+        receives at most one noble per turn.
+
+        >>> a_game = Game(2)
+        >>> a_game.add_player_by_name("Ava")
+        >>> a_game.add_player_by_name("Bernardo")
+        >>> ava = a_game.get_player_by_idx(0)
+        >>> noble = a_game.get_current_nobles_in_play().get_list()[0]
+        >>> for gem_name, count in noble.get_cost().items():
+        ...     for i in range(count):
+        ...         ava.get_current_dev_card_cache().add(DevCard(level=1, gem=Gem(gem_name), ppoints=0, cost={}))
+        >>> dev_card = a_game.get_current_dev_card_deck(1).get_facing()[0]
+        >>> for gem_name, count in dev_card.get_cost_dict().items():
+        ...     ava.get_current_token_cache().add_by_name(gem_name, count)
+        >>> a_game.action_purchase_dev_card(ava, dev_card)
+        >>> a_game.get_current_nobles_in_play().count()
+        2
+        >>> ava.get_current_nobles() == [noble]
+        True
+        >>> a_game.get_game_record().get_action(0)[3] == get_noble_id(noble)
+        True
         """
 
-        # make sure player has the required tokens to spend
-        # TODO: handle use of jokers too
-        if not player.get_token_cache().can_purchase_dev_card(dev_card):
+        # make sure player has the required tokens to spend (after bonuses, and using jokers if needed)
+        if not player.can_purchase_dev_card(dev_card):
             raise Exception(f"cannot purchase dev card: insufficient tokens")
         
-        # make sure card actually exists in the deck
-        current_game_state = self.get_current_game_state()
-        dev_card_level = dev_card.get_level()
-        dev_card_deck = current_game_state.get_dev_card_deck(dev_card_level)
-        found_idx = dev_card_deck.find_card(dev_card)
-        if found_idx == -1:
-            raise Exception(f"could not find card in given deck")
-
-        # remove card from deck
-        # we ignore the return since we already have the card
-        # note that the popping essentially deals out a new facing card
-        dev_card_deck.pop_by_idx(found_idx)
-        new_state = clone_gameState_new_dev_card_deck(
-                current_game_state,
-                dev_card_level,
-                dev_card_deck
-                )
-        self.append_game_state(new_state)
-
-        # add card to player's dev card cache
-        player.action_purchase_dev_card(dev_card)
-
+        # make sure card actually exists in the deck, if it isn't in the player's reserve
+        if (
+            player.get_current_dev_card_reserve().find_card(dev_card) == -1
+            and self.get_current_dev_card_deck(dev_card.get_level()).find_card(dev_card) == -1
+        ):
+            raise Exception(f"could not find card in given deck or player's reserve")
+
+        # move card to player's dev card cache and spent tokens to the game; a noble may then visit
+        new_game_state, new_player_state = self._copy_states(player)
+        noble = purchase_dev_card_in_states(new_game_state, new_player_state, dev_card)
+        self._append_states(player, new_game_state, new_player_state)
+        player_idx = self.get_player_idx(player)
+        self.scoreboard.add_dev_card(player_idx, dev_card.get_ppoints())
+        noble_id = NO_ARG
+        if noble is not None:
+            self.scoreboard.add_noble(player_idx, noble.get_ppoints())
+            noble_id = get_noble_id(noble)
+
+        self._append_action(
+            ACTION_PURCHASE_DEV_CARD,
+            player_idx,
+            get_dev_card_id(dev_card),
+            noble_id,
+            )
         return
 
     def __str__(self):
@@ -720,41 +1612,115 @@ class Game:
         ret += f"{self.get_current_game_state()}"
         ret += "\n"
         ret += f"Winning score = {self.winning_score}"
-        if self.winning_score_idx != -1:
-            ret += f"; winner: {self.get_player_by_idx(self.winning_score_idx)}"
+        if self.winning_player_idx != -1:
+            ret += f"; winner: {self.get_player_by_idx(self.winning_player_idx).get_name()}"
         ret += "\n"
         return ret
 
+def generate_game_from_record(
+    game_record: GameRecord,
+    ) -> Game:
+    """
+    Generate a Game with game_record's players and initial deal, in the position reached by replaying its actions.
+
+    >>> import random
+    >>> from splendor.policy import policy_greedy
+    >>> random.seed(3)
+    >>> a_game = Game(3)
+    >>> for name in ("Ava", "Bernardo", "Charlie"):
+    ...     a_game.add_player_by_name(name)
+    >>> for i in range(20):
+    ...     a_game.play_turn(a_game.get_current_player(), False, policy_greedy)
+    ...     a_game.go_to_next_player()
+    >>> b_game = generate_game_from_record(GameRecord.from_bytes(a_game.get_game_record().to_bytes()))
+    >>> b_game.get_game_record() == a_game.get_game_record()
+    True
+    >>> b_game.get_current_player_idx(), b_game.get_round_number_idx()
+    (2, 6)
+    >>> b_game.list_legal_actions(b_game.get_player_by_idx(2)) == a_game.list_legal_actions(a_game.get_player_by_idx(2))
+    True
+    >>> [b_game.get_scoreboard().get_score(idx) for idx in range(3)] == [player.calc_score() for player in a_game.players]
+    True
+    """
+    players_count = game_record.get_players_count()
+    a_game = Game(players_count)
+    a_game.game_state_history = GameStateHistory()
+    a_game.append_game_state(generate_initial_game_state_from_record(game_record))
+    a_game.game_record = generate_game_record(players_count, a_game.get_current_game_state())
+    for player_name in game_record.get_player_names():
+        a_game.add_player_by_name(player_name)
+    for action in game_record.get_actions():
+        a_game.apply_action(action)
+        a_game.go_to_next_player()
+    return a_game
+
+def play_runner_headless(
+    number_of_players: int,
+    policy,
+    player_names: List[str] = None,
+    max_rounds: int = MAX_ROUNDS_HEADLESS,
+    ) -> Game:
+    """
+    Build and play a Game with every turn chosen by policy, and return the finished Game.
+    """
+    a_game = Game(number_of_players)
+    for i in range(number_of_players):
+        a_game.add_player_by_name(player_names[i] if player_names else f"player_{i+1}")
+    a_game.play(is_interactive=False, policy=policy, max_rounds=max_rounds)
+    return a_game
+
 def play_runner_interactive(
     out=sys.stdout,
-    ) -> None:
+    source: InputSource=CONSOLE_INPUT,
+    bot_policy=policy_greedy,
+    hint_engine=None,
+    ) -> int:
     """
-    Build and play a Game.
+    Build and play Games, for as long as the players want to play again, with their answers read from source
+    (see splendor.interactive).  The bots, if the players ask for some, take the last seats and play bot_policy.
+    hint_engine, if given, answers the players' hints (see Game.play_turn()).  Return the number of games played
+    to the end.
+
+    >>> import io
+    >>> from splendor.interactive import ScriptedInput
+    >>> out = io.StringIO()
+    >>> play_runner_interactive(out, ScriptedInput(["2", "0", "Ava", "Bernardo", "1", "28"], out=out))
+    0
+    >>> for line in out.getvalue().splitlines()[-4:]:
+    ...     print(line)
+    27: reserve the top card of deck 3
+    Bernardo, choose an action (int in range (1, 27)): 28
+    error: input must be between 1 and 27, inclusive
+    exiting
     """
     # introduce the game
     print(GAME_INTRO, file=out, flush=True)
 
-    # setup
-    number_of_players = None
-    player_names = []
-    try:
-        number_of_players = prompt_number("how many players?", int, (2,4))
-        for i in range(number_of_players):
-            player_names.append(prompt_string(f"enter the name of player {i+1}"))
-    except EOFError:
-        print("exiting")
-        return
-
-    # create Game and play
-    a_game = Game(number_of_players)
-    for name in player_names:
-        a_game.add_player_by_name(name)
-    a_game.play(is_interactive=True)
-
-    # ask to play again or quit; recurse if playing again
-    is_play_again = prompt_yn("play again?")
-    if is_play_again == True:
-        play_runner_interactive()
-
-    return
-
+    games_count = 0
+    while True:
+        try:
+            # setup
+            number_of_players = prompt_number("how many players?", int, (2,4), out, source)
+            number_of_bots = prompt_number("how many of them are bots?", int, (0, number_of_players - 1), out, source)
+            player_names = []
+            for i in range(number_of_players - number_of_bots):
+                player_names.append(prompt_string(f"enter the name of player {i+1}", out=out, source=source))
+            for i in range(len(player_names), number_of_players):
+                player_names.append(f"bot_{i+1}")
+
+            # create Game and play
+            a_game = Game(number_of_players)
+            for name in player_names:
+                a_game.add_player_by_name(name)
+            bot_seats = range(number_of_players - number_of_bots, number_of_players)
+            a_game.play(is_interactive=True, source=source, out=out, seat_policies={seat: bot_policy for seat in bot_seats}, hint_engine=hint_engine)
+            games_count += 1
+
+            # ask to play again or quit
+            if not prompt_yn("play again?", out, source):
+                break
+        except EOFError:
+            print("exiting", file=out)
+            break
+
+    return games_count
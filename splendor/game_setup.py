@@ -2,19 +2,16 @@
 game_setup.py - Initial values for setting up a Splendor game, i.e. decks, tokens, and nobles.
 """
 
-from copy import deepcopy
 from splendor.core import (
     DevCard, 
     DevCardDeck, 
-    DevCardType, 
+    Gem, 
     GameTokenCache, 
     Noble, 
     NoblesInPlay,
     )
 import random
-
-import logging
-logging.basicConfig(level=logging.INFO)
+from typing import Dict, List
 
 GAME_INTRO = (
         """In Splendor, you take on the role of a rich merchant during the Renaissance.
@@ -30,151 +27,287 @@ GAME_INTRO = (
         with the most prestige points is declared the winner."""
         )
 
-# This object represents the actual level-1 Splendor game deck.
-DEV_CARD_DECK_1 = DevCardDeck(1, [
-        DevCard(level=1, t=DevCardType("black"), ppoints=0, cost={"green": 1, "red": 3, "black": 1}),
-        DevCard(level=1, t=DevCardType("black"), ppoints=0, cost={"green": 2, "red": 1}),
-        DevCard(level=1, t=DevCardType("black"), ppoints=0, cost={"green": 3}),
-        DevCard(level=1, t=DevCardType("black"), ppoints=0, cost={"white": 1, "blue": 1, "green": 1, "red": 1}),
-        DevCard(level=1, t=DevCardType("black"), ppoints=0, cost={"white": 1, "blue": 2, "green": 1, "red": 1}),
-        DevCard(level=1, t=DevCardType("black"), ppoints=0, cost={"white": 2, "blue": 2, "red": 1}),
-        DevCard(level=1, t=DevCardType("black"), ppoints=0, cost={"white": 2, "green": 2}),
-        DevCard(level=1, t=DevCardType("black"), ppoints=1, cost={"blue": 4}),
-        DevCard(level=1, t=DevCardType("blue"), ppoints=0, cost={"black": 3}),
-        DevCard(level=1, t=DevCardType("blue"), ppoints=0, cost={"blue": 1, "green": 3, "red": 1}),
-        DevCard(level=1, t=DevCardType("blue"), ppoints=0, cost={"green": 2, "black": 2}),
-        DevCard(level=1, t=DevCardType("blue"), ppoints=0, cost={"white": 1, "black": 2}),
-        DevCard(level=1, t=DevCardType("blue"), ppoints=0, cost={"white": 1, "green": 1, "red": 1, "black": 1}),
-        DevCard(level=1, t=DevCardType("blue"), ppoints=0, cost={"white": 1, "green": 1, "red": 2, "black": 1}),
-        DevCard(level=1, t=DevCardType("blue"), ppoints=0, cost={"white": 1, "green": 2, "red": 2}),
-        DevCard(level=1, t=DevCardType("blue"), ppoints=1, cost={"red": 4}),
-        DevCard(level=1, t=DevCardType("green"), ppoints=0, cost={"blue": 1, "red": 2, "black": 2}),
-        DevCard(level=1, t=DevCardType("green"), ppoints=0, cost={"blue": 2, "red": 2}),
-        DevCard(level=1, t=DevCardType("green"), ppoints=0, cost={"red": 3}),
-        DevCard(level=1, t=DevCardType("green"), ppoints=0, cost={"white": 1, "blue": 1, "red": 1, "black": 1}),
-        DevCard(level=1, t=DevCardType("green"), ppoints=0, cost={"white": 1, "blue": 1, "red": 1, "black": 2}),
-        DevCard(level=1, t=DevCardType("green"), ppoints=0, cost={"white": 1, "blue": 3, "green": 1}),
-        DevCard(level=1, t=DevCardType("green"), ppoints=0, cost={"white": 2, "blue": 1}),
-        DevCard(level=1, t=DevCardType("green"), ppoints=1, cost={"black": 4}),
-        DevCard(level=1, t=DevCardType("red"), ppoints=0, cost={"blue": 2, "green": 1}),
-        DevCard(level=1, t=DevCardType("red"), ppoints=0, cost={"white": 1, "blue": 1, "green": 1, "black": 1}),
-        DevCard(level=1, t=DevCardType("red"), ppoints=0, cost={"white": 1, "red": 1, "black": 3}),
-        DevCard(level=1, t=DevCardType("red"), ppoints=0, cost={"white": 2, "blue": 1, "green": 1, "black": 1}),
-        DevCard(level=1, t=DevCardType("red"), ppoints=0, cost={"white": 2, "green": 1, "black": 2}),
-        DevCard(level=1, t=DevCardType("red"), ppoints=0, cost={"white": 2, "red": 2}),
-        DevCard(level=1, t=DevCardType("red"), ppoints=0, cost={"white": 3}),
-        DevCard(level=1, t=DevCardType("red"), ppoints=1, cost={"white": 4}),
-        DevCard(level=1, t=DevCardType("white"), ppoints=0, cost={"blue": 1, "green": 1, "red": 1, "black": 1}),
-        DevCard(level=1, t=DevCardType("white"), ppoints=0, cost={"blue": 1, "green": 2, "red": 1, "black": 1}),
-        DevCard(level=1, t=DevCardType("white"), ppoints=0, cost={"blue": 2, "black": 2}),
-        DevCard(level=1, t=DevCardType("white"), ppoints=0, cost={"blue": 2, "green": 2, "black": 1}),
-        DevCard(level=1, t=DevCardType("white"), ppoints=0, cost={"blue": 3}),
-        DevCard(level=1, t=DevCardType("white"), ppoints=0, cost={"red": 2, "black": 1}),
-        DevCard(level=1, t=DevCardType("white"), ppoints=0, cost={"white": 3, "blue": 1, "black": 1}),
-        DevCard(level=1, t=DevCardType("white"), ppoints=1, cost={"green": 4}),
-        ])
-
-# This object represents the actual level-2 Splendor game deck.
-DEV_CARD_DECK_2 = DevCardDeck(2, [
-        DevCard(level=2, t=DevCardType("black"), ppoints=1, cost={"white": 3, "blue": 2, "green": 2}),
-        DevCard(level=2, t=DevCardType("black"), ppoints=1, cost={"white": 3, "green": 3, "black": 2}),
-        DevCard(level=2, t=DevCardType("black"), ppoints=2, cost={"blue": 1, "green": 4, "red": 2}),
-        DevCard(level=2, t=DevCardType("black"), ppoints=2, cost={"green": 5, "red": 3}),
-        DevCard(level=2, t=DevCardType("black"), ppoints=2, cost={"white": 5}),
-        DevCard(level=2, t=DevCardType("black"), ppoints=3, cost={"black": 6}),
-        DevCard(level=2, t=DevCardType("blue"), ppoints=1, cost={"blue": 2, "green": 2, "red": 3}),
-        DevCard(level=2, t=DevCardType("blue"), ppoints=1, cost={"blue": 2, "green": 3, "black": 3}),
-        DevCard(level=2, t=DevCardType("blue"), ppoints=2, cost={"blue": 5}),
-        DevCard(level=2, t=DevCardType("blue"), ppoints=2, cost={"white": 2, "red": 1, "black": 4}),
-        DevCard(level=2, t=DevCardType("blue"), ppoints=2, cost={"white": 5, "blue": 3}),
-        DevCard(level=2, t=DevCardType("blue"), ppoints=3, cost={"blue": 6}),
-        DevCard(level=2, t=DevCardType("green"), ppoints=1, cost={"white": 2, "blue": 3, "black": 2}),
-        DevCard(level=2, t=DevCardType("green"), ppoints=1, cost={"white": 3, "green": 2, "red": 3}),
-        DevCard(level=2, t=DevCardType("green"), ppoints=2, cost={"blue": 5, "green": 3}),
-        DevCard(level=2, t=DevCardType("green"), ppoints=2, cost={"green": 5}),
-        DevCard(level=2, t=DevCardType("green"), ppoints=2, cost={"white": 4, "blue": 2, "black": 1}),
-        DevCard(level=2, t=DevCardType("green"), ppoints=3, cost={"green": 6}),
-        DevCard(level=2, t=DevCardType("red"), ppoints=1, cost={"blue": 3, "red": 2, "black": 3}),
-        DevCard(level=2, t=DevCardType("red"), ppoints=1, cost={"white": 2, "red": 2, "black": 3}),
-        DevCard(level=2, t=DevCardType("red"), ppoints=2, cost={"black": 5}),
-        DevCard(level=2, t=DevCardType("red"), ppoints=2, cost={"white": 1, "blue": 4, "green": 2}),
-        DevCard(level=2, t=DevCardType("red"), ppoints=2, cost={"white": 3, "black": 5}),
-        DevCard(level=2, t=DevCardType("red"), ppoints=3, cost={"red": 6}),
-        DevCard(level=2, t=DevCardType("white"), ppoints=1, cost={"green": 3, "red": 2, "black": 2}),
-        DevCard(level=2, t=DevCardType("white"), ppoints=1, cost={"white": 2, "blue": 3, "red": 3}),
-        DevCard(level=2, t=DevCardType("white"), ppoints=2, cost={"green": 1, "red": 4, "black": 2}),
-        DevCard(level=2, t=DevCardType("white"), ppoints=2, cost={"red": 5}),
-        DevCard(level=2, t=DevCardType("white"), ppoints=2, cost={"red": 5, "black": 3}),
-        DevCard(level=2, t=DevCardType("white"), ppoints=3, cost={"white": 6}),
-        ])
-
-# This object represents the actual level-3 Splendor game deck.
-DEV_CARD_DECK_3 = DevCardDeck(3, [
-        DevCard(level=3, t=DevCardType("black"), ppoints=3, cost={"white": 3, "blue": 3, "green": 5, "red": 3}),
-        DevCard(level=3, t=DevCardType("black"), ppoints=4, cost={"green": 3, "red": 6, "black": 3}),
-        DevCard(level=3, t=DevCardType("black"), ppoints=4, cost={"red": 7}),
-        DevCard(level=3, t=DevCardType("black"), ppoints=5, cost={"red": 7, "black": 3}),
-        DevCard(level=3, t=DevCardType("blue"), ppoints=3, cost={"white": 3, "green": 3, "red": 3, "black": 5}),
-        DevCard(level=3, t=DevCardType("blue"), ppoints=4, cost={"white": 6, "blue": 3, "black": 3}),
-        DevCard(level=3, t=DevCardType("blue"), ppoints=4, cost={"white": 7}),
-        DevCard(level=3, t=DevCardType("blue"), ppoints=5, cost={"white": 7, "blue": 3}),
-        DevCard(level=3, t=DevCardType("green"), ppoints=3, cost={"white": 5, "blue": 3, "red": 3, "black": 3}),
-        DevCard(level=3, t=DevCardType("green"), ppoints=4, cost={"blue": 7}),
-        DevCard(level=3, t=DevCardType("green"), ppoints=4, cost={"white": 3, "blue": 6, "green": 3}),
-        DevCard(level=3, t=DevCardType("green"), ppoints=5, cost={"blue": 7, "green": 3}),
-        DevCard(level=3, t=DevCardType("red"), ppoints=3, cost={"white": 3, "blue": 5, "green": 3, "black": 3}),
-        DevCard(level=3, t=DevCardType("red"), ppoints=4, cost={"blue": 3, "green": 6, "red": 3}),
-        DevCard(level=3, t=DevCardType("red"), ppoints=4, cost={"green": 7}),
-        DevCard(level=3, t=DevCardType("red"), ppoints=5, cost={"green": 7, "red": 3}),
-        DevCard(level=3, t=DevCardType("white"), ppoints=3, cost={"blue": 3, "green": 3, "red": 5, "black": 3}),
-        DevCard(level=3, t=DevCardType("white"), ppoints=4, cost={"black": 7}),
-        DevCard(level=3, t=DevCardType("white"), ppoints=4, cost={"white": 3, "red": 3, "black": 6}),
-        DevCard(level=3, t=DevCardType("white"), ppoints=5, cost={"white": 3, "black": 7}),
-        ])
-
-# This object represents the actual Splendor game nobles.
-NOBLES_ALL_LIST = [
-        Noble(3, {'black': 3, 'blue': 3, 'white': 3}),
-        Noble(3, {'black': 3, 'red': 3, 'green': 3}),
-        Noble(3, {'black': 3, 'red': 3, 'white': 3}),
-        Noble(3, {'black': 4, 'red': 4}),
-        Noble(3, {'black': 4, 'white': 4}),
-        Noble(3, {'blue': 3, 'red': 3, 'green': 3}),
-        Noble(3, {'blue': 3, 'white': 3, 'green': 3}),
-        Noble(3, {'blue': 4, 'green': 4}),
-        Noble(3, {'blue': 4, 'white': 4}),
-        Noble(3, {'red': 4, 'green': 4}),
-        ]
+# Gem names in the order of the gem and cost columns of the packed catalogs (the gem index of record.py).
+CATALOG_GEM_NAMES = ("black", "blue", "green", "red", "white")
 
-def create_dev_card_deck_shuffled(deck_no: int) -> DevCardDeck:
+# The actual Splendor dev cards, packed one card per row, indexed by card id: level, gem, ppoints, then the
+# cost in black, blue, green, red, white.  Level-1 cards are ids 0..39, level-2 40..69, level-3 70..89.
+DEV_CARD_ROW_LEN = 8
+DEV_CARDS_PACKED = bytes((
+        1, 0, 0, 1, 0, 1, 3, 0,
+        1, 0, 0, 0, 0, 2, 1, 0,
+        1, 0, 0, 0, 0, 3, 0, 0,
+        1, 0, 0, 0, 1, 1, 1, 1,
+        1, 0, 0, 0, 2, 1, 1, 1,
+        1, 0, 0, 0, 2, 0, 1, 2,
+        1, 0, 0, 0, 0, 2, 0, 2,
+        1, 0, 1, 0, 4, 0, 0, 0,
+        1, 1, 0, 3, 0, 0, 0, 0,
+        1, 1, 0, 0, 1, 3, 1, 0,
+        1, 1, 0, 2, 0, 2, 0, 0,
+        1, 1, 0, 2, 0, 0, 0, 1,
+        1, 1, 0, 1, 0, 1, 1, 1,
+        1, 1, 0, 1, 0, 1, 2, 1,
+        1, 1, 0, 0, 0, 2, 2, 1,
+        1, 1, 1, 0, 0, 0, 4, 0,
+        1, 2, 0, 2, 1, 0, 2, 0,
+        1, 2, 0, 0, 2, 0, 2, 0,
+        1, 2, 0, 0, 0, 0, 3, 0,
+        1, 2, 0, 1, 1, 0, 1, 1,
+        1, 2, 0, 2, 1, 0, 1, 1,
+        1, 2, 0, 0, 3, 1, 0, 1,
+        1, 2, 0, 0, 1, 0, 0, 2,
+        1, 2, 1, 4, 0, 0, 0, 0,
+        1, 3, 0, 0, 2, 1, 0, 0,
+        1, 3, 0, 1, 1, 1, 0, 1,
+        1, 3, 0, 3, 0, 0, 1, 1,
+        1, 3, 0, 1, 1, 1, 0, 2,
+        1, 3, 0, 2, 0, 1, 0, 2,
+        1, 3, 0, 0, 0, 0, 2, 2,
+        1, 3, 0, 0, 0, 0, 0, 3,
+        1, 3, 1, 0, 0, 0, 0, 4,
+        1, 4, 0, 1, 1, 1, 1, 0,
+        1, 4, 0, 1, 1, 2, 1, 0,
+        1, 4, 0, 2, 2, 0, 0, 0,
+        1, 4, 0, 1, 2, 2, 0, 0,
+        1, 4, 0, 0, 3, 0, 0, 0,
+        1, 4, 0, 1, 0, 0, 2, 0,
+        1, 4, 0, 1, 1, 0, 0, 3,
+        1, 4, 1, 0, 0, 4, 0, 0,
+        2, 0, 1, 0, 2, 2, 0, 3,
+        2, 0, 1, 2, 0, 3, 0, 3,
+        2, 0, 2, 0, 1, 4, 2, 0,
+        2, 0, 2, 0, 0, 5, 3, 0,
+        2, 0, 2, 0, 0, 0, 0, 5,
+        2, 0, 3, 6, 0, 0, 0, 0,
+        2, 1, 1, 0, 2, 2, 3, 0,
+        2, 1, 1, 3, 2, 3, 0, 0,
+        2, 1, 2, 0, 5, 0, 0, 0,
+        2, 1, 2, 4, 0, 0, 1, 2,
+        2, 1, 2, 0, 3, 0, 0, 5,
+        2, 1, 3, 0, 6, 0, 0, 0,
+        2, 2, 1, 2, 3, 0, 0, 2,
+        2, 2, 1, 0, 0, 2, 3, 3,
+        2, 2, 2, 0, 5, 3, 0, 0,
+        2, 2, 2, 0, 0, 5, 0, 0,
+        2, 2, 2, 1, 2, 0, 0, 4,
+        2, 2, 3, 0, 0, 6, 0, 0,
+        2, 3, 1, 3, 3, 0, 2, 0,
+        2, 3, 1, 3, 0, 0, 2, 2,
+        2, 3, 2, 5, 0, 0, 0, 0,
+        2, 3, 2, 0, 4, 2, 0, 1,
+        2, 3, 2, 5, 0, 0, 0, 3,
+        2, 3, 3, 0, 0, 0, 6, 0,
+        2, 4, 1, 2, 0, 3, 2, 0,
+        2, 4, 1, 0, 3, 0, 3, 2,
+        2, 4, 2, 2, 0, 1, 4, 0,
+        2, 4, 2, 0, 0, 0, 5, 0,
+        2, 4, 2, 3, 0, 0, 5, 0,
+        2, 4, 3, 0, 0, 0, 0, 6,
+        3, 0, 3, 0, 3, 5, 3, 3,
+        3, 0, 4, 3, 0, 3, 6, 0,
+        3, 0, 4, 0, 0, 0, 7, 0,
+        3, 0, 5, 3, 0, 0, 7, 0,
+        3, 1, 3, 5, 0, 3, 3, 3,
+        3, 1, 4, 3, 3, 0, 0, 6,
+        3, 1, 4, 0, 0, 0, 0, 7,
+        3, 1, 5, 0, 3, 0, 0, 7,
+        3, 2, 3, 3, 3, 0, 3, 5,
+        3, 2, 4, 0, 7, 0, 0, 0,
+        3, 2, 4, 0, 6, 3, 0, 3,
+        3, 2, 5, 0, 7, 3, 0, 0,
+        3, 3, 3, 3, 5, 3, 0, 3,
+        3, 3, 4, 0, 3, 6, 3, 0,
+        3, 3, 4, 0, 0, 7, 0, 0,
+        3, 3, 5, 0, 0, 7, 3, 0,
+        3, 4, 3, 3, 3, 3, 5, 0,
+        3, 4, 4, 7, 0, 0, 0, 0,
+        3, 4, 4, 6, 0, 0, 3, 3,
+        3, 4, 5, 7, 0, 0, 0, 3,
+        ))
+DEV_CARD_ID_RANGES = {1: range(0, 40), 2: range(40, 70), 3: range(70, 90)}
+# the most tokens of a single gem that any card costs
+DEV_CARD_GEM_COST_MAX = max(
+    DEV_CARDS_PACKED[offset + col]
+    for offset in range(0, len(DEV_CARDS_PACKED), DEV_CARD_ROW_LEN)
+    for col in range(3, DEV_CARD_ROW_LEN)
+    )
+
+# The actual Splendor nobles, packed one noble per row, indexed by noble id: ppoints, then the cost in black,
+# blue, green, red, white.
+NOBLE_ROW_LEN = 6
+NOBLES_PACKED = bytes((
+        3, 3, 3, 0, 0, 3,
+        3, 3, 0, 3, 3, 0,
+        3, 3, 0, 0, 3, 3,
+        3, 4, 0, 0, 4, 0,
+        3, 4, 0, 0, 0, 4,
+        3, 0, 3, 3, 3, 0,
+        3, 0, 3, 3, 0, 3,
+        3, 0, 4, 4, 0, 0,
+        3, 0, 4, 0, 0, 4,
+        3, 0, 0, 4, 4, 0,
+        ))
+NOBLE_IDS = range(len(NOBLES_PACKED) // NOBLE_ROW_LEN)
+
+NOBLES_IN_PLAY_COUNT_DICT = {2: 3, 3: 4, 4: 5}
+
+# DevCard and Noble objects, unpacked from the catalogs on first use and shared by every game (they are never
+# modified).
+_dev_cards_all_list: List[DevCard] = None
+_nobles_all_list: List[Noble] = None
+_dev_card_decks_dict: Dict[int, DevCardDeck] = {}
+_dev_card_id_map: Dict[tuple, int] = None
+_noble_id_map: Dict[tuple, int] = None
+
+def _unpack_cost(row: bytes) -> Dict[str, int]:
+    return {gem_name: count for gem_name, count in zip(CATALOG_GEM_NAMES, row) if count > 0}
+
+def get_dev_cards_all_list() -> List[DevCard]:
     """
-    Create a dev card deck of the specified level, by copying the actual deck and shuffling it.
+    Return all dev cards, indexed by card id.
+
+    >>> len(get_dev_cards_all_list())
+    90
+    >>> get_dev_cards_all_list()[0]
+    <DevCard: l1 p0 gblack c{'black': 1, 'green': 1, 'red': 3}>
     """
-    if deck_no == 1:
-        dev_card_deck = deepcopy(DEV_CARD_DECK_1)
-    elif deck_no == 2:
-        dev_card_deck = deepcopy(DEV_CARD_DECK_2)
-    elif deck_no == 3:
-        dev_card_deck = deepcopy(DEV_CARD_DECK_3)
-    else:
+    global _dev_cards_all_list
+    if _dev_cards_all_list is None:
+        dev_cards = []
+        for offset in range(0, len(DEV_CARDS_PACKED), DEV_CARD_ROW_LEN):
+            row = DEV_CARDS_PACKED[offset:offset + DEV_CARD_ROW_LEN]
+            dev_cards.append(DevCard(level=row[0], gem=Gem(CATALOG_GEM_NAMES[row[1]]), ppoints=row[2], cost=_unpack_cost(row[3:])))
+        _dev_cards_all_list = dev_cards
+    return _dev_cards_all_list
+
+def get_nobles_all_list() -> List[Noble]:
+    """
+    Return all nobles, indexed by noble id.
+
+    >>> get_nobles_all_list()[3]
+    <Noble: points 3, cost {'black': 4, 'red': 4}>
+    """
+    global _nobles_all_list
+    if _nobles_all_list is None:
+        nobles = []
+        for offset in range(0, len(NOBLES_PACKED), NOBLE_ROW_LEN):
+            row = NOBLES_PACKED[offset:offset + NOBLE_ROW_LEN]
+            nobles.append(Noble(row[0], _unpack_cost(row[1:])))
+        _nobles_all_list = nobles
+    return _nobles_all_list
+
+def get_dev_card_deck(deck_no: int) -> DevCardDeck:
+    """
+    Return the whole, unshuffled dev card deck of the specified level.  Shared; don't modify it.
+
+    >>> get_dev_card_deck(2).count()
+    30
+    """
+    if deck_no not in DEV_CARD_ID_RANGES:
         raise Exception(f"no such deck number: {deck_no}")
+    if deck_no not in _dev_card_decks_dict:
+        dev_cards_all_list = get_dev_cards_all_list()
+        _dev_card_decks_dict[deck_no] = DevCardDeck(
+            deck_no,
+            [dev_cards_all_list[card_id] for card_id in DEV_CARD_ID_RANGES[deck_no]],
+            )
+    return _dev_card_decks_dict[deck_no]
+
+def __getattr__(name: str):
+    """
+    The catalog objects that used to be built at import time, now built on first use.
+    """
+    if name == "DEV_CARD_DECK_1":
+        return get_dev_card_deck(1)
+    if name == "DEV_CARD_DECK_2":
+        return get_dev_card_deck(2)
+    if name == "DEV_CARD_DECK_3":
+        return get_dev_card_deck(3)
+    if name == "DEV_CARDS_ALL_LIST":
+        return get_dev_cards_all_list()
+    if name == "NOBLES_ALL_LIST":
+        return get_nobles_all_list()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-    dev_card_deck.shuffle()
-    return dev_card_deck
+def create_dev_card_deck_shuffled(deck_no: int) -> DevCardDeck:
+    """
+    Create a dev card deck of the specified level, by shuffling the card ids of that level.
+
+    >>> random.seed(0)
+    >>> dev_card_deck = create_dev_card_deck_shuffled(1)
+    >>> dev_card_deck.count()
+    40
+    >>> sorted(get_dev_card_id(dc) for dc in dev_card_deck.get_list()) == list(DEV_CARD_ID_RANGES[1])
+    True
+    """
+    if deck_no not in DEV_CARD_ID_RANGES:
+        raise Exception(f"no such deck number: {deck_no}")
+    card_ids = list(DEV_CARD_ID_RANGES[deck_no])
+    random.shuffle(card_ids)
+    dev_cards_all_list = get_dev_cards_all_list()
+    return DevCardDeck(deck_no, [dev_cards_all_list[card_id] for card_id in card_ids])
 
 def create_nobles_in_play_shuffled(players_count: int) -> NoblesInPlay:
     """
     Shuffle the set of nobles and select some based on the number of players.
     """
-    nobles_all = deepcopy(NOBLES_ALL_LIST)
-    if players_count == 2:
-        nobles_count = 3
-    elif players_count == 3:
-        nobles_count = 4
-    elif players_count == 4:
-        nobles_count = 5
-    else:
+    nobles_count = NOBLES_IN_PLAY_COUNT_DICT.get(players_count)
+    if nobles_count is None:
         raise Exception(f"unexpected number of players: {players_count}")
-    random.shuffle(nobles_all)
-    return NoblesInPlay(set(nobles_all[:nobles_count]))
+    noble_ids = list(NOBLE_IDS)
+    random.shuffle(noble_ids)
+    nobles_all_list = get_nobles_all_list()
+    return NoblesInPlay([nobles_all_list[noble_id] for noble_id in noble_ids[:nobles_count]])
+
+
+def _dev_card_key(dev_card: DevCard) -> tuple:
+    return (
+        dev_card.get_level(),
+        dev_card.get_gem().get_name(),
+        dev_card.get_ppoints(),
+        tuple(sorted(dev_card.get_cost_dict().items())),
+        )
+
+def _noble_key(noble: Noble) -> tuple:
+    return (noble.get_ppoints(), tuple(sorted((str(k), v) for k, v in noble.get_cost().items())))
+
+def get_dev_card_id(dev_card: DevCard) -> int:
+    """
+    Return the catalog id of dev_card, or raise exception if it isn't one of the actual Splendor cards.
+
+    >>> get_dev_card_id(get_dev_card_deck(2).get_list()[0])
+    40
+    >>> get_dev_card_by_id(40) == get_dev_card_deck(2).get_list()[0]
+    True
+    """
+    global _dev_card_id_map
+    if _dev_card_id_map is None:
+        _dev_card_id_map = {_dev_card_key(dc): idx for idx, dc in enumerate(get_dev_cards_all_list())}
+    card_id = _dev_card_id_map.get(_dev_card_key(dev_card))
+    if card_id is None:
+        raise Exception(f"no such dev card in the catalog: {dev_card}")
+    return card_id
+
+def get_dev_card_by_id(card_id: int) -> DevCard:
+    return get_dev_cards_all_list()[card_id]
+
+def get_noble_id(noble: Noble) -> int:
+    """
+    Return the catalog id of noble, or raise exception if it isn't one of the actual Splendor nobles.
+
+    >>> get_noble_id(Noble(3, {'blue': 4, 'green': 4}))
+    7
+    >>> get_noble_by_id(7) == get_nobles_all_list()[7]
+    True
+    """
+    global _noble_id_map
+    if _noble_id_map is None:
+        _noble_id_map = {_noble_key(noble): idx for idx, noble in enumerate(get_nobles_all_list())}
+    noble_id = _noble_id_map.get(_noble_key(noble))
+    if noble_id is None:
+        raise Exception(f"no such noble in the catalog: {noble}")
+    return noble_id
 
+def get_noble_by_id(noble_id: int) -> Noble:
+    return get_nobles_all_list()[noble_id]
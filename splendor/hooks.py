@@ -0,0 +1,77 @@
+"""
+hooks.py - The one registry of wrappers swapped in for methods, shared by splendor.instrument and splendor.trace.
+
+Each owner (a module, by name) adds wrappers to methods, and later removes all of its own.  The registry keeps
+each wrapped method's original, and rebuilds the method from it whenever its wrappers change: the original,
+wrapped by each owner's wrapper in the order they were added.  So owners may turn on and off in any order, and
+once the last wrapper of a method is removed, the original is put back and costs nothing again.
+
+    >>> class Counter:
+    ...     def get(self):
+    ...         return 1
+    >>> original = Counter.get
+    >>> def make_adding(amount):
+    ...     return lambda method: (lambda self: method(self) + amount)
+    >>> add_wrapper("tens", Counter, "get", make_adding(10))
+    >>> add_wrapper("hundreds", Counter, "get", make_adding(100))
+    >>> Counter().get()
+    111
+    >>> remove_wrappers("tens")
+    >>> Counter().get(), has_wrappers("tens"), has_wrappers("hundreds")
+    (101, False, True)
+    >>> remove_wrappers("hundreds")
+    >>> Counter.get is original
+    True
+"""
+
+from typing import Callable, Dict, Tuple
+
+# (class, method name) -> the method's original, as found in the class
+_originals: Dict[Tuple[type, str], Callable] = {}
+# (class, method name) -> owner -> the owner's make_wrapper, in the order the owners added them
+_wrappers: Dict[Tuple[type, str], Dict[str, Callable[[Callable], Callable]]] = {}
+
+
+def _rebuild(cls: type, method_name: str) -> None:
+    key = (cls, method_name)
+    method = _originals[key]
+    if len(_wrappers[key]) == 0:
+        del _originals[key]
+        del _wrappers[key]
+    else:
+        for make_wrapper in _wrappers[key].values():
+            method = make_wrapper(method)
+    setattr(cls, method_name, method)
+    return
+
+def add_wrapper(
+    owner: str,
+    cls: type,
+    method_name: str,
+    make_wrapper: Callable[[Callable], Callable],
+    ) -> None:
+    """
+    Wrap cls's method_name with make_wrapper(method), outside any wrappers other owners added before.  An owner
+    wraps a method at most once.
+    """
+    key = (cls, method_name)
+    if key not in _originals:
+        _originals[key] = cls.__dict__[method_name]
+        _wrappers[key] = {}
+    if owner in _wrappers[key]:
+        raise Exception(f"{owner} already wraps {cls.__name__}.{method_name}")
+    _wrappers[key][owner] = make_wrapper
+    _rebuild(cls, method_name)
+    return
+
+def remove_wrappers(owner: str) -> None:
+    """
+    Remove every wrapper owner added, keeping the other owners' wrappers.
+    """
+    for cls, method_name in [key for key, wrappers in _wrappers.items() if owner in wrappers]:
+        del _wrappers[(cls, method_name)][owner]
+        _rebuild(cls, method_name)
+    return
+
+def has_wrappers(owner: str) -> bool:
+    return any(owner in wrappers for wrappers in _wrappers.values())
@@ -0,0 +1,162 @@
+"""
+instrument.py - Opt-in call counters and cumulative timers for the rules engine's hot paths.
+
+Instrumentation is off by default and then costs nothing: enable() swaps timed wrappers in for the
+instrumented methods, and disable() takes them out again.  The wrappers go through splendor.hooks, so tracing
+(splendor.trace, which wraps some of the same methods) may be turned on and off independently.  While enabled, every call of an
+instrumented method counts one call and adds its wall time (perf_counter_ns) to the method's timer.  Timers
+are inclusive: a GameState.copy made inside Game.action_take_three_tokens is counted under both.
+
+    >>> from splendor.game import Game
+    >>> original = Game.action_take_three_tokens
+    >>> enable()
+    >>> a_game = Game(2)
+    >>> a_game.add_player_by_name("alice")
+    >>> a_game.add_player_by_name("bob")
+    >>> a_game.action_take_three_tokens(a_game.get_current_player(), "black", "blue", "red")
+    >>> snapshot = get_snapshot()
+    >>> snapshot["Game.action_take_three_tokens"]["calls"]
+    1
+    >>> snapshot["GameState.copy"]["calls"]
+    1
+    >>> snapshot["GameStateHistory.append"]["calls"]
+    2
+    >>> snapshot["Game.action_take_three_tokens"]["seconds"] > 0
+    True
+    >>> print(snapshot_to_prometheus(snapshot).splitlines()[2])
+    splendor_calls_total{op="Game.action_take_three_tokens"} 1
+    >>> disable()
+    >>> is_enabled()
+    False
+    >>> Game.action_take_three_tokens is original
+    True
+"""
+
+import functools
+from splendor import (
+    hooks,
+    )
+from splendor.game import (
+    Game,
+    GameState,
+    GameStateHistory,
+    )
+from splendor.player import (
+    PlayerState,
+    PlayerStateHistory,
+    )
+import time
+from typing import Callable, Dict, List
+
+# (class, method name) of every instrumented method
+INSTRUMENTED_METHODS = (
+    (Game, "action_take_three_tokens"),
+    (Game, "action_take_two_tokens"),
+    (Game, "action_reserve_dev_card"),
+    (Game, "action_reserve_hidden_dev_card"),
+    (Game, "action_purchase_dev_card"),
+    (Game, "action_pass"),
+    (GameState, "copy"),
+    (PlayerState, "copy"),
+    (GameStateHistory, "append"),
+    (PlayerStateHistory, "append"),
+    )
+
+PROMETHEUS_PREFIX = "splendor"
+
+# the owner of this module's wrappers, in splendor.hooks
+HOOKS_OWNER = "instrument"
+
+_calls: Dict[str, int] = {}
+_elapsed_ns: Dict[str, int] = {}
+
+def _get_op_name(cls: type, method_name: str) -> str:
+    return f"{cls.__name__}.{method_name}"
+
+def _make_timed(op_name: str, method: Callable) -> Callable:
+    perf_counter_ns = time.perf_counter_ns
+    calls = _calls
+    elapsed_ns = _elapsed_ns
+
+    @functools.wraps(method)
+    def timed(*args, **kwargs):
+        t_start = perf_counter_ns()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            elapsed_ns[op_name] += perf_counter_ns() - t_start
+            calls[op_name] += 1
+    return timed
+
+def is_enabled() -> bool:
+    return hooks.has_wrappers(HOOKS_OWNER)
+
+def enable() -> None:
+    """
+    Swap timed wrappers in for the instrumented methods.  Counters are kept across disable()/enable(); see reset().
+    """
+    if is_enabled():
+        return
+    for cls, method_name in INSTRUMENTED_METHODS:
+        op_name = _get_op_name(cls, method_name)
+        _calls.setdefault(op_name, 0)
+        _elapsed_ns.setdefault(op_name, 0)
+        hooks.add_wrapper(HOOKS_OWNER, cls, method_name, functools.partial(_make_timed, op_name))
+    return
+
+def disable() -> None:
+    """
+    Take the timed wrappers out (leaving any other module's wrappers in).
+    """
+    hooks.remove_wrappers(HOOKS_OWNER)
+    return
+
+def reset() -> None:
+    """
+    Zero all counters and timers.
+    """
+    for op_name in _calls.keys():
+        _calls[op_name] = 0
+        _elapsed_ns[op_name] = 0
+    return
+
+def get_snapshot() -> Dict[str, Dict[str, float]]:
+    """
+    Return op name -> {"calls": int, "seconds": float} for every instrumented method.
+    """
+    snapshot = {}
+    for cls, method_name in INSTRUMENTED_METHODS:
+        op_name = _get_op_name(cls, method_name)
+        snapshot[op_name] = {
+            "calls": _calls.get(op_name, 0),
+            "seconds": _elapsed_ns.get(op_name, 0) / 1e9,
+        }
+    return snapshot
+
+def snapshot_to_prometheus(snapshot: Dict[str, Dict[str, float]]) -> str:
+    """
+    Render a snapshot in the Prometheus text exposition format.
+    """
+    lines: List[str] = []
+    lines.append(f"# HELP {PROMETHEUS_PREFIX}_calls_total Calls of an instrumented rules engine method.")
+    lines.append(f"# TYPE {PROMETHEUS_PREFIX}_calls_total counter")
+    for op_name, values in snapshot.items():
+        lines.append(f'{PROMETHEUS_PREFIX}_calls_total{{op="{op_name}"}} {values["calls"]}')
+    lines.append(f"# HELP {PROMETHEUS_PREFIX}_seconds_total Cumulative wall time in an instrumented method.")
+    lines.append(f"# TYPE {PROMETHEUS_PREFIX}_seconds_total counter")
+    for op_name, values in snapshot.items():
+        lines.append(f'{PROMETHEUS_PREFIX}_seconds_total{{op="{op_name}"}} {values["seconds"]:.9f}')
+    return "\n".join(lines) + "\n"
+
+def write_prometheus(
+    path: str,
+    snapshot: Dict[str, Dict[str, float]] = None,
+    ) -> None:
+    """
+    Write snapshot (default: the current one) to path as a Prometheus text file.
+    """
+    if snapshot is None:
+        snapshot = get_snapshot()
+    with open(path, "w") as f:
+        f.write(snapshot_to_prometheus(snapshot))
+    return
@@ -1,28 +1,91 @@
 """
 interactive.py - helper functions for Splendor interactive mode.
+
+The prompts read their answers from an InputSource: the console by default, or a ScriptedInput playing back a
+transcript, so that a session can be driven without a terminal (many of them in one process, e.g. to load-test the
+console flow).
+
+    >>> import io
+    >>> out = io.StringIO()
+    >>> source = ScriptedInput(["5", "3", "Ava", "y"], out=out)
+    >>> prompt_number("how many players?", int, (2, 4), out=out, source=source)
+    3
+    >>> prompt_string("enter the name of player 1", out=out, source=source), prompt_yn("ready?", out=out, source=source)
+    ('Ava', True)
+    >>> print(out.getvalue(), end="")
+    how many players? (int in range (2, 4)): 5
+    error: input must be between 2 and 4, inclusive
+    how many players? (int in range (2, 4)): 3
+    enter the name of player 1 (string): Ava
+    ready? (y/n): y
+    >>> prompt_yn("play again?", out=out, source=source)
+    Traceback (most recent call last):
+    ...
+    EOFError
 """
 
 import sys
 from typing import (
         Any, 
+        Iterable,
         Tuple,
         Type,
         )
 
-import logging
-logging.basicConfig(level=logging.INFO)
+class InputSource:
+    """
+    Where the prompts read their answers from, one line per prompt.  read_line() raises EOFError once there are
+    no more.
+    """
+
+    def read_line(self, prompt: str) -> str:
+        raise NotImplementedError
+
+class ConsoleInput(InputSource):
+    """
+    Answers typed at the console (stdin), after the prompt.
+    """
+
+    def read_line(self, prompt: str) -> str:
+        return input(prompt)
+
+class ScriptedInput(InputSource):
+    """
+    Answers taken in order from lines, a transcript.  If out is given, each prompt and its answer are echoed to it,
+    as they would show on the console.
+    """
+
+    def __init__(
+            self,
+            lines: Iterable[str],
+            out=None,
+            ) -> None:
+        self.lines = iter(lines)
+        self.out = out
+
+    def read_line(self, prompt: str) -> str:
+        line = next(self.lines, None)
+        if line is None:
+            raise EOFError
+        if self.out is not None:
+            print(prompt + line, file=self.out)
+        return line
+
+CONSOLE_INPUT = ConsoleInput()
 
 def prompt_yn(
         prompt: str="",
         out=sys.stdout,
+        source: InputSource=CONSOLE_INPUT,
         ) -> bool:
     """
+    Prompt the user for a yes or no.
     """
     if prompt != "":
         prompt += " (y/n): "
     while True:
         try:
-            text_in = input(prompt)
+            text_in = source.read_line(prompt)
         except EOFError as e:
             raise e
         text_in_cleaned = text_in.strip().upper()
@@ -39,11 +102,20 @@ def prompt_number(
         typ: Type=int,
         input_range: Tuple=None,
         out=sys.stdout,
+        source: InputSource=CONSOLE_INPUT,
+        commands: Tuple[str, ...]=(),
         ) -> int:
     """
     Prompt the user for a number (int or float).  
 
     If range (e.g. (3, 6)) is specified, the user-inputted int must be between the specified min and max, inclusive.
+    If commands (e.g. ("hint",)) are given, the user may enter one of them instead, and it is returned as is.
+
+    >>> source = ScriptedInput(["hint", "2"])
+    >>> prompt_number("choose", int, (1, 3), source=source, commands=("hint",))
+    'hint'
+    >>> prompt_number("choose", int, (1, 3), source=source, commands=("hint",))
+    2
     """
     if typ != int and typ != float:
         raise Exception("type must be int or float")
@@ -61,14 +133,17 @@ def prompt_number(
     if prompt != "":
         prompt += f" ({typ.__name__}" + \
             ((" in range " + str(input_range)) if input_range != None else "") + \
+            ("".join(f" or '{command}'" for command in commands)) + \
             "): "
 
     while True:
         try:
-            text_in = input(prompt)
+            text_in = source.read_line(prompt)
         except EOFError as e:
             raise e
         text_in_cleaned = text_in.strip()
+        if text_in_cleaned in commands:
+            return text_in_cleaned
 
         try:
             text_in_casted = typ(text_in_cleaned)
@@ -86,6 +161,7 @@ def prompt_string(
         prompt: str="",
         max_len: int=255,
         out=sys.stdout,
+        source: InputSource=CONSOLE_INPUT,
         ) -> int:
     """
     Prompt the user for a string.
@@ -95,7 +171,7 @@ def prompt_string(
 
     while True:
         try:
-            text_in = input(prompt)
+            text_in = source.read_line(prompt)
         except EOFError as e:
             raise e
         text_in_cleaned = text_in.strip()
@@ -0,0 +1,514 @@
+"""
+lobby.py - A lobby that forms tables of queued players and bots and spreads their games over worker processes.
+
+    python -m splendor.lobby --port 7400 --workers 4
+
+Each worker is a splendor.server.SplendorServer in a process of its own (one event loop per core), and the lobby
+places every table's game on a worker by consistent hashing of the table id (see HashRing).  A client queues
+with the lobby, over the same line-delimited JSON as the server:
+
+    {"op": "queue", "players": 3, "name": "Ava", "bots": 1}
+        -> once a table is formed: {"ok": true, "host": "127.0.0.1", "port": 7401, "game": 5}
+
+then connects to that worker and joins the game by id ({"op": "join", "game": 5, "name": "Ava"}).  A queued
+entry brings its bots along, so it takes 1 + bots seats; tables are filled from the queue of their size, oldest
+entries first, and the table's bots play the first entry's "bot_policy".  A client that disconnects while
+queued leaves the queue.
+
+The lobby pings every worker every health_check_interval_s.  A worker that doesn't answer is taken off the ring,
+so only its share of new tables moves to the others, and a worker process that died is started again and put back
+on the ring once it answers.  Games that were being played on a dead worker are lost; their players queue again.
+
+    >>> async def demo():
+    ...     servers = [SplendorServer(idle_timeout_s=5) for i in range(2)]
+    ...     lobby = Lobby(health_check_interval_s=60)
+    ...     for i, server in enumerate(servers):
+    ...         await server.start("127.0.0.1", 0)
+    ...         lobby.add_node(WorkerNode(f"worker_{i}", "127.0.0.1", server.get_port()))
+    ...     await lobby.start("127.0.0.1", 0)
+    ...     ava = await connect("127.0.0.1", lobby.get_port())
+    ...     bernardo = await connect("127.0.0.1", lobby.get_port())
+    ...     ava_queued = asyncio.create_task(request(ava, {"op": "queue", "players": 2, "name": "Ava"}))
+    ...     await asyncio.sleep(0.1)
+    ...     print(await request(bernardo, {"op": "ping"}))
+    ...     table = await request(bernardo, {"op": "queue", "players": 2, "name": "Bernardo"})
+    ...     print(table == await ava_queued, table["game"])
+    ...     worker = await connect(table["host"], table["port"])
+    ...     print((await request(worker, {"op": "join", "game": table["game"], "name": "Ava"}))["seat"])
+    ...     worker[1].close()
+    ...     table_server, other_server = sorted(servers, key=lambda server: server.get_port() != table["port"])
+    ...     await table_server.stop()
+    ...     await lobby.check_health()
+    ...     print(lobby.ring.get_nodes())
+    ...     for client in (ava, bernardo):
+    ...         client[1].close()
+    ...     await lobby.stop()
+    ...     await other_server.stop()
+    >>> asyncio.run(demo())
+    {'ok': True, 'workers': ['worker_0', 'worker_1'], 'queued': 1}
+    True 0
+    0
+    ['worker_1']
+"""
+
+import argparse
+import asyncio
+import bisect
+import collections
+import hashlib
+import multiprocessing
+import queue
+from splendor.bot_pool import (
+    BotPool,
+    )
+from splendor.game import (
+    PLAYERS_COUNT_MAX,
+    PLAYERS_COUNT_MIN,
+    )
+from splendor.server import (
+    BOT_POLICY_NAME_DEFAULT,
+    connect,
+    request,
+    SplendorServer,
+    )
+from splendor.stream_server import (
+    DEFAULT_HOST,
+    StreamServer,
+    )
+import signal
+from typing import Deque, Dict, List, Tuple
+
+DEFAULT_PORT = 7400
+
+# points per worker on the hash ring; more spreads tables more evenly
+RING_VIRTUAL_NODES = 64
+HEALTH_CHECK_INTERVAL_S = 1.0
+HEALTH_CHECK_TIMEOUT_S = 2.0
+WORKER_START_TIMEOUT_S = 30.0
+# bot worker processes per game worker
+WORKER_BOT_WORKERS_COUNT = 1
+
+
+def hash_key(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """
+    A consistent hash ring of nodes: a key belongs to the node whose next point on the ring follows the key's hash.
+    Adding or removing a node only moves the keys of that node.
+
+    >>> ring = HashRing()
+    >>> for node in ("w0", "w1", "w2"):
+    ...     ring.add_node(node)
+    >>> owners = {key: ring.get_node(str(key)) for key in range(3000)}
+    >>> sorted(collections.Counter(owners.values()).values())[0] > 700
+    True
+    >>> ring.remove_node("w1")
+    >>> [key for key in owners if owners[key] != "w1" and ring.get_node(str(key)) != owners[key]]
+    []
+    >>> ring.get_nodes()
+    ['w0', 'w2']
+    """
+
+    virtual_nodes: int
+    points: List[int] # sorted
+    point_nodes: Dict[int, str]
+
+    def __init__(self, virtual_nodes: int = RING_VIRTUAL_NODES) -> None:
+        self.virtual_nodes = virtual_nodes
+        self.points = []
+        self.point_nodes = {}
+
+    def add_node(self, node: str) -> None:
+        for i in range(self.virtual_nodes):
+            point = hash_key(f"{node}#{i}")
+            if point not in self.point_nodes:
+                bisect.insort(self.points, point)
+                self.point_nodes[point] = node
+        return
+
+    def remove_node(self, node: str) -> None:
+        self.points = [point for point in self.points if self.point_nodes[point] != node]
+        self.point_nodes = {point: self.point_nodes[point] for point in self.points}
+        return
+
+    def has_node(self, node: str) -> bool:
+        return node in self.point_nodes.values()
+
+    def get_nodes(self) -> List[str]:
+        return sorted(set(self.point_nodes.values()))
+
+    def get_node(self, key: str) -> str:
+        if len(self.points) == 0:
+            raise Exception("no workers available")
+        idx = bisect.bisect(self.points, hash_key(key)) % len(self.points)
+        return self.point_nodes[self.points[idx]]
+
+
+class Matchmaker:
+    """
+    The queues of entries waiting for a table, one per table size.  An entry takes 1 + its bots seats.
+
+    >>> matchmaker = Matchmaker()
+    >>> matchmaker.add_entry("ava", {"players": 3})
+    >>> matchmaker.add_entry("bernardo", {"players": 3, "bots": 1})
+    >>> matchmaker.add_entry("charlie", {"players": 3, "bots": 1})
+    >>> matchmaker.add_entry("dora", {"players": 4, "bots": 1, "bot_policy": "random"})
+    >>> for table in matchmaker.form_tables():
+    ...     print(table)
+    (3, ['ava', 'bernardo'], {'players': 3, 'bots': 1, 'bot_policy': 'greedy'})
+    >>> matchmaker.count_entries()
+    2
+    >>> matchmaker.remove_entry("dora")
+    >>> matchmaker.count_entries()
+    1
+    """
+
+    queues: Dict[int, Deque[Tuple[object, Dict]]] # players count -> (entry key, request), oldest first
+
+    def __init__(self) -> None:
+        self.queues = {
+            players_count: collections.deque() for players_count in range(PLAYERS_COUNT_MIN, PLAYERS_COUNT_MAX + 1)
+            }
+
+    def add_entry(self, key, request: Dict) -> None:
+        players_count = request.get("players")
+        bots_count = request.get("bots", 0)
+        if players_count not in self.queues:
+            raise Exception(f"players must be {PLAYERS_COUNT_MIN} to {PLAYERS_COUNT_MAX}")
+        if not isinstance(bots_count, int) or bots_count < 0 or bots_count >= players_count:
+            raise Exception("bots must be a count, less than players")
+        self.queues[players_count].append((key, request))
+        return
+
+    def remove_entry(self, key) -> None:
+        for size_queue in self.queues.values():
+            for entry in size_queue:
+                if entry[0] == key:
+                    size_queue.remove(entry)
+                    return
+        return
+
+    def count_entries(self) -> int:
+        return sum(len(size_queue) for size_queue in self.queues.values())
+
+    def form_tables(self) -> List[Tuple[int, List, Dict]]:
+        """
+        Take every table that can be filled out of the queues, and return each one as (players count, entry keys,
+        open request), where the open request is the one for splendor.server (see SplendorServer.open_game_for_table()).
+        """
+        tables = []
+        for players_count, size_queue in self.queues.items():
+            while True:
+                entries = []
+                seats_count = 0
+                for entry in size_queue:
+                    entry_seats_count = 1 + entry[1].get("bots", 0)
+                    if seats_count + entry_seats_count <= players_count:
+                        entries.append(entry)
+                        seats_count += entry_seats_count
+                        if seats_count == players_count:
+                            break
+                if seats_count < players_count:
+                    break
+                for entry in entries:
+                    size_queue.remove(entry)
+                open_request = {"players": players_count}
+                bots_count = sum(entry[1].get("bots", 0) for entry in entries)
+                if bots_count > 0:
+                    open_request["bots"] = bots_count
+                    open_request["bot_policy"] = next(
+                        entry[1].get("bot_policy", BOT_POLICY_NAME_DEFAULT) for entry in entries if entry[1].get("bots", 0) > 0
+                        )
+                tables.append((players_count, [entry[0] for entry in entries], open_request))
+        return tables
+
+
+def run_worker(
+    host: str,
+    port: int,
+    port_queue,
+    bot_workers_count: int = WORKER_BOT_WORKERS_COUNT,
+    ) -> None:
+    """
+    Run a game server (the target of a worker process), and put the port it listens on into port_queue.
+    """
+    bot_pool = BotPool(bot_workers_count) if bot_workers_count > 0 else None
+
+    async def serve() -> None:
+        server = SplendorServer(bot_pool=bot_pool)
+        if bot_pool is not None:
+            await bot_pool.warm_up()
+        await server.start(host, port)
+        port_queue.put(server.get_port())
+        # stopped by WorkerNode.stop()
+        is_stopping = asyncio.Event()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, is_stopping.set)
+        await is_stopping.wait()
+        await server.stop()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if bot_pool is not None:
+            bot_pool.shutdown()
+    return
+
+
+class WorkerNode:
+    """
+    A game server the lobby places games on, and (if the lobby started it) its process.
+    """
+
+    name: str
+    host: str
+    port: int
+
+    def __init__(
+        self,
+        name: str,
+        host: str,
+        port: int = None,
+        ) -> None:
+        self.name = name
+        self.host = host
+        self.port = port
+        self.process = None
+        self.client = None
+        self.lock = asyncio.Lock()
+
+    async def start_process(self, bot_workers_count: int = WORKER_BOT_WORKERS_COUNT) -> None:
+        """
+        Start a worker process serving on any free port, and wait until it listens.
+        """
+        port_queue = multiprocessing.get_context("spawn").Queue()
+        self.process = multiprocessing.get_context("spawn").Process(
+            target=run_worker, args=(self.host, 0, port_queue, bot_workers_count),
+            )
+        self.process.start()
+        try:
+            self.port = await asyncio.get_running_loop().run_in_executor(None, port_queue.get, True, WORKER_START_TIMEOUT_S)
+        except queue.Empty:
+            self.process.terminate()
+            raise Exception(f"{self.name} didn't start")
+        self.client = None
+        return
+
+    def is_process_dead(self) -> bool:
+        return self.process is not None and not self.process.is_alive()
+
+    async def request(self, obj: Dict) -> Dict:
+        """
+        Send a request over the lobby's connection to this worker, one request at a time.
+        """
+        async with self.lock:
+            try:
+                if self.client is None:
+                    self.client = await connect(self.host, self.port)
+                return await asyncio.wait_for(request(self.client, obj), HEALTH_CHECK_TIMEOUT_S)
+            except Exception:
+                if self.client is not None:
+                    self.client[1].close()
+                self.client = None
+                raise
+
+    def stop(self) -> None:
+        if self.client is not None:
+            self.client[1].close()
+            self.client = None
+        if self.process is not None and self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        return
+
+
+class Lobby(StreamServer):
+    """
+    The lobby server (see the module docstring).
+    """
+
+    nodes: Dict[str, WorkerNode]
+    ring: HashRing
+    matchmaker: Matchmaker
+    next_table_id: int
+
+    default_port = DEFAULT_PORT
+
+    def __init__(
+        self,
+        health_check_interval_s: float = HEALTH_CHECK_INTERVAL_S,
+        ) -> None:
+        self.nodes = {}
+        self.ring = HashRing()
+        self.matchmaker = Matchmaker()
+        self.next_table_id = 0
+        self.health_check_interval_s = health_check_interval_s
+        self.waiting_futures = {}
+        self.health_task = None
+        super().__init__()
+
+    async def start_workers(
+        self,
+        workers_count: int,
+        host: str = DEFAULT_HOST,
+        bot_workers_count: int = WORKER_BOT_WORKERS_COUNT,
+        ) -> None:
+        self.bot_workers_count = bot_workers_count
+        for i in range(workers_count):
+            node = WorkerNode(f"worker_{i}", host)
+            await node.start_process(bot_workers_count)
+            self.add_node(node)
+        return
+
+    def add_node(self, node: WorkerNode) -> None:
+        """
+        Put a running worker (maybe one this lobby didn't start, on another host) on the ring.
+        """
+        self.nodes[node.name] = node
+        self.ring.add_node(node.name)
+        return
+
+    async def start(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = None,
+        ) -> None:
+        await super().start(host, port)
+        self.health_task = asyncio.get_running_loop().create_task(self.check_health_forever())
+        return
+
+    async def stop(self) -> None:
+        self.health_task.cancel()
+        await super().stop()
+        for node in self.nodes.values():
+            node.stop()
+        return
+
+    async def check_health(self) -> None:
+        """
+        Take workers that don't answer a ping off the ring, restart dead worker processes, and put workers back
+        on the ring once they answer again.
+        """
+        for node in self.nodes.values():
+            try:
+                if node.is_process_dead():
+                    raise Exception("worker process died")
+                await node.request({"op": "ping"})
+                if not self.ring.has_node(node.name):
+                    self.ring.add_node(node.name)
+            except Exception:
+                if self.ring.has_node(node.name):
+                    self.ring.remove_node(node.name)
+                if node.is_process_dead():
+                    await node.start_process(self.bot_workers_count)
+        return
+
+    async def check_health_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_check_interval_s)
+            await self.check_health()
+
+    async def place_table(self, open_request: Dict) -> Dict:
+        """
+        Open a table's game on the worker its table id hashes to, and return where it is.  If that worker fails,
+        it is taken off the ring and the next one is tried.
+        """
+        table_id = self.next_table_id
+        self.next_table_id += 1
+        while True:
+            node = self.nodes[self.ring.get_node(str(table_id))]
+            try:
+                response = await node.request(dict(op="open", **open_request))
+            except Exception:
+                self.ring.remove_node(node.name)
+                continue
+            if not response.get("ok"):
+                return response
+            return {"ok": True, "host": node.host, "port": node.port, "game": response["game"]}
+
+    async def form_tables(self) -> None:
+        for players_count, keys, open_request in self.matchmaker.form_tables():
+            try:
+                response = await self.place_table(open_request)
+            except Exception as e:
+                response = {"ok": False, "error": str(e)}
+            for key in keys:
+                future = self.waiting_futures.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        return
+
+    async def handle_stream(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        ) -> None:
+        await self.serve_lines(reader, writer, lambda request: self.handle_request(reader, request))
+        return
+
+    async def handle_request(
+        self,
+        reader: asyncio.StreamReader,
+        request: Dict,
+        ) -> Dict:
+        """
+        Handle one request of a connection.  A queue request is answered once its table is formed, or None is
+        returned if the client disconnects first.
+        """
+        if request.get("op") == "ping":
+            return {"ok": True, "workers": self.ring.get_nodes(), "queued": self.matchmaker.count_entries()}
+        if request.get("op") != "queue":
+            raise Exception(f"unknown op: {request.get('op')}")
+        key = object()
+        future = asyncio.get_running_loop().create_future()
+        self.matchmaker.add_entry(key, request)
+        self.waiting_futures[key] = future
+        await self.form_tables()
+        # the client isn't meant to send anything while queued, so reading only ends when it disconnects
+        disconnect_task = asyncio.get_running_loop().create_task(reader.read(1))
+        await asyncio.wait((future, disconnect_task), return_when=asyncio.FIRST_COMPLETED)
+        if future.done():
+            disconnect_task.cancel()
+            try:
+                await disconnect_task
+            except asyncio.CancelledError:
+                pass
+            return future.result()
+        self.matchmaker.remove_entry(key)
+        self.waiting_futures.pop(key, None)
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Queue Splendor players and spread their games over workers.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=max(1, multiprocessing.cpu_count() - 1), help="game worker processes")
+    parser.add_argument("--remote", action="append", default=[], help="host:port of another game server to place games on")
+    parser.add_argument("--bot-workers", type=int, default=WORKER_BOT_WORKERS_COUNT, help="bot processes per worker")
+    args = parser.parse_args()
+
+    async def serve() -> None:
+        lobby = Lobby()
+        await lobby.start_workers(args.workers, args.host, args.bot_workers)
+        for address in args.remote:
+            remote_host, remote_port = address.rsplit(":", 1)
+            lobby.add_node(WorkerNode(address, remote_host, int(remote_port)))
+        await lobby.start(args.host, args.port)
+        print(f"lobby on {args.host}:{lobby.get_port()}, workers: {', '.join(lobby.ring.get_nodes())}", flush=True)
+        try:
+            await lobby.serve_forever()
+        finally:
+            await lobby.stop()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""
+memory.py - Memory accounting for a Game: deep byte sizes broken down by structure, and growth per turn.
+
+    python -m splendor.memory --players 2 --policy greedy --top 5
+
+get_game_memory_report() walks the Game's object graph with sys.getsizeof, counting every object once, and
+attributes each byte to the first of these categories that reaches it:
+
+    images              Token.image and Noble.image payloads
+    dev_card_decks      the DevCardDecks of every GameState in the history
+    token_caches        the GameTokenCache of every GameState and the PlayerTokenCache of every PlayerState
+    game_state_history  the rest of the GameStateHistory (also reported per entry)
+    player_histories    the rest of each player's PlayerStateHistory
+    game_record         the Game's GameRecord
+    other               everything else reachable from the Game
+
+Objects shared between history entries (states share a lot of objects that clones don't replace) are counted
+under the first entry that reaches them, so an entry's size is what it adds on top of the earlier ones.
+
+TurnMemoryTracker uses tracemalloc to report how much traced memory each turn added and which source lines
+allocated it.  Since most allocations happen inside deepcopy, it can also diff the Game's report between
+turns, which attributes the growth to the categories above.
+"""
+
+import argparse
+import random
+from splendor.core import (
+    Noble,
+    Token,
+    )
+from splendor.game import (
+    Game,
+    MAX_ROUNDS_HEADLESS,
+    )
+from splendor.policy import (
+    get_policy_by_name,
+    POLICIES_DICT,
+    )
+import sys
+import tracemalloc
+import types
+from typing import Callable, Dict, List, Set, Tuple
+
+MEMORY_CATEGORIES = (
+    "images",
+    "dev_card_decks",
+    "token_caches",
+    "game_state_history",
+    "player_histories",
+    "game_record",
+    "other",
+    )
+
+TRACEMALLOC_FRAMES = 1
+TOP_SITES_COUNT = 5
+
+# shared code and type objects, never counted as part of a Game
+_SKIPPED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+def _iter_referents(obj) -> List:
+    if isinstance(obj, dict):
+        return list(obj.keys()) + list(obj.values())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return list(obj)
+    referents = []
+    obj_dict = getattr(obj, "__dict__", None)
+    if obj_dict is not None:
+        referents.append(obj_dict)
+    for slot in getattr(type(obj), "__slots__", ()):
+        if hasattr(obj, slot):
+            referents.append(getattr(obj, slot))
+    return referents
+
+def deep_sizeof(
+    obj,
+    seen: Set[int] = None,
+    ) -> int:
+    """
+    Return the bytes of obj and everything reachable from it, skipping objects whose id() is already in seen
+    (which is updated).
+
+    >>> deep_sizeof([b"x" * 100, b"x" * 100]) > 200
+    True
+    >>> payload = b"x" * 100
+    >>> seen = set()
+    >>> deep_sizeof(payload, seen) > 100
+    True
+    >>> deep_sizeof([payload], seen) < 100
+    True
+    """
+    if seen is None:
+        seen = set()
+    size = 0
+    stack = [obj]
+    while len(stack) > 0:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, _SKIPPED_TYPES):
+            continue
+        seen.add(id(current))
+        size += sys.getsizeof(current)
+        stack.extend(_iter_referents(current))
+    return size
+
+def _find_instances(obj, classes: Tuple[type, ...]) -> List:
+    """
+    Return every instance of classes reachable from obj.
+    """
+    found = []
+    seen = set()
+    stack = [obj]
+    while len(stack) > 0:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, _SKIPPED_TYPES):
+            continue
+        seen.add(id(current))
+        if isinstance(current, classes):
+            found.append(current)
+        stack.extend(_iter_referents(current))
+    return found
+
+def get_game_memory_report(a_game: Game) -> Dict:
+    """
+    Return the deep byte size of a_game and its breakdown: {"total": int, "categories": {category: bytes},
+    "game_state_history_entries": [bytes, ...], "player_histories": {player name: bytes}}.
+
+    >>> a_game = Game(2)
+    >>> a_game.add_player_by_name("alice")
+    >>> a_game.add_player_by_name("bob")
+    >>> a_game.action_take_two_tokens(a_game.get_current_player(), "green")
+    >>> report = get_game_memory_report(a_game)
+    >>> sum(report["categories"].values()) == report["total"] == deep_sizeof(a_game)
+    True
+    >>> len(report["game_state_history_entries"])
+    2
+    >>> sorted(report["player_histories"].keys())
+    ['alice', 'bob']
+    >>> report["categories"]["dev_card_decks"] > 0
+    True
+    """
+    seen = set()
+    categories = {category: 0 for category in MEMORY_CATEGORIES}
+    game_states = a_game.get_game_state_history().l
+
+    for obj in _find_instances(a_game, (Token, Noble)):
+        categories["images"] += deep_sizeof(obj.image, seen) if obj.image is not None else 0
+
+    for game_state in game_states:
+        for dev_card_deck in game_state.dev_card_decks:
+            categories["dev_card_decks"] += deep_sizeof(dev_card_deck, seen)
+
+    for game_state in game_states:
+        categories["token_caches"] += deep_sizeof(game_state.get_token_cache(), seen)
+    for player in a_game.players:
+        for player_state in player.get_player_state_history().l:
+            categories["token_caches"] += deep_sizeof(player_state.get_token_cache(), seen)
+
+    game_state_history_entries = [deep_sizeof(game_state, seen) for game_state in game_states]
+    categories["game_state_history"] = sum(game_state_history_entries) + deep_sizeof(a_game.get_game_state_history(), seen)
+
+    player_histories = {}
+    for player in a_game.players:
+        player_histories[player.get_name()] = deep_sizeof(player.get_player_state_history(), seen)
+    categories["player_histories"] = sum(player_histories.values())
+
+    categories["game_record"] = deep_sizeof(a_game.get_game_record(), seen)
+    categories["other"] = deep_sizeof(a_game, seen)
+
+    return {
+        "total": sum(categories.values()),
+        "categories": categories,
+        "game_state_history_entries": game_state_history_entries,
+        "player_histories": player_histories,
+    }
+
+
+class TurnMemoryTracker:
+    """
+    Track the traced memory each turn adds.
+
+    The growth in bytes comes from tracemalloc's traced memory counter.  The allocation sites need a snapshot per
+    turn, which gets slow as the heap grows; with top_sites_count=0 they are skipped.
+
+    >>> tracker = TurnMemoryTracker()
+    >>> tracker.start()
+    >>> blocks = []
+    >>> for turn_idx in range(2):
+    ...     blocks.append(bytearray(100000))
+    ...     growth = tracker.record_turn(turn_idx)
+    >>> tracker.stop()
+    >>> [growth["turn"] for growth in tracker.get_turn_growth()]
+    [0, 1]
+    >>> tracker.get_turn_growth()[1]["bytes"] >= 100000
+    True
+    >>> tracker.get_turn_growth()[1]["top_sites"][0][1] >= 100000
+    True
+    """
+
+    top_sites_count: int
+    turn_growth: List[Dict]
+
+    def __init__(self, top_sites_count: int = TOP_SITES_COUNT) -> None:
+        self.top_sites_count = top_sites_count
+        self.turn_growth = []
+        self._traced_bytes = 0
+        self._snapshot = None
+        self._categories = None
+        self._started_tracemalloc = False
+
+    def _take_snapshot(self):
+        if self.top_sites_count <= 0:
+            return None
+        return tracemalloc.take_snapshot()
+
+    def start(self, a_game: Game = None) -> None:
+        """
+        Start tracing (if tracemalloc isn't already), taking the baseline snapshot and, if given, a_game's report.
+        """
+        if a_game is not None:
+            self._categories = get_game_memory_report(a_game)["categories"]
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._started_tracemalloc = True
+        self._snapshot = self._take_snapshot()
+        self._traced_bytes = tracemalloc.get_traced_memory()[0]
+        return
+
+    def _get_top_sites(self, snapshot) -> List[Tuple[str, int]]:
+        stats = [
+            stat for stat in snapshot.compare_to(self._snapshot, "lineno")
+            if stat.size_diff > 0 and stat.traceback[0].filename != tracemalloc.__file__
+            ]
+        stats.sort(key=lambda stat: stat.size_diff, reverse=True)
+        return [
+            (f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", stat.size_diff)
+            for stat in stats[:self.top_sites_count]
+            ]
+
+    def record_turn(
+        self,
+        turn_idx: int,
+        a_game: Game = None,
+        ) -> Dict:
+        """
+        Record and return the growth since start() or the previous record_turn(): {"turn", "bytes", "top_sites"},
+        where top_sites are the (source line, bytes) that grew most.  If a_game is given, also add "categories":
+        the growth of each category of get_game_memory_report(a_game) since the previous report on a_game.
+        """
+        growth = {
+            "turn": turn_idx,
+            "bytes": tracemalloc.get_traced_memory()[0] - self._traced_bytes,
+            "top_sites": [],
+        }
+        snapshot = self._take_snapshot()
+        if snapshot is not None:
+            growth["top_sites"] = self._get_top_sites(snapshot)
+        self._snapshot = None
+        if a_game is not None:
+            categories = get_game_memory_report(a_game)["categories"]
+            if self._categories is not None:
+                growth["categories"] = {
+                    category: size - self._categories[category] for category, size in categories.items()
+                    }
+            self._categories = categories
+        self.turn_growth.append(growth)
+        # the baseline of the next turn is taken last, so the bookkeeping above isn't charged to it
+        self._snapshot = snapshot
+        self._traced_bytes = tracemalloc.get_traced_memory()[0]
+        return growth
+
+    def stop(self) -> None:
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        self._snapshot = None
+        self._categories = None
+        return
+
+    def get_turn_growth(self) -> List[Dict]:
+        return self.turn_growth
+
+    def __repr__(self) -> str:
+        return f"<TurnMemoryTracker: {len(self.turn_growth)} turns>"
+
+
+def play_with_memory_tracking(
+    a_game: Game,
+    policy: Callable,
+    max_rounds: int = MAX_ROUNDS_HEADLESS,
+    top_sites_count: int = TOP_SITES_COUNT,
+    track_categories: bool = True,
+    ) -> List[Dict]:
+    """
+    Play a_game headless with policy (until someone reaches the winning score, the game stalls, or max_rounds),
+    recording the memory growth of every turn (by category too, if track_categories); return the growth records.
+    """
+    tracked_game = a_game if track_categories else None
+    tracker = TurnMemoryTracker(top_sites_count)
+    tracker.start(tracked_game)
+    try:
+        turn_idx = 0
+        while a_game.get_round_number_idx() < max_rounds:
+            current_player = a_game.get_current_player()
+            a_game.play_turn(current_player, interactive=False, policy=policy)
+            a_game.go_to_next_player()
+            tracker.record_turn(turn_idx, tracked_game)
+            turn_idx += 1
+            if a_game.player_has_winning_score(current_player) or a_game.is_stalled():
+                break
+    finally:
+        tracker.stop()
+    return tracker.get_turn_growth()
+
+def print_game_memory_report(
+    report: Dict,
+    out=sys.stdout,
+    ) -> None:
+    print(f"{'category':<20} {'bytes':>12} {'share':>7}", file=out)
+    for category, size in report["categories"].items():
+        share = 100.0 * size / report["total"] if report["total"] > 0 else 0.0
+        print(f"{category:<20} {size:>12} {share:>6.1f}%", file=out)
+    print(f"{'total':<20} {report['total']:>12}", file=out)
+    entries = report["game_state_history_entries"]
+    if len(entries) > 0:
+        print(
+            f"game state history: {len(entries)} entries, first {entries[0]} bytes, "
+            f"mean after first {sum(entries[1:]) / max(len(entries) - 1, 1):.0f} bytes",
+            file=out,
+            )
+    for player_name, size in report["player_histories"].items():
+        print(f"player history {player_name}: {size} bytes", file=out)
+    return
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Report the memory used by a headless Splendor game.")
+    parser.add_argument("--players", type=int, default=2, choices=(2, 3, 4))
+    parser.add_argument("--policy", default="greedy", choices=sorted(POLICIES_DICT.keys()))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--top", type=int, default=TOP_SITES_COUNT, help="allocation sites to show per turn")
+    parser.add_argument("--no-categories", action="store_true", help="don't break each turn's growth down by category")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    a_game = Game(args.players)
+    for i in range(args.players):
+        a_game.add_player_by_name(f"player_{i+1}")
+    turn_growth = play_with_memory_tracking(
+        a_game,
+        get_policy_by_name(args.policy),
+        top_sites_count=args.top,
+        track_categories=not args.no_categories,
+        )
+
+    print(f"{'turn':>5} {'bytes':>10}  growth by category; top allocation sites")
+    for growth in turn_growth:
+        categories = ", ".join(
+            f"{category} {size:+d}" for category, size in growth.get("categories", {}).items() if size != 0
+            )
+        sites = ", ".join(f"{site} {size:+d}" for site, size in growth["top_sites"])
+        print(f"{growth['turn']:>5} {growth['bytes']:>+10d}  {categories}; {sites}")
+    print()
+    print_game_memory_report(get_game_memory_report(a_game))
+    return
+
+if __name__ == "__main__":
+    main()
@@ -7,12 +7,16 @@ from splendor.core import (
     DevCard,
     DevCardCache,
     DevCardReserve,
-    DevCardType,
+    Gem,
     is_joker,
+    is_requirement_met,
+    list_discard_idxs,
+    Noble,
     PlayerTokenCache,
     PLAYER_TOKEN_CACHE_MAX,
     Token,
-    TokenType,
+    TokenCache,
+    TOKEN_GEM_IDX_MAP,
 )
 from enum import Enum
 import json
@@ -24,24 +28,21 @@ from typing import (
     Set,
 )
 
-import logging
-logging.basicConfig(level=logging.INFO)
-
 
 class PlayerState:
     """
     The state of a player at some point during a game.
    
     >>> token_cache = PlayerTokenCache()
-    >>> token_cache.add(Token(TokenType("black")))
-    >>> token_cache.add(Token(TokenType("black")))
-    >>> token_cache.add(Token(TokenType("red")))
+    >>> token_cache.add(Token("black"))
+    >>> token_cache.add(Token("black"))
+    >>> token_cache.add(Token("red"))
     >>> dev_card_cache = DevCardCache()
-    >>> dev_card_cache.add(DevCard(level=1, t=DevCardType("black"), ppoints=2, cost={"blue": 2, "red": 1}))
-    >>> dev_card_cache.add(DevCard(level=2, t=DevCardType("black"), ppoints=0, cost={"blue": 3}))
-    >>> dev_card_cache.add(DevCard(level=1, t=DevCardType("blue"), ppoints=1, cost={"white": 1, "red": 1, "green": 3}))
+    >>> dev_card_cache.add(DevCard(level=1, gem=Gem("black"), ppoints=2, cost={"blue": 2, "red": 1}))
+    >>> dev_card_cache.add(DevCard(level=2, gem=Gem("black"), ppoints=0, cost={"blue": 3}))
+    >>> dev_card_cache.add(DevCard(level=1, gem=Gem("blue"), ppoints=1, cost={"white": 1, "red": 1, "green": 3}))
     >>> dev_card_reserve = DevCardReserve()
-    >>> dev_card_reserve.add(DevCard(level=1, t=DevCardType("red"), ppoints=4, cost={"white": 1, "red": 1, "green": 1}))
+    >>> dev_card_reserve.add(DevCard(level=1, gem=Gem("red"), ppoints=4, cost={"white": 1, "red": 1, "green": 1}))
     >>> a = PlayerState(token_cache, dev_card_cache, dev_card_reserve)
 
     >>> a.calc_score()
@@ -51,21 +52,27 @@ class PlayerState:
     >>> a.calc_score() == b.calc_score()
     True
 
+    >>> c = PlayerState(token_cache, dev_card_cache, dev_card_reserve, [Noble(3, {"black": 2, "blue": 1})])
+    >>> c.calc_score()
+    6
     """
 
     token_cache: PlayerTokenCache
     dev_card_cache: DevCardCache
     dev_card_reserve: DevCardReserve
+    nobles: List[Noble] # nobles that have visited this player
 
     def __init__(
         self,
         token_cache: PlayerTokenCache,
         dev_card_cache: DevCardCache,
         dev_card_reserve: DevCardReserve,
+        nobles: List[Noble] = None,
     ) -> None:
         self.token_cache = token_cache
         self.dev_card_cache = dev_card_cache
         self.dev_card_reserve = dev_card_reserve
+        self.nobles = nobles if nobles is not None else []
 
     def copy(self):
         return deepcopy(self)
@@ -91,8 +98,11 @@ class PlayerState:
         self.dev_card_reserve = new_dev_card_reserve
         return
 
+    def get_nobles(self) -> List[Noble]:
+        return self.nobles
+
     def calc_score(self) -> int:
-        return self.dev_card_cache.calc_ppoints()
+        return self.dev_card_cache.calc_ppoints() + sum(noble.get_ppoints() for noble in self.nobles)
 
     #def is_winning_state(self) -> bool:
     #    return self.calc_score() >= WINNING_SCORE
@@ -100,9 +110,10 @@ class PlayerState:
     def __str__(self) -> str:
         ret = ""
         ret += "Player state:\n"
-        ret += self.token_cache + "\n"
-        ret += self.dev_card_cache + "\n"
-        ret += self.dev_card_reserve + "\n"
+        ret += f"{self.token_cache}\n"
+        ret += f"{self.dev_card_cache}\n"
+        ret += f"{self.dev_card_reserve}\n"
+        ret += f"Nobles: {len(self.nobles)}\n"
         return ret
     
     def __repr__(self) -> str:
@@ -161,30 +172,78 @@ def clone_playerState(
         ret.set_dev_card_reserve(new_dev_card_reserve)
     return ret
 
+# The rule effects of each action on a PlayerState, applied in place and without validation.  Player.action_*()
+# apply them to a copy of the current state; Game and splendor.replay apply them through splendor.game's
+# *_in_states() functions.
+
+def take_tokens_in_player_state(
+    player_state: PlayerState,
+    token_type_str_add_list: List[str],
+    discard_idx: int = None,
+    ) -> TokenCache:
+    """
+    Add the given tokens to player_state, then discard discard_idx (if given).  Return the tokens discarded.
+    """
+    token_cache = player_state.get_token_cache()
+    for token_type_str_to_add in token_type_str_add_list:
+        token_cache.add(Token(token_type_str_to_add))
+    if discard_idx is not None:
+        return token_cache.discard(discard_idx)
+    return TokenCache()
+
+def reserve_dev_card_in_player_state(
+    player_state: PlayerState,
+    dev_card: DevCard,
+    gold: bool,
+    discard_idx: int = None,
+    ) -> TokenCache:
+    """
+    Add dev_card to player_state's reserve, and a yellow token if gold, then discard as in
+    take_tokens_in_player_state().  Return the tokens discarded.
+    """
+    player_state.get_dev_card_reserve().add(dev_card)
+    return take_tokens_in_player_state(player_state, ["yellow"] if gold else [], discard_idx)
+
+def purchase_dev_card_in_player_state(
+    player_state: PlayerState,
+    dev_card: DevCard,
+    ) -> TokenCache:
+    """
+    Spend player_state's tokens on dev_card (after its bonuses, and using jokers if needed), add it to the dev
+    card cache, and remove it from the reserve if it's there.  Return the tokens spent.
+    """
+    dev_card_cache = player_state.get_dev_card_cache()
+    tokens_spent = player_state.get_token_cache().purchase_dev_card(dev_card, dev_card_cache)
+    dev_card_cache.add(dev_card)
+    dev_card_reserve = player_state.get_dev_card_reserve()
+    if dev_card_reserve.find_card(dev_card) != -1:
+        dev_card_reserve.remove(dev_card)
+    return tokens_spent
+
 
 class PlayerStateHistory:
     """
     The ordered list of a player's states.  PlayerState at index 0 is the player's first PlayerState, and subsequent indices are later states.
 
     >>> token_cache = PlayerTokenCache()
-    >>> token_cache.add(Token(TokenType("black")))
-    >>> token_cache.add(Token(TokenType("black")))
-    >>> token_cache.add(Token(TokenType("red")))
+    >>> token_cache.add(Token("black"))
+    >>> token_cache.add(Token("black"))
+    >>> token_cache.add(Token("red"))
     >>> dev_card_cache = DevCardCache()
-    >>> dev_card_cache.add(DevCard(level=1, t=DevCardType("black"), ppoints=2, cost={"blue": 2, "red": 1}))
-    >>> dev_card_cache.add(DevCard(level=2, t=DevCardType("black"), ppoints=0, cost={"blue": 3}))
-    >>> dev_card_cache.add(DevCard(level=1, t=DevCardType("blue"), ppoints=1, cost={"white": 1, "red": 1, "green": 3}))
+    >>> dev_card_cache.add(DevCard(level=1, gem=Gem("black"), ppoints=2, cost={"blue": 2, "red": 1}))
+    >>> dev_card_cache.add(DevCard(level=2, gem=Gem("black"), ppoints=0, cost={"blue": 3}))
+    >>> dev_card_cache.add(DevCard(level=1, gem=Gem("blue"), ppoints=1, cost={"white": 1, "red": 1, "green": 3}))
     >>> dev_card_reserve = DevCardReserve()
     >>> dev_card_reserve.is_max()
     False
 
-    >>> dev_card_reserve.add(DevCard(level=1, t=DevCardType("red"), ppoints=4, cost={"white": 1, "red": 1, "green": 3}))
+    >>> dev_card_reserve.add(DevCard(level=1, gem=Gem("red"), ppoints=4, cost={"white": 1, "red": 1, "green": 3}))
     >>> state_1 = PlayerState(token_cache, dev_card_cache, dev_card_reserve)
 
-    >>> token_cache.add(Token(TokenType("blue")))
+    >>> token_cache.add(Token("blue"))
     >>> state_2 = PlayerState(token_cache, dev_card_cache, dev_card_reserve)
     
-    >>> dev_card_reserve.add(DevCard(level=2, t=DevCardType("red"), ppoints=5, cost={"white": 3, "red": 4, "green": 3}))
+    >>> dev_card_reserve.add(DevCard(level=2, gem=Gem("red"), ppoints=5, cost={"white": 3, "red": 4, "green": 3}))
     >>> state_3 = PlayerState(token_cache, dev_card_cache, dev_card_reserve)
 
     >>> psh = PlayerStateHistory()
@@ -198,7 +257,7 @@ class PlayerStateHistory:
     >>> psh.get_current_state_no()
     3
     >>> psh.get_current_state() #doctest: +ELLIPSIS
-    <player.PlayerState object at ...
+    <PlayerState>
 
     >>> psh.revert(1)
     >>> psh.get_current_state_no()
@@ -250,11 +309,11 @@ class Player:
     >>> token_cache.add(Token("black"))
     >>> token_cache.add(Token("red"))
     >>> dev_card_cache = DevCardCache()
-    >>> dev_card_cache.add(DevCard(level=1, t=DevCardType("black"), ppoints=2, cost={"blue": 2, "red": 1}))
-    >>> dev_card_cache.add(DevCard(level=2, t=DevCardType("black"), ppoints=0, cost={"blue": 3}))
-    >>> dev_card_cache.add(DevCard(level=1, t=DevCardType("blue"), ppoints=1, cost={"white": 1, "red": 1, "green": 3}))
+    >>> dev_card_cache.add(DevCard(level=1, gem=Gem("black"), ppoints=2, cost={"blue": 2, "red": 1}))
+    >>> dev_card_cache.add(DevCard(level=2, gem=Gem("black"), ppoints=0, cost={"blue": 3}))
+    >>> dev_card_cache.add(DevCard(level=1, gem=Gem("blue"), ppoints=1, cost={"white": 1, "red": 1, "green": 3}))
     >>> dev_card_reserve = DevCardReserve()
-    >>> dev_card_reserve.add(DevCard(level=1, t=DevCardType("red"), ppoints=4, cost={"white": 1, "red": 1, "green": 2}))
+    >>> dev_card_reserve.add(DevCard(level=1, gem=Gem("red"), ppoints=4, cost={"white": 1, "red": 1, "green": 2}))
     >>> state_1 = PlayerState(token_cache, dev_card_cache, dev_card_reserve)
     >>> player_a.append_player_state(state_1)
 
@@ -263,15 +322,16 @@ class Player:
 
     >>> token_cache.add(Token("blue"))
     >>> state_2 = PlayerState(token_cache, dev_card_cache, dev_card_reserve)
-    >>> dev_card_reserve.add(DevCard(level=2, t=DevCardType("red"), ppoints=5, cost={"white": 3, "red": 4, "green": 3}))
+    >>> dev_card_reserve.add(DevCard(level=2, gem=Gem("red"), ppoints=5, cost={"white": 3, "red": 4, "green": 3}))
     >>> state_3 = PlayerState(token_cache, dev_card_cache, dev_card_reserve)
     >>> player_a.append_player_state(state_2)
     >>> player_a.append_player_state(state_3)
 
-    >>> player_a.get_current_token_cache().size()
+    >>> player_a.get_current_token_cache().count()
     4
-    >>> player_a.action_take_three_tokens("black", "blue", "green")
-    >>> player_a.get_current_token_cache().size()
+    >>> player_a.action_take_three_tokens("black", "blue", "green").count()
+    0
+    >>> player_a.get_current_token_cache().count()
     7
     
     >>> player_a.action_take_three_tokens("black", "black", "green") #doctest: +ELLIPSIS
@@ -281,44 +341,81 @@ class Player:
     Traceback (most recent call last):
     Exception...
 
-    >>> player_a.get_current_token_cache().size()
+    >>> player_a.get_current_token_cache().count()
     7
-    >>> player_a.action_take_two_tokens("red")
-    >>> player_a.get_current_token_cache().size()
+    >>> player_a.action_take_two_tokens("red").count()
+    0
+    >>> player_a.get_current_token_cache().count()
     9
     
     >>> player_a.action_take_two_tokens("yellow") #doctest: +ELLIPSIS
     Traceback (most recent call last):
     Exception...
 
-    >>> player_a.get_current_dev_card_reserve().size()
+    >>> player_a.get_current_dev_card_reserve().count()
     2
-    >>> player_a.get_current_token_cache().size()
+    >>> player_a.get_current_token_cache().count()
     9
-    >>> player_a.action_reserve_dev_card(DevCard(level=2, t=DevCardType("blue"), ppoints=0, cost={"white": 1, "red": 1, "green": 2}))
-    >>> player_a.get_current_dev_card_reserve().size()
+    >>> player_a.action_reserve_dev_card(DevCard(level=2, gem=Gem("blue"), ppoints=0, cost={"white": 1, "red": 1, "green": 2})).count()
+    0
+    >>> player_a.get_current_dev_card_reserve().count()
     3
-    >>> player_a.get_current_token_cache().size()
+    >>> player_a.get_current_token_cache().count()
     10
     
-    >>> player_a.action_reserve_dev_card(DevCard(level=1, t=DevCardType("red"), ppoints=2, cost={"white": 1, "red": 1, "green": 2})) #doctest: +ELLIPSIS
+    >>> player_a.action_reserve_dev_card(DevCard(level=1, gem=Gem("red"), ppoints=2, cost={"white": 1, "red": 1, "green": 2})) #doctest: +ELLIPSIS
     Traceback (most recent call last):
     Exception...
     
-    >>> player_a.get_current_dev_card_cache().size()
+    >>> player_a.get_current_dev_card_cache().count()
     3
-    >>> player_a.get_current_token_cache().size()
+    >>> player_a.get_current_token_cache().count()
     10
-    >>> player_a.action_purchase_dev_card(DevCard(level=1, t=DevCardType("blue"), ppoints=0, cost={"black": 2}))
-    >>> player_a.get_current_dev_card_cache().size()
+    >>> player_a.action_purchase_dev_card(DevCard(level=1, gem=Gem("blue"), ppoints=0, cost={"black": 2, "red": 2})).count()
+    2
+    >>> player_a.get_current_dev_card_cache().count()
     4
-    >>> player_a.get_current_token_cache().size()
+    >>> player_a.get_current_token_cache().count()
     8
+
+    >>> dev_card_reserved = player_a.get_current_dev_card_reserve().get_list()[2]
+    >>> player_a.can_purchase_dev_card(dev_card_reserved)
+    False
+    >>> player_a.action_take_two_tokens("green").count()
+    0
+    >>> player_a.can_purchase_dev_card(dev_card_reserved)
+    True
+    >>> player_a.action_purchase_dev_card(dev_card_reserved).count()
+    4
+    >>> player_a.get_current_dev_card_reserve().count()
+    2
     
-    >>> player_a.action_purchase_dev_card(DevCard(level=3, t=DevCardType("red"), ppoints=5, cost={"white": 4, "red": 4, "green": 4})) #doctest: +ELLIPSIS
+    >>> player_a.action_purchase_dev_card(DevCard(level=3, gem=Gem("red"), ppoints=5, cost={"white": 4, "red": 4, "green": 4})) #doctest: +ELLIPSIS
     Traceback (most recent call last):
     Exception...
     
+    >>> player_a.can_attract_noble(Noble(3, {"black": 2, "blue": 4}))
+    False
+    >>> player_a.action_visit_noble(Noble(3, {"black": 2, "blue": 3}))
+    >>> len(player_a.get_current_nobles()), player_a.calc_score()
+    (1, 6)
+    >>> player_a.action_visit_noble(Noble(3, {"black": 2, "red": 1})) #doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    Exception...
+
+    >>> player_a.get_current_token_cache().count()
+    6
+    >>> player_a.action_take_three_tokens("black", "red", "white").count()
+    0
+    >>> player_a.action_take_two_tokens("white") #doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    Exception...
+    >>> discard_idx = player_a.list_discard_idxs_after_take(["white", "white"])[0]
+    >>> player_a.action_take_two_tokens("white", discard_idx).count()
+    1
+    >>> player_a.get_current_token_cache().count()
+    10
+
     >>> player_b = Player()
     >>> player_b.get_name() #doctest: +ELLIPSIS
     'PLAYER_...'
@@ -339,6 +436,9 @@ class Player:
             )
             self.name = "PLAYER_" + suffix
         self.player_state_history = PlayerStateHistory()
+        self.player_state_history.append(
+            PlayerState(PlayerTokenCache(), DevCardCache(), DevCardReserve())
+        )
 
     def get_name(self) -> str:
         return self.name
@@ -382,39 +482,60 @@ class Player:
             raise Exception("number of tokens to add cannot be negative")
         return self.get_current_token_cache().count() + number_of_tokens_to_add <= PLAYER_TOKEN_CACHE_MAX
 
-    def action_take_tokens(self, token_type_str_add_list) -> None:
+    def list_discard_idxs_after_take(self, token_type_str_add_list) -> List[int]:
         """
-        Complete the player action of taking tokens.  
-
-        This function does *not* make sure that the game's gem cache actually
-        has the desired gems, though it will make sure that the player will not
-        exceed its maximum Cache size.
+        Return the discards (see list_discard_idxs()) the player could make after taking the given tokens; an empty
+        list means the player will not exceed its maximum Cache size, so it doesn't discard.
         """
-        token_cache = self.get_current_token_cache()
+        token_counts = list(self.get_current_token_cache().get_counts())
+        for token_type_str_to_add in token_type_str_add_list:
+            token_counts[TOKEN_GEM_IDX_MAP[token_type_str_to_add]] += 1
+        return list_discard_idxs(tuple(token_counts))
 
-        # if this player's TokenCache will overflow, raise Exception.
-        if not self.can_fit_tokens(len(token_type_str_add_list)):
+    def check_discard_after_take(self, token_type_str_add_list, discard_idx: int) -> None:
+        """
+        Raise exception if discard_idx (None for no discard) is not a discard the player must/can make after
+        taking the given tokens.
+        """
+        discard_idxs = self.list_discard_idxs_after_take(token_type_str_add_list)
+        if len(discard_idxs) == 0:
+            if discard_idx is not None:
+                raise Exception(f"cannot discard tokens: player's token cache will not exceed {PLAYER_TOKEN_CACHE_MAX}")
+        elif discard_idx is None:
             raise Exception(
-                f"not enough space in player's token cache to add {len(token_type_str_add_list)} tokens"
+                f"not enough space in player's token cache to add {len(token_type_str_add_list)} tokens without discarding"
             )
+        elif discard_idx not in discard_idxs:
+            raise Exception(f"not a discard down to {PLAYER_TOKEN_CACHE_MAX} tokens")
+        return
 
-        # Create updated state including the updated token cache
-        for token_type_str_to_add in token_type_str_add_list:
-            token_cache.add(Token(token_type_str_to_add))
-        new_state = clone_playerState_new_token_cache(
-            self.get_current_player_state(), token_cache,
-        )
+    def action_take_tokens(self, token_type_str_add_list, discard_idx: int = None) -> TokenCache:
+        """
+        Complete the player action of taking tokens.  
+
+        This function does *not* make sure that the game's gem cache actually
+        has the desired gems.  If the player would exceed its maximum Cache size,
+        discard_idx (see list_discard_idxs_after_take()) gives the tokens it
+        discards back down to the maximum.
+
+        Return the tokens discarded, so that the caller can return them to the game.
+        """
+        self.check_discard_after_take(token_type_str_add_list, discard_idx)
+
+        new_state = self.get_current_player_state().copy()
+        tokens_discarded = take_tokens_in_player_state(new_state, token_type_str_add_list, discard_idx)
         self.append_player_state(new_state)
-        return
+        return tokens_discarded
 
     def action_take_three_tokens(
             self, 
             token_type_str_1: str, 
             token_type_str_2: str, 
             token_type_str_3: str,
-            ) -> None:
+            discard_idx: int = None,
+            ) -> TokenCache:
         """
-        Complete the player action of taking three tokens.
+        Complete the player action of taking three tokens, then discarding (see action_take_tokens()).
 
         This function makes sure that the tokens are all of different type, and that none are yellow (jokers).
         """
@@ -427,26 +548,36 @@ class Player:
         if is_joker(token_type_str_1) or is_joker(token_type_str_2) or is_joker(token_type_str_3):
             raise Exception("action not allowed: chosen tokens must not be jokers")
 
-        return self.action_take_tokens([token_type_str_1, token_type_str_2, token_type_str_3])
+        return self.action_take_tokens([token_type_str_1, token_type_str_2, token_type_str_3], discard_idx)
 
     def action_take_two_tokens(
             self, 
             token_type_str: str, 
-            ) -> None:
+            discard_idx: int = None,
+            ) -> TokenCache:
         """
-        Complete the player action of taking two tokens.
+        Complete the player action of taking two tokens, then discarding (see action_take_tokens()).
         
         This function makes sure that none are yellow (jokers).
         """
         if is_joker(token_type_str):
             raise Exception("action not allowed: chosen tokens must not be jokers")
-        return self.action_take_tokens([token_type_str, token_type_str])
+        return self.action_take_tokens([token_type_str, token_type_str], discard_idx)
 
-    def action_reserve_dev_card(self, dev_card_to_add: DevCard) -> None:
+    def action_reserve_dev_card(
+            self,
+            dev_card_to_add: DevCard,
+            discard_idx: int = None,
+            gold: bool = True,
+            ) -> TokenCache:
         """
-        Complete the player action of reserving a development card.
+        Complete the player action of reserving a development card, and taking a yellow token if gold is True
+        (the game may have none left).
+
+        This functions makes sure that the player has ample room in his/her reserve to fit the card.  If the
+        yellow token takes the player over its maximum Cache size, discard_idx gives the tokens it discards.
 
-        This functions makes sure that the player has ample room is his/her caches to fit the card and yellow token.
+        Return the tokens discarded, so that the caller can return them to the game.
         """
         # if this player's DevCardReserve will overflow, raise Exception.
         dev_card_reserve = self.get_current_dev_card_reserve()
@@ -455,51 +586,66 @@ class Player:
                 f"not enough space in player's dev card reserve to add a card"
             )
 
-        # if this player's token cache will overflow, raise an exception.
-        # TODO: handle this better.
-        token_cache = self.get_current_token_cache()
-        if token_cache.count_until_max() < 1:
-            raise Exception(f"not enough space in this player's token cache to add a token")
-
-        # Create updated state including the updated token cache
-        dev_card_reserve.add(dev_card_to_add)
-        token_cache.add(Token("yellow"))
-        new_state = clone_playerState(
-            self.get_current_player_state(), 
-            new_dev_card_reserve=dev_card_reserve,
-            new_token_cache=token_cache,
-        )
+        self.check_discard_after_take(["yellow"] if gold else [], discard_idx)
+
+        new_state = self.get_current_player_state().copy()
+        tokens_discarded = reserve_dev_card_in_player_state(new_state, dev_card_to_add, gold, discard_idx)
         self.append_player_state(new_state)
-        return
+        return tokens_discarded
 
-    def action_purchase_dev_card(self, dev_card_to_add) -> None:
+    def can_purchase_dev_card(self, dev_card: DevCard) -> bool:
+        """
+        Return True if the player's tokens, after the bonuses of the player's dev cards, cover dev_card's cost.
+        """
+        return self.get_current_token_cache().can_purchase_dev_card(dev_card, self.get_current_dev_card_cache())
+
+    def action_purchase_dev_card(self, dev_card_to_add) -> PlayerTokenCache:
         """
         Complete the player action to purchase a development card, adding it to the player's cache.
         
         This function makes sure that the player has the funds (tokens) available to purchase the card, removes them if so, or raises an Exception if not.
-        """
-        dev_card_cache = self.get_current_dev_card_cache()
-        token_cache = self.get_current_token_cache()
+        The card's cost is discounted by the bonuses of the player's dev cards.  If the card was in the player's reserve, it is removed from there.
 
-        if not token_cache.can_purchase_dev_card(dev_card_to_add):
+        Return the tokens spent, so that the caller can return them to the game.
+        """
+        if not self.can_purchase_dev_card(dev_card_to_add):
             raise Exception(f"cannot purchase dev card: insufficient tokens")
 
-        # Create updated state including the updated token cache and dev card cache
-        dev_card_cache.add(dev_card_to_add)
-        token_cache.purchase_dev_card(dev_card_to_add)
-        new_state = clone_playerState(
-            self.get_current_player_state(),
-            new_token_cache=token_cache,
-            new_dev_card_cache=dev_card_cache,
-        )
+        new_state = self.get_current_player_state().copy()
+        tokens_spent = purchase_dev_card_in_player_state(new_state, dev_card_to_add)
+        self.append_player_state(new_state)
+        return tokens_spent
+
+    def get_current_nobles(self) -> List[Noble]:
+        return self.get_current_player_state().get_nobles()
+
+    def can_attract_noble(self, noble: Noble) -> bool:
+        """
+        Return True if the bonuses of the player's dev cards meet noble's requirement.
+        """
+        return is_requirement_met(
+            self.get_current_dev_card_cache().get_bonuses_packed(),
+            noble.get_requirement_packed(),
+            )
+
+    def action_visit_noble(self, noble: Noble) -> None:
+        """
+        Complete a noble's visit to the player, adding it to the player's nobles.
+
+        This function makes sure that the player's bonuses meet the noble's requirement.
+        """
+        if not self.can_attract_noble(noble):
+            raise Exception(f"noble cannot visit: insufficient bonuses")
+        new_state = self.get_current_player_state().copy()
+        new_state.get_nobles().append(noble)
         self.append_player_state(new_state)
         return
 
-        def __str__(self):
-            ret = ""
-            ret += f"Player: {self.get_name()}"
-            ret += "\n"
-            ret += "State: "
-            ret += "\n"
-            ret += f"{self.get_current_player_state()}"
-            return ret
\ No newline at end of file
+    def __str__(self):
+        ret = ""
+        ret += f"Player: {self.get_name()}"
+        ret += "\n"
+        ret += "State: "
+        ret += "\n"
+        ret += f"{self.get_current_player_state()}"
+        return ret
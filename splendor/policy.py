@@ -0,0 +1,60 @@
+"""
+policy.py - Simple policies for headless play.
+
+A policy is a function policy(game, player) that returns one of game.list_legal_actions(player).
+"""
+
+import random
+from splendor.game_setup import (
+    get_dev_card_by_id,
+    )
+from splendor.record import (
+    ACTION_PURCHASE_DEV_CARD,
+    ACTION_RESERVE_DEV_CARD,
+    ACTION_RESERVE_HIDDEN_DEV_CARD,
+    ACTION_TAKE_THREE_TOKENS,
+    ACTION_TAKE_TWO_TOKENS,
+    )
+from typing import Tuple
+
+def policy_random(game, player) -> Tuple[int, int, int, int, int, int]:
+    """
+    Choose uniformly among the legal actions.
+    """
+    return random.choice(game.list_legal_actions(player))
+
+def policy_greedy(game, player) -> Tuple[int, int, int, int, int, int]:
+    """
+    Purchase the card worth the most prestige points if any can be purchased; otherwise take tokens, preferring
+    three over two; otherwise reserve, preferring a face-up card; otherwise pass.  Ties are broken randomly.
+    """
+    legal_actions = game.list_legal_actions(player)
+    purchases = [action for action in legal_actions if action[0] == ACTION_PURCHASE_DEV_CARD]
+    if len(purchases) > 0:
+        best_ppoints = max(get_dev_card_by_id(action[2]).get_ppoints() for action in purchases)
+        return random.choice([
+            action for action in purchases
+            if get_dev_card_by_id(action[2]).get_ppoints() == best_ppoints
+            ])
+    for kind in (ACTION_TAKE_THREE_TOKENS, ACTION_TAKE_TWO_TOKENS, ACTION_RESERVE_DEV_CARD, ACTION_RESERVE_HIDDEN_DEV_CARD):
+        actions_of_kind = [action for action in legal_actions if action[0] == kind]
+        if len(actions_of_kind) > 0:
+            return random.choice(actions_of_kind)
+    return legal_actions[0]
+
+POLICIES_DICT = {
+    "random": policy_random,
+    "greedy": policy_greedy,
+}
+
+def get_policy_by_name(name: str):
+    """
+    >>> get_policy_by_name("greedy") == policy_greedy
+    True
+    >>> get_policy_by_name("foo") #doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    Exception: ...
+    """
+    if name not in POLICIES_DICT:
+        raise Exception(f"no such policy: {name} (choose from {', '.join(POLICIES_DICT.keys())})")
+    return POLICIES_DICT[name]
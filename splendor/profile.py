@@ -0,0 +1,400 @@
+"""
+profile.py - Profile a headless simulation workload, with cProfile or with a sampling profiler.
+
+    python -m splendor.profile --games 20 --players 2 --policy greedy
+    python -m splendor.profile --profiler sample --interval 0.0005 --collapsed greedy.collapsed
+
+Prints a hotspot report (functions sorted by self or cumulative time) and the self time rolled up per splendor
+module (core, game, player, game_setup), and writes a collapsed-stack file ("frame;frame;frame weight" lines)
+that flamegraph.pl or speedscope can render.
+
+With the sampling profiler, stacks and times come straight from the samples (weights are sample counts).
+cProfile records only caller/callee edges, so its collapsed stacks are estimated by splitting each function's
+self time over its callers in proportion to their cumulative time (weights are microseconds).
+"""
+
+import argparse
+import cProfile
+import os
+import pstats
+import random
+from splendor.game import (
+    play_runner_headless,
+    )
+from splendor.policy import (
+    get_policy_by_name,
+    POLICIES_DICT,
+    )
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+PROFILER_CPROFILE = "cprofile"
+PROFILER_SAMPLE = "sample"
+PROFILERS = (PROFILER_CPROFILE, PROFILER_SAMPLE)
+
+SAMPLE_INTERVAL_S = 0.001
+COLLAPSED_MAX_DEPTH = 64
+COLLAPSED_MIN_WEIGHT_S = 1e-6
+
+ROLLUP_MODULES = ("core", "game", "player", "game_setup")
+ROLLUP_SPLENDOR_OTHER = "splendor (other)"
+ROLLUP_OTHER = "other"
+
+SORT_SELF = "self"
+SORT_CUM = "cum"
+
+SPLENDOR_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# (filename, first line number, function name), as in pstats
+FuncKey = Tuple[str, int, str]
+
+def get_rollup_module(filename: str) -> str:
+    """
+    Return the rollup bucket of the module defined in filename.
+
+    >>> get_rollup_module(os.path.join(SPLENDOR_DIR, "game_setup.py"))
+    'game_setup'
+    >>> get_rollup_module(os.path.join(SPLENDOR_DIR, "policy.py"))
+    'splendor (other)'
+    >>> get_rollup_module("~")
+    'other'
+    """
+    if os.path.dirname(os.path.abspath(filename)) != SPLENDOR_DIR:
+        return ROLLUP_OTHER
+    module_name = os.path.splitext(os.path.basename(filename))[0]
+    if module_name in ROLLUP_MODULES:
+        return module_name
+    return ROLLUP_SPLENDOR_OTHER
+
+def get_frame_label(func_key: FuncKey) -> str:
+    """
+    Return a short label for a function: "splendor/<module>.py:<name>" inside the package, else "<file>:<name>".
+
+    >>> get_frame_label((os.path.join(SPLENDOR_DIR, "core.py"), 12, "add"))
+    'splendor/core.py:add'
+    >>> get_frame_label(("~", 0, "<built-in method builtins.len>"))
+    '<built-in method builtins.len>'
+    """
+    filename, lineno, func_name = func_key
+    if filename == "~":
+        return func_name
+    if os.path.dirname(os.path.abspath(filename)) == SPLENDOR_DIR:
+        return f"splendor/{os.path.basename(filename)}:{func_name}"
+    return f"{os.path.basename(filename)}:{func_name}"
+
+
+class ProfileResult:
+    """
+    What a profiler run measured: per-function calls, self seconds and cumulative seconds, plus collapsed stacks
+    (label;label;label -> weight, in weight_unit).  calls is None for the sampling profiler.
+    """
+
+    functions: Dict[FuncKey, List]
+    stacks: Dict[str, float]
+    weight_unit: str
+    total_s: float
+
+    def __init__(
+        self,
+        functions: Dict[FuncKey, List],
+        stacks: Dict[str, float],
+        weight_unit: str,
+        total_s: float,
+        ) -> None:
+        self.functions = functions
+        self.stacks = stacks
+        self.weight_unit = weight_unit
+        self.total_s = total_s
+
+    def get_hotspots(
+        self,
+        top: int = 25,
+        sort: str = SORT_SELF,
+        ) -> List[Tuple[FuncKey, int, float, float]]:
+        """
+        Return the top (func_key, calls, self_s, cum_s) rows, sorted by self or cumulative time.
+        """
+        sort_idx = 1 if sort == SORT_SELF else 2
+        rows = sorted(self.functions.items(), key=lambda item: item[1][sort_idx], reverse=True)
+        return [(func_key, values[0], values[1], values[2]) for func_key, values in rows[:top]]
+
+    def get_module_rollups(self) -> Dict[str, List]:
+        """
+        Return rollup module -> [calls, self_s], over ROLLUP_MODULES and the two catch-all buckets.
+        """
+        rollups = {module_name: [0, 0.0] for module_name in ROLLUP_MODULES + (ROLLUP_SPLENDOR_OTHER, ROLLUP_OTHER)}
+        for func_key, (calls, self_s, cum_s) in self.functions.items():
+            rollup = rollups[get_rollup_module(func_key[0])]
+            rollup[0] += calls or 0
+            rollup[1] += self_s
+        return rollups
+
+    def write_collapsed(self, path: str) -> None:
+        with open(path, "w") as f:
+            for stack, weight in sorted(self.stacks.items()):
+                if weight >= 1:
+                    f.write(f"{stack} {int(weight)}\n")
+        return
+
+    def __repr__(self) -> str:
+        return f"<ProfileResult: {len(self.functions)} functions, {len(self.stacks)} stacks>"
+
+
+class SamplingProfiler:
+    """
+    Sample the call stack of the thread that calls start() from a background thread, every interval_s.
+
+    While sampling, the interpreter's thread switch interval is lowered to interval_s, or the sampling thread
+    would only get the GIL every 5ms.  Times are the samples' share of the wall time between start() and stop().
+
+    >>> profiler = SamplingProfiler(interval_s=0.001)
+    >>> profiler.start()
+    >>> _busy_loop(0.05)
+    >>> profiler.stop()
+    >>> profiler.samples_count > 0
+    True
+    >>> any("_busy_loop" in stack for stack in profiler.get_result().stacks)
+    True
+    """
+
+    interval_s: float
+    samples_count: int
+    stacks: Dict[Tuple[FuncKey, ...], int]
+    self_counts: Dict[FuncKey, int]
+    cum_counts: Dict[FuncKey, int]
+    elapsed_s: float
+
+    def __init__(self, interval_s: float = SAMPLE_INTERVAL_S) -> None:
+        self.interval_s = interval_s
+        self.samples_count = 0
+        self.stacks = {}
+        self.self_counts = {}
+        self.cum_counts = {}
+        self.elapsed_s = 0.0
+        self._target_thread_id = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._switch_interval_s = None
+        self._t_start = None
+
+    def start(self) -> None:
+        self._target_thread_id = threading.get_ident()
+        self._switch_interval_s = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval_s, self.interval_s))
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._t_start = time.perf_counter()
+        self._thread.start()
+        return
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._thread.join()
+        self.elapsed_s += time.perf_counter() - self._t_start
+        sys.setswitchinterval(self._switch_interval_s)
+        return
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval_s):
+            frame = sys._current_frames().get(self._target_thread_id)
+            if frame is None:
+                continue
+            self._record(frame)
+        return
+
+    def _record(self, frame) -> None:
+        func_keys = []
+        while frame is not None:
+            code = frame.f_code
+            func_keys.append((code.co_filename, code.co_firstlineno, code.co_name))
+            frame = frame.f_back
+        stack = tuple(reversed(func_keys))
+        self.stacks[stack] = self.stacks.get(stack, 0) + 1
+        leaf = func_keys[0]
+        self.self_counts[leaf] = self.self_counts.get(leaf, 0) + 1
+        for func_key in set(func_keys):
+            self.cum_counts[func_key] = self.cum_counts.get(func_key, 0) + 1
+        self.samples_count += 1
+        return
+
+    def get_result(self) -> ProfileResult:
+        sample_s = self.elapsed_s / self.samples_count if self.samples_count > 0 else 0.0
+        functions = {
+            func_key: [None, self.self_counts.get(func_key, 0) * sample_s, cum_count * sample_s]
+            for func_key, cum_count in self.cum_counts.items()
+            }
+        labels = {}
+        stacks = {}
+        for stack, count in self.stacks.items():
+            for func_key in stack:
+                if func_key not in labels:
+                    labels[func_key] = get_frame_label(func_key)
+            stack_label = ";".join(labels[func_key] for func_key in stack)
+            stacks[stack_label] = stacks.get(stack_label, 0) + count
+        return ProfileResult(functions, stacks, "samples", self.elapsed_s)
+
+    def __repr__(self) -> str:
+        return f"<SamplingProfiler: {self.samples_count} samples>"
+
+
+def _busy_loop(seconds: float) -> None:
+    t_end = time.perf_counter() + seconds
+    while time.perf_counter() < t_end:
+        pass
+    return
+
+def _collapse_caller_paths(
+    stats: Dict,
+    func_key: FuncKey,
+    path: List[FuncKey],
+    weight_s: float,
+    stacks: Dict[str, float],
+    ) -> None:
+    """
+    Split weight_s over the callers of path[0] (in proportion to their cumulative time) until reaching roots,
+    recursions, or COLLAPSED_MAX_DEPTH, adding the stacks found (weights in microseconds).
+    """
+    callers = stats[func_key][4] if func_key in stats else {}
+    callers = {caller: edge for caller, edge in callers.items() if caller not in path}
+    if len(callers) == 0 or len(path) >= COLLAPSED_MAX_DEPTH or weight_s < COLLAPSED_MIN_WEIGHT_S:
+        stack = ";".join(get_frame_label(key) for key in path)
+        stacks[stack] = stacks.get(stack, 0.0) + weight_s * 1e6
+        return
+    edge_total_s = sum(edge[3] for edge in callers.values())
+    edge_calls_total = sum(edge[1] for edge in callers.values())
+    for caller, edge in callers.items():
+        if edge_total_s > 0:
+            share = edge[3] / edge_total_s
+        else:
+            share = edge[1] / edge_calls_total if edge_calls_total > 0 else 1.0 / len(callers)
+        _collapse_caller_paths(stats, caller, [caller] + path, weight_s * share, stacks)
+    return
+
+def get_cprofile_result(profiler: cProfile.Profile) -> ProfileResult:
+    """
+    Convert a finished cProfile run to a ProfileResult, estimating its collapsed stacks.
+
+    >>> profiler = cProfile.Profile()
+    >>> profiler.runcall(_busy_loop, 0.01)
+    >>> result = get_cprofile_result(profiler)
+    >>> result.get_hotspots(top=1, sort=SORT_CUM)[0][0][2]
+    '_busy_loop'
+    >>> any(stack.endswith("_busy_loop") for stack in result.stacks)
+    True
+    """
+    stats = pstats.Stats(profiler).stats
+    functions = {}
+    stacks = {}
+    total_s = 0.0
+    for func_key, (cc, nc, tt, ct, callers) in stats.items():
+        functions[func_key] = [nc, tt, ct]
+        total_s += tt
+        if tt > 0:
+            _collapse_caller_paths(stats, func_key, [func_key], tt, stacks)
+    return ProfileResult(functions, stacks, "us", total_s)
+
+def run_workload(
+    games_count: int,
+    players_count: int,
+    policy_name: str,
+    seed: int = None,
+    ) -> None:
+    """
+    Play games_count headless games (seeded with seed + i, if seed is given).
+    """
+    policy = get_policy_by_name(policy_name)
+    for i in range(games_count):
+        if seed is not None:
+            random.seed(seed + i)
+        play_runner_headless(players_count, policy)
+    return
+
+def profile_workload(
+    workload: Callable,
+    profiler_name: str = PROFILER_CPROFILE,
+    interval_s: float = SAMPLE_INTERVAL_S,
+    ) -> ProfileResult:
+    """
+    Run workload() under the named profiler and return what it measured.
+
+    >>> result = profile_workload(lambda: run_workload(1, 2, "greedy", seed=0))
+    >>> result.get_module_rollups()["game"][0] > 0
+    True
+    >>> result = profile_workload(lambda: run_workload(1, 2, "greedy", seed=0), PROFILER_SAMPLE)
+    >>> result.total_s > 0
+    True
+    """
+    if profiler_name == PROFILER_CPROFILE:
+        profiler = cProfile.Profile()
+        profiler.runcall(workload)
+        return get_cprofile_result(profiler)
+    if profiler_name == PROFILER_SAMPLE:
+        profiler = SamplingProfiler(interval_s)
+        profiler.start()
+        try:
+            workload()
+        finally:
+            profiler.stop()
+        return profiler.get_result()
+    raise Exception(f"unknown profiler: {profiler_name}")
+
+def print_hotspots(
+    result: ProfileResult,
+    top: int = 25,
+    sort: str = SORT_SELF,
+    out=sys.stdout,
+    ) -> None:
+    print(f"{'calls':>10} {'self s':>10} {'self %':>7} {'cum s':>10}  function", file=out)
+    for func_key, calls, self_s, cum_s in result.get_hotspots(top, sort):
+        self_pct = 100.0 * self_s / result.total_s if result.total_s > 0 else 0.0
+        calls_str = "-" if calls is None else str(calls)
+        print(
+            f"{calls_str:>10} {self_s:>10.4f} {self_pct:>6.1f}% {cum_s:>10.4f}  "
+            f"{get_frame_label(func_key)}:{func_key[1]}",
+            file=out,
+            )
+    return
+
+def print_module_rollups(
+    result: ProfileResult,
+    out=sys.stdout,
+    ) -> None:
+    print(f"{'module':<18} {'calls':>10} {'self s':>10} {'self %':>7}", file=out)
+    for module_name, (calls, self_s) in result.get_module_rollups().items():
+        self_pct = 100.0 * self_s / result.total_s if result.total_s > 0 else 0.0
+        calls_str = "-" if result.weight_unit == "samples" else str(calls)
+        print(f"{module_name:<18} {calls_str:>10} {self_s:>10.4f} {self_pct:>6.1f}%", file=out)
+    return
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Profile headless Splendor games.")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--players", type=int, default=2, choices=(2, 3, 4))
+    parser.add_argument("--policy", default="greedy", choices=sorted(POLICIES_DICT.keys()))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profiler", default=PROFILER_CPROFILE, choices=PROFILERS)
+    parser.add_argument("--interval", type=float, default=SAMPLE_INTERVAL_S, help="sampling interval, in seconds")
+    parser.add_argument("--top", type=int, default=25, help="number of hotspots to report")
+    parser.add_argument("--sort", default=SORT_SELF, choices=(SORT_SELF, SORT_CUM))
+    parser.add_argument("--collapsed", default="profile.collapsed", help="path of the collapsed-stack output")
+    args = parser.parse_args(argv)
+
+    result = profile_workload(
+        lambda: run_workload(args.games, args.players, args.policy, args.seed),
+        args.profiler,
+        args.interval,
+        )
+    print(f"{args.games} games, {args.players} players, policy {args.policy}, {args.profiler}: {result.total_s:.3f}s")
+    print()
+    print_hotspots(result, args.top, args.sort)
+    print()
+    print_module_rollups(result)
+    result.write_collapsed(args.collapsed)
+    print()
+    print(f"collapsed stacks ({result.weight_unit}) written to {args.collapsed}")
+    return
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+record.py - Compact per-game record: the initial deal plus every action taken, packed into bytes.
+
+A record is laid out as:
+
+    header:   magic (4s), version (B), players count (B)
+    players:  for each player, name length (H) + utf-8 name
+    decks:    for each of the three decks, card count (B) + card ids (B each), in deck order
+    nobles:   noble count (B) + noble ids (B each)
+    actions:  action count (I) + fixed-width actions (ACTION_STRUCT each)
+
+Because actions are fixed-width, the action for turn t sits at a known offset from the start of the actions
+block, which is what lets the archive jump straight to a game-plus-turn position.
+"""
+
+import struct
+from splendor.core import (
+    GEM_NAME_ALL_STR_DICT,
+    )
+from typing import List, Tuple
+
+RECORD_MAGIC = b"SPLR"
+RECORD_VERSION = 1
+
+HEADER_STRUCT = struct.Struct("<4sBB")
+NAME_LEN_STRUCT = struct.Struct("<H")
+COUNT_STRUCT = struct.Struct("<B")
+ACTIONS_COUNT_STRUCT = struct.Struct("<I")
+
+# kind, player idx, arg0, arg1, arg2, discard, then two reserved bytes
+ACTION_STRUCT = struct.Struct("<8B")
+ACTION_FIELDS_LEN = 6
+ACTION_RESERVED_BYTES = (255,) * (ACTION_STRUCT.size - ACTION_FIELDS_LEN)
+NO_ARG = 255
+
+ACTION_TAKE_THREE_TOKENS = 1
+ACTION_TAKE_TWO_TOKENS = 2
+ACTION_RESERVE_DEV_CARD = 3
+ACTION_PURCHASE_DEV_CARD = 4
+ACTION_PASS = 5
+ACTION_RESERVE_HIDDEN_DEV_CARD = 6
+
+# gem index <-> gem name, as used by the token action args
+GEM_NAMES_LIST = list(GEM_NAME_ALL_STR_DICT.keys())
+GEM_IDX_MAP = {gem_name: idx for idx, gem_name in enumerate(GEM_NAMES_LIST)}
+
+def gem_name_to_idx(gem_name: str) -> int:
+    return GEM_IDX_MAP[gem_name]
+
+def gem_idx_to_name(gem_idx: int) -> str:
+    return GEM_NAMES_LIST[gem_idx]
+
+
+class GameRecord:
+    """
+    The initial deal of a game (by catalog ids) and the ordered list of actions taken.
+
+    Actions are tuples of (kind, player_idx, arg0, arg1, arg2, discard); unused args are NO_ARG.  Token actions use gem
+    indices (see gem_name_to_idx()) and dev card actions use catalog card ids.  A purchase's arg1 is the catalog
+    id of the noble that visited the player after it, or NO_ARG.  discard is the index into TOKEN_DISCARDS_LIST
+    of the tokens a player over the token limit discarded after taking or reserving, or NO_ARG.  A reserve from
+    the top of a deck's face-down pile has the deck number as arg0 and the drawn card's id as arg1.
+
+    >>> record = GameRecord(2, [[0, 1, 2, 3, 4], [40, 41, 42, 43, 44], [70, 71, 72, 73, 74]], [0, 4, 7])
+    >>> record.add_player_name("Ava")
+    >>> record.add_player_name("Bernardo")
+    >>> record.append_action(ACTION_TAKE_THREE_TOKENS, 0, 0, 1, 2)
+    >>> record.append_action(ACTION_RESERVE_DEV_CARD, 1, 42)
+    >>> record.count_actions()
+    2
+    >>> record.get_action(1)
+    (3, 1, 42, 255, 255, 255)
+
+    >>> buf = record.to_bytes()
+    >>> len(buf) - record.get_actions_offset() == 2 * ACTION_STRUCT.size
+    True
+    >>> record_2 = GameRecord.from_bytes(buf)
+    >>> record_2 == record
+    True
+    >>> record_2.get_player_names()
+    ['Ava', 'Bernardo']
+
+    >>> GameRecord.from_bytes(buf, actions_limit=1).count_actions()
+    1
+    >>> GameRecord.from_bytes(b"XXXX" + buf[4:]) #doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    Exception: ...
+    """
+
+    players_count: int
+    player_names: List[str]
+    dev_card_deck_ids: List[List[int]] # idx=i -> deck #i+1
+    noble_ids: List[int]
+    actions: List[Tuple[int, int, int, int, int, int]]
+
+    def __init__(
+        self,
+        players_count: int,
+        dev_card_deck_ids: List[List[int]],
+        noble_ids: List[int],
+        player_names: List[str] = None,
+        actions: List[Tuple[int, int, int, int, int, int]] = None,
+        ) -> None:
+        self.players_count = players_count
+        self.dev_card_deck_ids = dev_card_deck_ids
+        self.noble_ids = noble_ids
+        self.player_names = player_names if player_names is not None else list()
+        self.actions = actions if actions is not None else list()
+
+    def get_players_count(self) -> int:
+        return self.players_count
+
+    def get_player_names(self) -> List[str]:
+        return self.player_names
+
+    def add_player_name(self, name: str) -> None:
+        self.player_names.append(name)
+        return
+
+    def get_dev_card_deck_ids(self, no: int) -> List[int]:
+        return self.dev_card_deck_ids[no-1]
+
+    def get_noble_ids(self) -> List[int]:
+        return self.noble_ids
+
+    def get_actions(self) -> List[Tuple[int, int, int, int, int, int]]:
+        return self.actions
+
+    def get_action(self, turn: int) -> Tuple[int, int, int, int, int, int]:
+        return self.actions[turn]
+
+    def count_actions(self) -> int:
+        return len(self.actions)
+
+    def append_action(self, kind: int, player_idx: int, *args: int, discard_idx: int = NO_ARG) -> None:
+        """
+        Append an action; up to three args, padded with NO_ARG, then the discard.
+        """
+        if len(args) > ACTION_FIELDS_LEN - 3:
+            raise Exception(f"too many action args: {args}")
+        padded_args = tuple(args) + (NO_ARG,) * (ACTION_FIELDS_LEN - 3 - len(args))
+        self.actions.append((kind, player_idx) + padded_args + (discard_idx,))
+        return
+
+    def get_actions_offset(self) -> int:
+        """
+        Return the offset of the first action within to_bytes().
+        """
+        offset = HEADER_STRUCT.size
+        for name in self.player_names:
+            offset += NAME_LEN_STRUCT.size + len(name.encode("utf-8"))
+        for deck_ids in self.dev_card_deck_ids:
+            offset += COUNT_STRUCT.size + len(deck_ids)
+        offset += COUNT_STRUCT.size + len(self.noble_ids)
+        offset += ACTIONS_COUNT_STRUCT.size
+        return offset
+
+    def to_bytes(self) -> bytes:
+        if len(self.player_names) != self.players_count:
+            raise Exception("cannot encode GameRecord: player names do not match players count")
+        parts = [HEADER_STRUCT.pack(RECORD_MAGIC, RECORD_VERSION, self.players_count)]
+        for name in self.player_names:
+            name_bytes = name.encode("utf-8")
+            parts.append(NAME_LEN_STRUCT.pack(len(name_bytes)))
+            parts.append(name_bytes)
+        for ids in self.dev_card_deck_ids + [self.noble_ids]:
+            parts.append(COUNT_STRUCT.pack(len(ids)))
+            parts.append(bytes(ids))
+        parts.append(ACTIONS_COUNT_STRUCT.pack(len(self.actions)))
+        for action in self.actions:
+            parts.append(ACTION_STRUCT.pack(*action, *ACTION_RESERVED_BYTES))
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(
+        cls,
+        buf,
+        offset: int = 0,
+        actions_limit: int = None,
+        ):
+        """
+        Decode a GameRecord from buf (bytes, or anything supporting the buffer protocol, e.g. an mmap) at offset.
+
+        If actions_limit is given, only the first actions_limit actions are decoded.
+        """
+        magic, version, players_count = HEADER_STRUCT.unpack_from(buf, offset)
+        if magic != RECORD_MAGIC:
+            raise Exception(f"not a game record: bad magic {magic}")
+        if version != RECORD_VERSION:
+            raise Exception(f"unsupported game record version {version}")
+        offset += HEADER_STRUCT.size
+
+        player_names = []
+        for i in range(players_count):
+            (name_len,) = NAME_LEN_STRUCT.unpack_from(buf, offset)
+            offset += NAME_LEN_STRUCT.size
+            player_names.append(bytes(buf[offset:offset + name_len]).decode("utf-8"))
+            offset += name_len
+
+        id_lists = []
+        for i in range(4): # three decks, then the nobles
+            (ids_count,) = COUNT_STRUCT.unpack_from(buf, offset)
+            offset += COUNT_STRUCT.size
+            id_lists.append(list(buf[offset:offset + ids_count]))
+            offset += ids_count
+
+        (actions_count,) = ACTIONS_COUNT_STRUCT.unpack_from(buf, offset)
+        offset += ACTIONS_COUNT_STRUCT.size
+        if actions_limit is not None:
+            actions_count = min(actions_count, actions_limit)
+        actions = [
+            ACTION_STRUCT.unpack_from(buf, offset + i * ACTION_STRUCT.size)[:ACTION_FIELDS_LEN]
+            for i in range(actions_count)
+            ]
+
+        return cls(players_count, id_lists[0:3], id_lists[3], player_names, actions)
+
+    def __eq__(self, other) -> bool:
+        return (
+                self.players_count == other.players_count
+                and self.player_names == other.player_names
+                and self.dev_card_deck_ids == other.dev_card_deck_ids
+                and self.noble_ids == other.noble_ids
+                and self.actions == other.actions
+                )
+
+    def __repr__(self) -> str:
+        return f"<GameRecord: {self.players_count} players, {self.count_actions()} actions>"
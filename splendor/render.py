@@ -0,0 +1,143 @@
+"""
+render.py - Draw a Game on the terminal, rebuilding only what changed since the last turn.
+
+The board is split into components: each deck's face-up cards, the nobles in play, the game's tokens, and each
+player.  Each component has a key, a few counts that change whenever its text would (see list_components()), and
+the renderer keeps the text it last drew for each one.  A turn only rebuilds the text of components whose key
+changed, and writes the whole board (the turn line, then every component, unchanged ones from their kept text)
+in one write to the terminal, so the board never scrolls out of view.
+
+    >>> import io
+    >>> from splendor.game import Game
+    >>> a_game = Game(2)
+    >>> a_game.add_player_by_name("Ava")
+    >>> a_game.add_player_by_name("Bernardo")
+    >>> out = io.StringIO()
+    >>> renderer = TerminalRenderer(out)
+    >>> renderer.render(a_game)
+    >>> print(out.getvalue().splitlines()[0])
+    round 1, Ava's turn
+    >>> first_board = out.getvalue()
+    >>> deck_text = renderer.fragments["deck 1"][1]
+    >>> a_game.action_take_two_tokens(a_game.get_player_by_idx(0), "green")
+    >>> a_game.go_to_next_player()
+    >>> out.seek(0), out.truncate()
+    (0, 0)
+    >>> renderer.render(a_game)
+    >>> [line for line in out.getvalue().splitlines() if line not in first_board.splitlines()]
+    ["round 1, Bernardo's turn", 'tokens: black 4, blue 4, green 2, red 4, white 4, yellow 5', 'Ava: 0 points; tokens green 2; cards none; reserve none; nobles 0']
+    >>> len(out.getvalue().splitlines()) == len(first_board.splitlines()), renderer.fragments["deck 1"][1] is deck_text
+    (True, True)
+"""
+
+from splendor.core import (
+    DevCard,
+    Gem,
+    GEM_NAME_ALL_STR_DICT,
+    GEM_NAME_COMMON_STR_DICT,
+    Noble,
+    )
+import sys
+from typing import Dict, List, Tuple
+
+DEV_CARD_DECKS_COUNT = 3
+
+
+def describe_dev_card(dev_card: DevCard) -> str:
+    """
+    >>> from splendor.game_setup import get_dev_card_by_id
+    >>> describe_dev_card(get_dev_card_by_id(5))
+    "level 1 black card, 0 points, cost {'blue': 2, 'red': 1, 'white': 2}"
+    """
+    return f"level {dev_card.get_level()} {dev_card.get_gem()} card, {dev_card.get_ppoints()} points, cost {dev_card.get_cost_str()}"
+
+def describe_noble(noble: Noble) -> str:
+    return f"noble, {noble.get_ppoints()} points, needs " + ", ".join(f"{gem} {count}" for gem, count in noble.get_cost().items())
+
+def describe_token_counts(token_counts: Tuple[int, ...]) -> str:
+    """
+    Return token counts (in GEM_NAME_ALL_STR_DICT order) in words, leaving out the zero counts.
+    """
+    text = ", ".join(f"{gem_name} {count}" for gem_name, count in zip(GEM_NAME_ALL_STR_DICT, token_counts) if count > 0)
+    return text if text != "" else "none"
+
+
+class TerminalRenderer:
+    """
+    Draws a Game on out, once per turn (see the module docstring).
+    """
+
+    fragments: Dict[str, Tuple[Tuple, str]] # component name -> (its key, its text), as last drawn
+
+    def __init__(self, out=sys.stdout) -> None:
+        self.out = out
+        self.fragments = {}
+
+    def list_components(self, a_game) -> List[Tuple[str, Tuple, object]]:
+        """
+        Return the (name, key, subject) of each component of a_game's board, in the order they are drawn, where
+        subject is the deck, NoblesInPlay, GameTokenCache or Player it shows.
+
+        Keys are cheap counts that change whenever the component does: a deck's cards and the nobles only ever
+        leave (a face-up card taken is replaced from the face-down pile, or its slot is left empty), and only a
+        player's own turns change the player.
+        """
+        game_state = a_game.get_current_game_state()
+        scoreboard = a_game.get_scoreboard()
+        components = []
+        for no in range(1, DEV_CARD_DECKS_COUNT + 1):
+            deck = game_state.get_dev_card_deck(no)
+            components.append((f"deck {no}", (deck.count(), deck.count_hidden()), deck))
+        nobles_in_play = game_state.get_nobles_in_play()
+        components.append(("nobles", nobles_in_play.count(), nobles_in_play))
+        game_token_cache = game_state.get_token_cache()
+        components.append(("tokens", game_token_cache.get_counts(), game_token_cache))
+        for idx, player in enumerate(a_game.players):
+            components.append((f"player {idx + 1}", scoreboard.get_turns_count(idx), player))
+        return components
+
+    def render_component(
+        self,
+        name: str,
+        key: Tuple,
+        subject,
+        ) -> str:
+        """
+        Return the text of a component (see list_components()).
+        """
+        if name.startswith("deck "):
+            lines = [f"{name} ({subject.count_hidden()} face down):"]
+            for dev_card in subject.get_facing():
+                lines.append("  " + (describe_dev_card(dev_card) if dev_card is not None else "(empty)"))
+            return "\n".join(lines)
+        if name == "nobles":
+            return "\n".join(["nobles:"] + ["  " + describe_noble(noble) for noble in subject.get_list()])
+        if name == "tokens":
+            return f"tokens: {describe_token_counts(key)}"
+        dev_card_cache = subject.get_current_dev_card_cache()
+        bonuses_text = ", ".join(
+            f"{gem_name} {dev_card_cache.calc_discount(Gem(gem_name))}" for gem_name in GEM_NAME_COMMON_STR_DICT
+            if dev_card_cache.calc_discount(Gem(gem_name)) > 0
+            )
+        reserve_text = "; ".join(describe_dev_card(dev_card) for dev_card in subject.get_current_dev_card_reserve().get_list())
+        return (
+            f"{subject.get_name()}: {subject.calc_score()} points; "
+            f"tokens {describe_token_counts(subject.get_current_token_cache().get_counts())}; "
+            f"cards {bonuses_text or 'none'}; reserve {reserve_text or 'none'}; nobles {len(subject.get_current_nobles())}"
+            )
+
+    def render(self, a_game) -> None:
+        """
+        Draw a_game: the turn line, then every component, in one write.  Only the components that changed since
+        the last render() are rebuilt; the others are written from the text kept for them.
+        """
+        lines = [f"round {a_game.get_round_number_idx() + 1}, {a_game.get_current_player().get_name()}'s turn"]
+        for name, key, subject in self.list_components(a_game):
+            fragment = self.fragments.get(name)
+            if fragment is None or fragment[0] != key:
+                fragment = (key, self.render_component(name, key, subject))
+                self.fragments[name] = fragment
+            lines.append(fragment[1])
+        self.out.write("\n".join(lines) + "\n")
+        self.out.flush()
+        return
@@ -0,0 +1,222 @@
+"""
+replay.py - Stream positions out of stored games in constant memory.
+
+Each game is replayed by applying its recorded actions, in place, to one GameState and one PlayerState per
+player; no GameStateHistory or PlayerStateHistory is built.
+"""
+
+from splendor.archive import (
+    GameArchiveReader,
+    )
+from splendor.core import (
+    DevCardCache,
+    DevCardReserve,
+    PlayerTokenCache,
+    )
+from splendor.game import (
+    GameState,
+    generate_initial_game_state_from_record,
+    pop_facing_dev_card_in_game_state,
+    purchase_dev_card_in_states,
+    reserve_dev_card_in_states,
+    take_tokens_in_states,
+    )
+from splendor.game_setup import (
+    get_dev_card_by_id,
+    get_dev_card_id,
+    get_noble_id,
+    )
+from splendor.player import (
+    PlayerState,
+    )
+from splendor.record import (
+    ACTION_PASS,
+    ACTION_PURCHASE_DEV_CARD,
+    ACTION_RESERVE_DEV_CARD,
+    ACTION_RESERVE_HIDDEN_DEV_CARD,
+    ACTION_TAKE_THREE_TOKENS,
+    ACTION_TAKE_TWO_TOKENS,
+    GameRecord,
+    gem_idx_to_name,
+    NO_ARG,
+    )
+from typing import Iterable, Iterator, List, Tuple
+
+
+class ReplayStateView:
+    """
+    The position of a game being replayed: the GameState and each player's PlayerState.
+
+    The view is mutated in place as the replay advances, so it is only valid until the next item is taken from
+    the iterator.  Callers that need to keep a position must copy what they need out of it.
+    """
+
+    game_state: GameState
+    player_states: List[PlayerState]
+
+    def __init__(
+        self,
+        game_state: GameState,
+        player_states: List[PlayerState],
+        ) -> None:
+        self.game_state = game_state
+        self.player_states = player_states
+
+    def get_game_state(self) -> GameState:
+        return self.game_state
+
+    def get_player_state(self, idx: int) -> PlayerState:
+        return self.player_states[idx]
+
+    def get_player_states(self) -> List[PlayerState]:
+        return self.player_states
+
+    def __repr__(self) -> str:
+        return f"<ReplayStateView: {len(self.player_states)} players>"
+
+
+def generate_initial_state_view(game_record: GameRecord) -> ReplayStateView:
+    """
+    Generate the view of game_record's initial position.
+    """
+    player_states = [
+        PlayerState(PlayerTokenCache(), DevCardCache(), DevCardReserve())
+        for i in range(game_record.get_players_count())
+        ]
+    return ReplayStateView(generate_initial_game_state_from_record(game_record), player_states)
+
+def apply_action(
+    state_view: ReplayStateView,
+    action: Tuple[int, int, int, int, int, int],
+    ) -> None:
+    """
+    Apply a recorded action to state_view in place, through the same rule effects as the matching Game.action_*
+    (splendor.game's *_in_states() functions).
+
+    Recorded actions were validated when they were played, so they are not re-validated here; only the cards a
+    record names (a blind draw, a noble's visit) are checked against what the rules dealt.
+    """
+    kind, player_idx, arg0, arg1, arg2, discard = action
+    game_state = state_view.get_game_state()
+    player_state = state_view.get_player_state(player_idx)
+    discard_idx = discard if discard != NO_ARG else None
+
+    if kind == ACTION_TAKE_THREE_TOKENS:
+        take_tokens_in_states(game_state, player_state, [gem_idx_to_name(gem_idx) for gem_idx in (arg0, arg1, arg2)], discard_idx)
+    elif kind == ACTION_TAKE_TWO_TOKENS:
+        take_tokens_in_states(game_state, player_state, [gem_idx_to_name(arg0)] * 2, discard_idx)
+    elif kind == ACTION_RESERVE_DEV_CARD:
+        dev_card = get_dev_card_by_id(arg0)
+        pop_facing_dev_card_in_game_state(game_state, dev_card)
+        reserve_dev_card_in_states(game_state, player_state, dev_card, discard_idx)
+    elif kind == ACTION_RESERVE_HIDDEN_DEV_CARD:
+        dev_card = game_state.get_dev_card_deck(arg0).pop_hidden_card()
+        if get_dev_card_id(dev_card) != arg1:
+            raise Exception(f"hidden card drawn from deck {arg0} does not match the record")
+        reserve_dev_card_in_states(game_state, player_state, dev_card, discard_idx)
+    elif kind == ACTION_PURCHASE_DEV_CARD:
+        noble = purchase_dev_card_in_states(game_state, player_state, get_dev_card_by_id(arg0))
+        if (get_noble_id(noble) if noble is not None else NO_ARG) != arg1:
+            raise Exception(f"noble visit does not match the record")
+    elif kind == ACTION_PASS:
+        pass
+    else:
+        raise Exception(f"unknown action kind: {kind}")
+    return
+
+def iter_replay_records(
+    game_records: Iterable[Tuple[int, GameRecord]],
+    ) -> Iterator[Tuple[int, int, ReplayStateView, Tuple[int, int, int, int, int, int]]]:
+    """
+    For each (game_id, game_record), yield (game_id, turn, state_view, action) for every turn, where state_view
+    is the position before action was taken.  See ReplayStateView for how long a state_view stays valid.
+    """
+    for game_id, game_record in game_records:
+        state_view = generate_initial_state_view(game_record)
+        for turn, action in enumerate(game_record.get_actions()):
+            yield game_id, turn, state_view, action
+            apply_action(state_view, action)
+    return
+
+def iter_replay(
+    reader: GameArchiveReader,
+    game_ids: Iterable[int] = None,
+    ) -> Iterator[Tuple[int, int, ReplayStateView, Tuple[int, int, int, int, int, int]]]:
+    """
+    Replay the games in an archive (all of them, or just game_ids), lazily, one game record in memory at a time.
+
+    >>> import os, tempfile
+    >>> from splendor.archive import GameArchiveWriter
+    >>> from splendor.game import Game
+    >>> a_game = Game(2)
+    >>> a_game.add_player_by_name("Ava")
+    >>> a_game.add_player_by_name("Bernardo")
+    >>> a_game.action_take_three_tokens(a_game.get_player_by_idx(0), "black", "blue", "red")
+    >>> a_game.action_take_two_tokens(a_game.get_player_by_idx(1), "green")
+    >>> dev_card = a_game.get_current_dev_card_deck(1).get_facing()[2]
+    >>> a_game.action_reserve_dev_card(a_game.get_player_by_idx(0), dev_card)
+
+    >>> tmp_dir = tempfile.TemporaryDirectory()
+    >>> path = os.path.join(tmp_dir.name, "games.spla")
+    >>> with GameArchiveWriter(path) as writer:
+    ...     writer.append(a_game.get_game_record())
+    0
+    >>> reader = GameArchiveReader(path)
+    >>> for game_id, turn, state_view, action in iter_replay(reader):
+    ...     print(game_id, turn, action[0], state_view.get_game_state().get_token_cache().count())
+    0 0 1 25
+    0 1 2 22
+    0 2 3 20
+
+    >>> final_view = generate_initial_state_view(reader.get_game_record(0))
+    >>> for action in reader.get_game_record(0).get_actions():
+    ...     apply_action(final_view, action)
+    >>> final_view.get_player_state(0).get_token_cache().count() == a_game.get_player_by_idx(0).get_current_token_cache().count()
+    True
+    >>> final_view.get_game_state().get_dev_card_deck(1).get_facing() == a_game.get_current_dev_card_deck(1).get_facing()
+    True
+
+    >>> import random
+    >>> from splendor.game import play_runner_headless
+    >>> from splendor.policy import policy_greedy
+    >>> random.seed(3)
+    >>> b_game = play_runner_headless(3, policy_greedy)
+    >>> b_view = generate_initial_state_view(b_game.get_game_record())
+    >>> for action in b_game.get_game_record().get_actions():
+    ...     apply_action(b_view, action)
+    >>> [state.calc_score() for state in b_view.get_player_states()] == [p.calc_score() for p in b_game.players]
+    True
+    >>> [len(state.get_nobles()) for state in b_view.get_player_states()]
+    [1, 2, 0]
+    >>> b_view.get_game_state().get_nobles_in_play().count()
+    1
+    >>> b_view.get_game_state().get_token_cache().__str__() == b_game.get_current_game_token_cache().__str__()
+    True
+
+Every position of replayed games matches the one Game recorded in its state histories (a pass appends no state):
+
+    >>> from splendor.game import get_board_view
+    >>> def get_player_view(player_state):
+    ...     return (player_state.get_token_cache().get_counts(), [get_dev_card_id(dev_card) for dev_card in player_state.get_dev_card_cache().get_list()],
+    ...         [get_dev_card_id(dev_card) for dev_card in player_state.get_dev_card_reserve().get_list()], [get_noble_id(noble) for noble in player_state.get_nobles()])
+    >>> mismatches = 0
+    >>> for seed in range(6):
+    ...     random.seed(seed)
+    ...     c_game = play_runner_headless(2 + seed % 3, policy_greedy)
+    ...     game_states = iter(c_game.get_game_state_history().l[1:])
+    ...     players_states = [iter(player.player_state_history.l[1:]) for player in c_game.players]
+    ...     c_view = generate_initial_state_view(c_game.get_game_record())
+    ...     for action in c_game.get_game_record().get_actions():
+    ...         apply_action(c_view, action)
+    ...         if action[0] == ACTION_PASS:
+    ...             continue
+    ...         mismatches += get_board_view(c_view.get_game_state()) != get_board_view(next(game_states))
+    ...         mismatches += get_player_view(c_view.get_player_state(action[1])) != get_player_view(next(players_states[action[1]]))
+    >>> mismatches
+    0
+    >>> reader.close()
+    >>> tmp_dir.cleanup()
+    """
+    if game_ids is None:
+        game_ids = range(reader.count())
+    return iter_replay_records((game_id, reader.get_game_record(game_id)) for game_id in game_ids)
@@ -0,0 +1,357 @@
+"""
+results.py - SQLite store of finished game results, plus a single writer process that batches inserts.
+
+Simulation workers never write to the database themselves: they put GameResults on a ResultsWriter's queue,
+and the writer process inserts them a batch per transaction.
+"""
+
+import multiprocessing
+import queue
+import sqlite3
+from splendor.record import (
+    ACTION_PURCHASE_DEV_CARD,
+    NO_ARG,
+    )
+from typing import List, Tuple
+
+RESULTS_BATCH_SIZE = 500
+RESULTS_FLUSH_INTERVAL_S = 1.0
+RESULTS_QUEUE_MAX = 10000
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS games (
+    game_id INTEGER PRIMARY KEY,
+    players_count INTEGER NOT NULL,
+    policy TEXT NOT NULL,
+    rounds INTEGER NOT NULL,
+    turns INTEGER NOT NULL,
+    winner_seat INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS outcomes (
+    game_id INTEGER NOT NULL REFERENCES games (game_id),
+    seat INTEGER NOT NULL,
+    player_name TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    dev_cards_count INTEGER NOT NULL,
+    is_winner INTEGER NOT NULL,
+    PRIMARY KEY (game_id, seat)
+);
+CREATE TABLE IF NOT EXISTS card_purchases (
+    game_id INTEGER NOT NULL REFERENCES games (game_id),
+    seat INTEGER NOT NULL,
+    card_id INTEGER NOT NULL,
+    turn INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS noble_visits (
+    game_id INTEGER NOT NULL REFERENCES games (game_id),
+    seat INTEGER NOT NULL,
+    noble_id INTEGER NOT NULL,
+    turn INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS card_purchases_card_id ON card_purchases (card_id);
+CREATE INDEX IF NOT EXISTS noble_visits_noble_id ON noble_visits (noble_id);
+"""
+
+INSERT_GAME_SQL = "INSERT INTO games VALUES (?, ?, ?, ?, ?, ?)"
+INSERT_OUTCOME_SQL = "INSERT INTO outcomes VALUES (?, ?, ?, ?, ?, ?)"
+INSERT_CARD_PURCHASE_SQL = "INSERT INTO card_purchases VALUES (?, ?, ?, ?)"
+INSERT_NOBLE_VISIT_SQL = "INSERT INTO noble_visits VALUES (?, ?, ?, ?)"
+
+QUERY_WIN_RATE_BY_SEAT_SQL = """
+SELECT games.players_count, outcomes.seat, COUNT(*), SUM(outcomes.is_winner), AVG(outcomes.is_winner)
+FROM outcomes JOIN games USING (game_id)
+GROUP BY games.players_count, outcomes.seat
+ORDER BY games.players_count, outcomes.seat
+"""
+
+QUERY_CARD_PICK_RATE_SQL = """
+SELECT card_id, COUNT(*), COUNT(*) * 1.0 / (SELECT COUNT(*) FROM games)
+FROM card_purchases
+GROUP BY card_id
+ORDER BY COUNT(*) DESC, card_id
+"""
+
+QUERY_GAME_LENGTH_SQL = """
+SELECT players_count, COUNT(*), AVG(turns), MIN(turns), MAX(turns), AVG(rounds)
+FROM games
+GROUP BY players_count
+ORDER BY players_count
+"""
+
+
+class GameResult:
+    """
+    The outcome of one finished game, in plain (picklable) fields so it can cross process boundaries.
+
+    Per-seat lists are indexed by seat (player index); card_purchases and noble_visits hold (seat, id, turn).
+    """
+
+    players_count: int
+    policy: str
+    rounds: int
+    turns: int
+    winner_seat: int
+    player_names: List[str]
+    scores: List[int]
+    dev_cards_counts: List[int]
+    card_purchases: List[Tuple[int, int, int]]
+    noble_visits: List[Tuple[int, int, int]]
+
+    def __init__(
+        self,
+        players_count: int,
+        policy: str,
+        rounds: int,
+        turns: int,
+        winner_seat: int,
+        player_names: List[str],
+        scores: List[int],
+        dev_cards_counts: List[int],
+        card_purchases: List[Tuple[int, int, int]],
+        noble_visits: List[Tuple[int, int, int]],
+        ) -> None:
+        self.players_count = players_count
+        self.policy = policy
+        self.rounds = rounds
+        self.turns = turns
+        self.winner_seat = winner_seat
+        self.player_names = player_names
+        self.scores = scores
+        self.dev_cards_counts = dev_cards_counts
+        self.card_purchases = card_purchases
+        self.noble_visits = noble_visits
+
+    def __repr__(self) -> str:
+        return f"<GameResult: {self.players_count} players, {self.turns} turns, winner seat {self.winner_seat}>"
+
+
+def game_result_from_game(game, policy: str = "") -> GameResult:
+    """
+    Build the GameResult of a finished Game (i.e. one whose play() has returned).
+    """
+    game_record = game.get_game_record()
+    card_purchases = []
+    noble_visits = []
+    for turn, action in enumerate(game_record.get_actions()):
+        if action[0] == ACTION_PURCHASE_DEV_CARD:
+            card_purchases.append((action[1], action[2], turn))
+            if action[3] != NO_ARG:
+                noble_visits.append((action[1], action[3], turn))
+    players = [game.get_player_by_idx(idx) for idx in range(game_record.get_players_count())]
+    return GameResult(
+        players_count=game_record.get_players_count(),
+        policy=policy,
+        rounds=game.get_round_number_idx(),
+        turns=game_record.count_actions(),
+        winner_seat=game.winning_player_idx,
+        player_names=[player.get_name() for player in players],
+        scores=[player.calc_score() for player in players],
+        dev_cards_counts=[player.get_current_dev_card_cache_count() for player in players],
+        card_purchases=card_purchases,
+        noble_visits=noble_visits,
+        )
+
+
+class ResultsStore:
+    """
+    SQLite-backed store of GameResults, with aggregate queries.
+
+    >>> store = ResultsStore(":memory:")
+    >>> result_1 = GameResult(2, "greedy", 30, 60, 1, ["a", "b"], [12, 16], [10, 11], [(0, 3, 5), (1, 3, 9)], [])
+    >>> result_2 = GameResult(2, "greedy", 20, 40, 0, ["a", "b"], [15, 9], [9, 7], [(0, 44, 7)], [(0, 2, 39)])
+    >>> store.insert_game_results([result_1, result_2])
+    [0, 1]
+    >>> store.count_games()
+    2
+    >>> store.query_win_rate_by_seat()
+    [(2, 0, 2, 1, 0.5), (2, 1, 2, 1, 0.5)]
+    >>> store.query_card_pick_rate()
+    [(3, 2, 1.0), (44, 1, 0.5)]
+    >>> store.query_game_length()
+    [(2, 2, 50.0, 40, 60, 25.0)]
+    >>> store.close()
+    """
+
+    path: str
+    connection: sqlite3.Connection
+    next_game_id: int
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA_SQL)
+        (max_game_id,) = self.connection.execute("SELECT MAX(game_id) FROM games").fetchone()
+        self.next_game_id = 0 if max_game_id is None else max_game_id + 1
+        return
+
+    def insert_game_results(self, game_results: List[GameResult]) -> List[int]:
+        """
+        Insert game_results in a single transaction, and return the game ids assigned to them.
+
+        Game ids are allocated here, so only one ResultsStore should write to a database at a time.
+        """
+        game_rows = []
+        outcome_rows = []
+        card_purchase_rows = []
+        noble_visit_rows = []
+        game_ids = []
+        for game_result in game_results:
+            game_id = self.next_game_id
+            self.next_game_id += 1
+            game_ids.append(game_id)
+            game_rows.append((
+                game_id,
+                game_result.players_count,
+                game_result.policy,
+                game_result.rounds,
+                game_result.turns,
+                game_result.winner_seat,
+                ))
+            for seat in range(game_result.players_count):
+                outcome_rows.append((
+                    game_id,
+                    seat,
+                    game_result.player_names[seat],
+                    game_result.scores[seat],
+                    game_result.dev_cards_counts[seat],
+                    int(seat == game_result.winner_seat),
+                    ))
+            card_purchase_rows += [(game_id,) + card_purchase for card_purchase in game_result.card_purchases]
+            noble_visit_rows += [(game_id,) + noble_visit for noble_visit in game_result.noble_visits]
+
+        with self.connection:
+            self.connection.executemany(INSERT_GAME_SQL, game_rows)
+            self.connection.executemany(INSERT_OUTCOME_SQL, outcome_rows)
+            self.connection.executemany(INSERT_CARD_PURCHASE_SQL, card_purchase_rows)
+            self.connection.executemany(INSERT_NOBLE_VISIT_SQL, noble_visit_rows)
+        return game_ids
+
+    def count_games(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def query_win_rate_by_seat(self) -> List[Tuple[int, int, int, int, float]]:
+        """
+        Return (players count, seat, games, wins, win rate) rows.
+        """
+        return self.connection.execute(QUERY_WIN_RATE_BY_SEAT_SQL).fetchall()
+
+    def query_card_pick_rate(self) -> List[Tuple[int, int, float]]:
+        """
+        Return (card id, purchases, purchases per game) rows, most-purchased first.
+        """
+        return self.connection.execute(QUERY_CARD_PICK_RATE_SQL).fetchall()
+
+    def query_game_length(self) -> List[Tuple[int, int, float, int, int, float]]:
+        """
+        Return (players count, games, mean turns, min turns, max turns, mean rounds) rows.
+        """
+        return self.connection.execute(QUERY_GAME_LENGTH_SQL).fetchall()
+
+    def close(self) -> None:
+        self.connection.close()
+        return
+
+
+def run_results_writer(
+    path: str,
+    results_queue,
+    batch_size: int = RESULTS_BATCH_SIZE,
+    flush_interval_s: float = RESULTS_FLUSH_INTERVAL_S,
+    ) -> None:
+    """
+    Drain GameResults from results_queue into the store at path until None is received.
+
+    A batch is written once it reaches batch_size, or when flush_interval_s passes with nothing new queued.
+    """
+    store = ResultsStore(path)
+    batch = []
+    while True:
+        try:
+            game_result = results_queue.get(timeout=flush_interval_s)
+        except queue.Empty:
+            # nothing new for a while, so write out what we have
+            if len(batch) > 0:
+                store.insert_game_results(batch)
+                batch = []
+            continue
+        if game_result is None:
+            break
+        batch.append(game_result)
+        if len(batch) >= batch_size:
+            store.insert_game_results(batch)
+            batch = []
+    if len(batch) > 0:
+        store.insert_game_results(batch)
+    store.close()
+    return
+
+
+class ResultsWriter:
+    """
+    The single writer process of a results store.  Producers (in any process) put() GameResults onto its queue.
+
+    >>> import os, tempfile
+    >>> tmp_dir = tempfile.TemporaryDirectory()
+    >>> path = os.path.join(tmp_dir.name, "results.sqlite")
+    >>> with ResultsWriter(path, batch_size=2) as writer:
+    ...     for i in range(5):
+    ...         writer.put(GameResult(2, "greedy", 30, 60, i % 2, ["a", "b"], [15, 9], [9, 7], [], []))
+    >>> store = ResultsStore(path)
+    >>> store.count_games()
+    5
+    >>> store.query_win_rate_by_seat()
+    [(2, 0, 5, 3, 0.6), (2, 1, 5, 2, 0.4)]
+    >>> store.close()
+    >>> tmp_dir.cleanup()
+    """
+
+    path: str
+    results_queue: multiprocessing.Queue
+    process: multiprocessing.Process
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = RESULTS_BATCH_SIZE,
+        flush_interval_s: float = RESULTS_FLUSH_INTERVAL_S,
+        ) -> None:
+        self.path = path
+        self.results_queue = multiprocessing.Queue(RESULTS_QUEUE_MAX)
+        self.process = multiprocessing.Process(
+            target=run_results_writer,
+            args=(path, self.results_queue, batch_size, flush_interval_s),
+            daemon=True,
+            )
+        return
+
+    def get_queue(self):
+        """
+        Return the queue to hand to producer processes, which put GameResults on it.
+        """
+        return self.results_queue
+
+    def start(self) -> None:
+        self.process.start()
+        return
+
+    def put(self, game_result: GameResult) -> None:
+        self.results_queue.put(game_result)
+        return
+
+    def close(self) -> None:
+        """
+        Flush everything queued so far and stop the writer process.
+        """
+        self.results_queue.put(None)
+        self.process.join()
+        return
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+        return
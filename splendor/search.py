@@ -0,0 +1,739 @@
+"""
+search.py - A Monte Carlo tree search bot, which can ponder the game while the humans think.
+
+    python -m splendor.search --budget 1.0 --hint-ms 500      (play against it, with hints)
+
+A SearchTree searches from a root position: each iteration copies the root Game (Game.copy_position()), selects down the tree by UCB1
+(each seat picking for itself), expands one untried action (legal actions are listed with prune=True, and tried
+in order of get_expansion_priority()), plays a
+greedy rollout of at most ROLLOUT_TURNS_MAX turns (by default), and backs up a value per seat: 1 for the winner of a finished
+game, or else an estimate from the points and cards each seat has (see evaluate()).  A child's mean value for the
+seat that chose it is that move's estimated win probability.  The phases are traced with splendor.trace.span().
+
+The search only knows what its seats can see.  Its root is the game as get_record_view() deals it for them (the
+piles and the other seats' blind reserves reshuffled), and each iteration determinizes its copy, reshuffling
+those unseen cards again, so no rollout plays with the real pile order.  Selection skips moves that aren't legal
+in the iteration's dealing (see is_action_available()).
+
+Nodes within a round of the root are also kept by position hash (see get_position_hash()).  When the game moves
+on, set_root() looks the new position up, and the search carries on from that subtree, keeping its visits.
+
+A PonderingBot is a policy (see splendor.policy) backed by a SearchTree in a worker process.  While a human is at
+the prompt, Game.play() calls its ponder(), and the worker searches the position until the bot is asked for a
+move; then the bot's own per-move budget starts from everything searched so far.  Pondering stops on its own
+once it has added ponder_nodes_max nodes to the tree, and Game.play() calls pause() once the game is over, so an
+idle bot holds neither a core nor a growing tree.
+
+    >>> import random
+    >>> from splendor.game import Game
+    >>> random.seed(4)
+    >>> a_game = Game(2)
+    >>> a_game.add_player_by_name("Ava")
+    >>> a_game.add_player_by_name("bot_2")
+    >>> tree = SearchTree(a_game)
+    >>> tree.run(iterations=60)
+    60
+    >>> tree.get_expanded_count()
+    60
+    >>> action = tree.get_best_action()
+    >>> action in a_game.list_legal_actions(a_game.get_player_by_idx(0))
+    True
+    >>> a_game.apply_action(action)
+    >>> a_game.go_to_next_player()
+    >>> tree.set_root(a_game) > 0
+    True
+    >>> tree.get_root_visits() == tree.get_reused_visits()
+    True
+
+    >>> with PonderingBot(budget_s=0.2, ponder_nodes_max=30) as bot:
+    ...     bot.ponder(a_game, [1])
+    ...     time.sleep(0.5)
+    ...     bot.pause()
+    ...     action = bot(a_game, a_game.get_player_by_idx(1))
+    ...     print(action in a_game.list_legal_actions(a_game.get_player_by_idx(1)), 0 < bot.get_last_reused_visits() <= 30)
+    True True
+
+A HintEngine answers the interactive "hint" command: it searches the human's position until its budget runs out
+(an iteration caught by the deadline cuts its rollout short, so a hint takes about the budget however busy the
+position), and keeps the search by position hash, so asking again for the same position costs nothing.  Like a
+bot's, its search only knows what the human can see: the piles and the other seats' blind reserves are sampled
+(so a hint can't give them away), and the hash is of the position the human sees, whatever the deal.  Its
+search gives every move at the root HINT_ROOT_VISITS_MIN visits before UCB1 picks among them, so the budget is
+spread over all the moves before it goes to the promising ones; a move with fewer than HINT_VISITS_CONFIDENT
+visits gets no win probability, as its estimate would say little.
+
+    >>> hint_engine = HintEngine(budget_ms=200)
+    >>> hints = hint_engine.list_hints(a_game)
+    >>> 0 < len(hints) <= HINT_ACTIONS_COUNT
+    True
+    >>> all(
+    ...     (win_probability is None) == (visits < HINT_VISITS_CONFIDENT) and (win_probability is None or 0 <= win_probability <= 1)
+    ...     for _, visits, win_probability in hints
+    ...     )
+    True
+    >>> hint_engine.list_hints(a_game) == hints
+    True
+    >>> other_deal = generate_game_from_record(get_record_view(a_game, [0]))
+    >>> hint_engine.list_hints(other_deal) == hints
+    True
+
+    >>> tree = SearchTree(a_game, HINT_ROLLOUT_TURNS_MAX, root_visits_min=2)
+    >>> moves_count = len(a_game.list_legal_actions(a_game.get_current_player(), prune=True))
+    >>> tree.run(iterations=2 * moves_count) == 2 * moves_count
+    True
+    >>> sorted(set(visits for _, visits, _ in tree.list_top_actions(moves_count)))
+    [2]
+"""
+
+import argparse
+import collections
+import math
+import multiprocessing
+import os
+import random
+from splendor.bot_pool import (
+    BOT_WORKER_NICENESS,
+    )
+from splendor.game import (
+    Game,
+    generate_game_from_record,
+    get_board_view,
+    play_runner_interactive,
+    )
+from splendor.game_setup import (
+    get_dev_card_by_id,
+    get_dev_card_id,
+    get_noble_id,
+    )
+from splendor.policy import (
+    policy_greedy,
+    )
+from splendor.record import (
+    ACTION_PURCHASE_DEV_CARD,
+    ACTION_RESERVE_DEV_CARD,
+    ACTION_RESERVE_HIDDEN_DEV_CARD,
+    ACTION_TAKE_THREE_TOKENS,
+    ACTION_TAKE_TWO_TOKENS,
+    GameRecord,
+    )
+from splendor.trace import (
+    span,
+    )
+import time
+from typing import Dict, Iterable, List, Tuple
+
+# turns of greedy play after the expanded node, before the position is estimated
+ROLLOUT_TURNS_MAX = 8
+# UCB1 exploration constant, for values in [0, 1]
+EXPLORATION = 1.4
+# value of a purchased card in points, and how sharply a points lead turns into a win estimate (per point)
+DEV_CARD_POINTS = 0.3
+LEAD_SHARPNESS = 0.4
+# time a bot takes per move, after whatever it pondered
+BOT_MOVE_BUDGET_S = 1.0
+# how early untried actions of each kind are expanded (see get_expansion_priority())
+EXPANSION_PRIORITIES_DICT = {
+    ACTION_TAKE_THREE_TOKENS: 3,
+    ACTION_TAKE_TWO_TOKENS: 2,
+    ACTION_RESERVE_DEV_CARD: 1,
+    ACTION_RESERVE_HIDDEN_DEV_CARD: 1,
+}
+# iterations a pondering worker runs between checks for a request
+PONDER_BATCH_ITERATIONS = 4
+# nodes pondering one position may add to the tree before the worker goes idle (each is well under a KB)
+PONDER_NODES_MAX = 100000
+# time a hint searches a new position for, the moves it suggests, and the positions whose searches are kept
+HINT_BUDGET_MS = 500
+HINT_ACTIONS_COUNT = 3
+HINT_CACHE_MAX = 64
+# a hint's rollouts are shorter than a bot's, for more of its few iterations to go to comparing the moves
+HINT_ROLLOUT_TURNS_MAX = 2
+# visits a hint's search gives every move at the root before UCB1 picks among them
+HINT_ROOT_VISITS_MIN = 4
+# a hinted move with fewer visits than this is shown without a win probability
+HINT_VISITS_CONFIDENT = 10
+
+
+def get_position_hash(
+    a_game: Game,
+    seats: Iterable[int] = (),
+    ) -> int:
+    """
+    Return a hash of a_game's position as seats see it: the board, every player's tokens, cards, reserve and
+    nobles, and whose turn it is.  Only the reserves of seats are hashed whole; of the other players', the cards
+    reserved blind are only counted, and the face-down piles are only counted too, so positions that differ only
+    in cards seats can't see hash the same.  Positions reached by different orders of the same actions hash the
+    same.
+    """
+    face_up_reserved_ids = {
+        action[2] for action in a_game.get_game_record().get_actions() if action[0] == ACTION_RESERVE_DEV_CARD
+        }
+    players_parts = []
+    for idx, player in enumerate(a_game.players):
+        reserve_ids = [get_dev_card_id(dev_card) for dev_card in player.get_current_dev_card_reserve().get_list()]
+        if idx not in seats:
+            public_reserve_ids = [dev_card_id for dev_card_id in reserve_ids if dev_card_id in face_up_reserved_ids]
+            reserve_ids = public_reserve_ids + [None] * (len(reserve_ids) - len(public_reserve_ids))
+        players_parts.append((
+            player.get_current_token_cache().get_counts(),
+            tuple(sorted(get_dev_card_id(dev_card) for dev_card in player.get_current_dev_card_cache().get_list())),
+            tuple(reserve_ids),
+            tuple(sorted(get_noble_id(noble) for noble in player.get_current_nobles())),
+            ))
+    return hash((
+        get_board_view(a_game.get_current_game_state()),
+        tuple(players_parts),
+        a_game.get_current_player_idx(),
+        ))
+
+def list_blind_reserved_ids(
+    a_game: Game,
+    seats: Iterable[int],
+    ) -> List[int]:
+    """
+    Return the ids of the cards players other than seats reserved blind and still hold, which seats can't see.
+    """
+    actions = a_game.get_game_record().get_actions()
+    purchased_ids = {action[2] for action in actions if action[0] == ACTION_PURCHASE_DEV_CARD}
+    return [
+        action[3] for action in actions
+        if action[0] == ACTION_RESERVE_HIDDEN_DEV_CARD and action[1] not in seats and action[3] not in purchased_ids
+        ]
+
+def get_record_view(
+    a_game: Game,
+    seats: Iterable[int],
+    ) -> GameRecord:
+    """
+    Return a_game's record as seats see it: the cards they can't see (each deck's face-down pile, and the cards
+    other players reserved blind and still hold) are dealt again at random among themselves, deck by deck, and
+    the blind reserves that drew them are rewritten to match.  Replaying it reaches a position seats can't tell
+    from a_game's, which holds nothing they don't know.
+
+    >>> random.seed(2)
+    >>> a_game = Game(2)
+    >>> a_game.add_player_by_name("Ava")
+    >>> a_game.add_player_by_name("Bernardo")
+    >>> a_game.action_reserve_hidden_dev_card(a_game.get_player_by_idx(0), 1)
+    >>> a_game.go_to_next_player()
+    >>> game_record = a_game.get_game_record()
+    >>> record_view = get_record_view(a_game, [1])
+    >>> record_view.get_dev_card_deck_ids(1)[:4] == game_record.get_dev_card_deck_ids(1)[:4]
+    True
+    >>> sorted(record_view.get_dev_card_deck_ids(1)) == sorted(game_record.get_dev_card_deck_ids(1))
+    True
+    >>> record_view.get_dev_card_deck_ids(1)[4:] != game_record.get_dev_card_deck_ids(1)[4:]
+    True
+    >>> b_game = generate_game_from_record(record_view)
+    >>> get_position_hash(b_game, [1]) == get_position_hash(a_game, [1])
+    True
+    >>> get_record_view(a_game, [0]).get_actions() == game_record.get_actions()
+    True
+    """
+    game_record = a_game.get_game_record()
+    blind_reserved_ids = set(list_blind_reserved_ids(a_game, seats))
+    dev_card_deck_ids = []
+    dealt_ids = {} # card id -> the id dealt in its place
+    for no in range(1, 4):
+        deck_ids = list(game_record.get_dev_card_deck_ids(no))
+        hidden_count = a_game.get_current_dev_card_deck(no).count_hidden()
+        unseen_idxs = [idx for idx, dev_card_id in enumerate(deck_ids) if dev_card_id in blind_reserved_ids]
+        unseen_idxs += range(len(deck_ids) - hidden_count, len(deck_ids))
+        unseen_ids = [deck_ids[idx] for idx in unseen_idxs]
+        random.shuffle(unseen_ids)
+        for idx, dev_card_id in zip(unseen_idxs, unseen_ids):
+            dealt_ids[deck_ids[idx]] = dev_card_id
+            deck_ids[idx] = dev_card_id
+        dev_card_deck_ids.append(deck_ids)
+    actions = [
+        action[:3] + (dealt_ids[action[3]],) + action[4:]
+        if action[0] == ACTION_RESERVE_HIDDEN_DEV_CARD and action[3] in blind_reserved_ids else action
+        for action in game_record.get_actions()
+        ]
+    return GameRecord(
+        game_record.get_players_count(), dev_card_deck_ids, list(game_record.get_noble_ids()),
+        list(game_record.get_player_names()), actions,
+        )
+
+def is_action_available(
+    a_game: Game,
+    action: Tuple[int, int, int, int, int, int],
+    ) -> bool:
+    """
+    Return True if action, legal in some dealing of the cards a search can't see, is legal in a_game's too.  The
+    tokens, bonuses and counts of the position only depend on the actions that led to it, so only which cards are
+    face up or reserved can differ.
+    """
+    kind = action[0]
+    if kind != ACTION_RESERVE_DEV_CARD and kind != ACTION_PURCHASE_DEV_CARD:
+        return True
+    dev_card = get_dev_card_by_id(action[2])
+    if a_game.get_current_dev_card_deck(dev_card.get_level()).find_card(dev_card) != -1:
+        return True
+    return kind == ACTION_PURCHASE_DEV_CARD and a_game.get_player_by_idx(action[1]).get_current_dev_card_reserve().find_card(dev_card) != -1
+
+def is_game_over(a_game: Game) -> bool:
+    """
+    Return True if a_game has ended as Game.play() ends it: stalled, or back to the start player once someone has
+    the winning score.
+    """
+    if a_game.is_stalled():
+        return True
+    if a_game.get_current_player_idx() != a_game.start_player_idx:
+        return False
+    scoreboard = a_game.get_scoreboard()
+    return any(scoreboard.get_score(idx) >= a_game.winning_score for idx in range(len(a_game.players)))
+
+def evaluate(a_game: Game) -> List[float]:
+    """
+    Return each seat's value of a_game's position, in [0, 1] and summing to 1: who won, if the game is over, or
+    else a softmax of each seat's points (plus DEV_CARD_POINTS per purchased card).
+    """
+    players_count = len(a_game.players)
+    if is_game_over(a_game):
+        winning_player_idx = a_game.determine_winning_player()
+        return [1.0 if idx == winning_player_idx else 0.0 for idx in range(players_count)]
+    scoreboard = a_game.get_scoreboard()
+    strengths = [
+        math.exp(LEAD_SHARPNESS * (scoreboard.get_score(idx) + DEV_CARD_POINTS * scoreboard.get_dev_cards_count(idx)))
+        for idx in range(players_count)
+        ]
+    total = sum(strengths)
+    return [strength / total for strength in strengths]
+
+
+def get_expansion_priority(action: Tuple[int, int, int, int, int, int]) -> float:
+    """
+    Return how early action is tried when its node is expanded (the highest first), in policy_greedy()'s order of
+    preference: purchases, the most points first, then taking three tokens, two, reserving, and passing.  A short
+    search then looks at the likely moves first.
+    """
+    kind = action[0]
+    if kind == ACTION_PURCHASE_DEV_CARD:
+        return 4 + get_dev_card_by_id(action[2]).get_ppoints()
+    return EXPANSION_PRIORITIES_DICT.get(kind, 0)
+
+
+class SearchNode:
+    """
+    A position in a SearchTree, reached by action from its parent.
+    """
+
+    __slots__ = ("action", "children", "untried_actions", "visits", "value_sums", "position_hash")
+
+    def __init__(
+        self,
+        action: Tuple[int, int, int, int, int, int],
+        players_count: int,
+        ) -> None:
+        self.action = action
+        self.children = {}
+        self.untried_actions = None # listed on the first expansion
+        self.visits = 0
+        self.value_sums = [0.0] * players_count
+        self.position_hash = None
+
+    def get_value(self, seat: int) -> float:
+        return self.value_sums[seat] / self.visits if self.visits > 0 else 0.0
+
+
+class SearchTree:
+    """
+    A Monte Carlo search tree over the positions following a Game's (see the module docstring).
+    """
+
+    rollout_turns_max: int
+    root_visits_min: int
+    seats: Tuple[int, ...] # the seats whose view is searched
+    root_game: Game # the root position as seats see it (see get_record_view())
+    blind_reserve_slots: List[List[Tuple[int, int]]] # deck no - 1 -> (player, reserve idx) of each card reserved blind from it that seats can't see
+    root: SearchNode
+    nodes_by_hash: Dict[int, SearchNode] # position hash -> node, for nodes within a round of the root
+    reused_visits: int
+    expanded_count: int # nodes added, over the tree's whole life
+
+    def __init__(
+        self,
+        a_game: Game,
+        rollout_turns_max: int = ROLLOUT_TURNS_MAX,
+        root_visits_min: int = 0,
+        seats: Iterable[int] = None,
+        ) -> None:
+        self.rollout_turns_max = rollout_turns_max
+        self.root_visits_min = root_visits_min
+        self.root = None
+        self.expanded_count = 0
+        self.set_root(a_game, seats)
+
+    def set_root(
+        self,
+        a_game: Game,
+        seats: Iterable[int] = None,
+        ) -> int:
+        """
+        Search from a_game's position from now on, as seats (by default, the seat to act) see it, carrying on
+        from its node if the tree has one.  Return the visits carried over.
+        """
+        self.seats = tuple(seats) if seats is not None else (a_game.get_current_player_idx(),)
+        position_hash = get_position_hash(a_game, self.seats)
+        node = None
+        if self.root is not None:
+            node = self.nodes_by_hash.get(position_hash)
+        if node is None:
+            node = SearchNode(None, len(a_game.players))
+        node.position_hash = position_hash
+        self.root_game = generate_game_from_record(get_record_view(a_game, self.seats))
+        blind_reserved_ids = set(list_blind_reserved_ids(self.root_game, self.seats))
+        self.blind_reserve_slots = [[] for no in range(1, 4)]
+        for player_idx, player in enumerate(self.root_game.players):
+            for reserve_idx, dev_card in enumerate(player.get_current_dev_card_reserve().get_list()):
+                if get_dev_card_id(dev_card) in blind_reserved_ids:
+                    self.blind_reserve_slots[dev_card.get_level() - 1].append((player_idx, reserve_idx))
+        self.root = node
+        self.nodes_by_hash = {position_hash: node}
+        self.reused_visits = node.visits
+        return self.reused_visits
+
+    def determinize(self, a_game: Game) -> None:
+        """
+        Deal the cards seats can't see in a_game, a copy of the root position, again at random: each deck's
+        face-down pile and the other players' blind reserves from it trade cards.
+        """
+        for no in range(1, 4):
+            deck = a_game.get_current_dev_card_deck(no)
+            slots = self.blind_reserve_slots[no - 1]
+            reserves = [a_game.get_player_by_idx(player_idx).get_current_dev_card_reserve().get_list() for player_idx, _ in slots]
+            unseen = [reserve[reserve_idx] for reserve, (_, reserve_idx) in zip(reserves, slots)]
+            unseen += deck.get_list()[deck.count_facing():]
+            random.shuffle(unseen)
+            for reserve, (_, reserve_idx), dev_card in zip(reserves, slots, unseen):
+                reserve[reserve_idx] = dev_card
+            deck.set_hidden(unseen[len(slots):])
+        return
+
+    def get_root_visits(self) -> int:
+        return self.root.visits
+
+    def get_reused_visits(self) -> int:
+        return self.reused_visits
+
+    def get_expanded_count(self) -> int:
+        return self.expanded_count
+
+    def select_child(
+        self,
+        node: SearchNode,
+        children: List[SearchNode],
+        seat: int,
+        ) -> SearchNode:
+        """
+        Return the child of node to descend to, among children (those legal in this iteration's dealing), by UCB1
+        for seat; at the root, the least visited child until every one has root_visits_min visits.
+        """
+        if node is self.root and self.root_visits_min > 1:
+            least_visited = min(children, key=lambda child: child.visits)
+            if least_visited.visits < self.root_visits_min:
+                return least_visited
+        log_visits = math.log(node.visits)
+        return max(
+            children,
+            key=lambda child: child.get_value(seat) + EXPLORATION * math.sqrt(log_visits / child.visits),
+            )
+
+    def pop_untried_action(
+        self,
+        node: SearchNode,
+        a_game: Game,
+        ) -> Tuple[int, int, int, int, int, int]:
+        """
+        Remove and return node's next untried action that is legal in a_game (see is_action_available()), or
+        return None if there is none.
+        """
+        for idx in range(len(node.untried_actions) - 1, -1, -1):
+            if is_action_available(a_game, node.untried_actions[idx]):
+                return node.untried_actions.pop(idx)
+        return None
+
+    def register(
+        self,
+        node: SearchNode,
+        a_game: Game,
+        depth: int,
+        ) -> None:
+        """
+        Keep node, at depth in the tree and in a_game's position, by position hash if it is within a round of the
+        root (so set_root() can find it).
+        """
+        if depth > len(a_game.players):
+            return
+        if node.position_hash is None:
+            node.position_hash = get_position_hash(a_game, self.seats)
+        self.nodes_by_hash.setdefault(node.position_hash, node)
+        return
+
+    def run_iteration(self, deadline_ts: float = None) -> None:
+        """
+        Run one iteration.  If deadline_ts (if given) passes during the rollout, the rollout stops there and the
+        position it reached is estimated, so an iteration overruns a deadline by at most one turn.
+        """
+        a_game = self.root_game.copy_position()
+        self.determinize(a_game)
+        node = self.root
+        path = [node]
+        action = None
+        with span("select", cat="bot"):
+            # a node's untried actions and children were listed in other dealings, so only the legal ones count
+            while node.untried_actions is not None:
+                action = self.pop_untried_action(node, a_game)
+                if action is not None:
+                    break
+                children = [child for child in node.children.values() if is_action_available(a_game, child.action)]
+                if len(children) == 0:
+                    break
+                node = self.select_child(node, children, a_game.get_current_player_idx())
+                a_game.apply_action(node.action)
+                a_game.go_to_next_player()
+                path.append(node)
+                self.register(node, a_game, len(path) - 1)
+        if not is_game_over(a_game):
+            with span("expand", cat="bot"):
+                if node.untried_actions is None:
+                    node.untried_actions = a_game.list_legal_actions(a_game.get_current_player(), prune=True)
+                    random.shuffle(node.untried_actions)
+                    node.untried_actions.sort(key=get_expansion_priority)
+                    action = node.untried_actions.pop()
+                if action is not None:
+                    child = SearchNode(action, len(a_game.players))
+                    node.children[action] = child
+                    self.expanded_count += 1
+                    a_game.apply_action(action)
+                    a_game.go_to_next_player()
+                    path.append(child)
+                    self.register(child, a_game, len(path) - 1)
+            with span("rollout", cat="bot"):
+                for i in range(self.rollout_turns_max):
+                    if is_game_over(a_game) or (deadline_ts is not None and time.time() >= deadline_ts):
+                        break
+                    a_game.apply_action(policy_greedy(a_game, a_game.get_current_player()))
+                    a_game.go_to_next_player()
+        with span("backpropagate", cat="bot"):
+            values = evaluate(a_game)
+            for node in path:
+                node.visits += 1
+                for seat, value in enumerate(values):
+                    node.value_sums[seat] += value
+        return
+
+    def run(
+        self,
+        iterations: int = None,
+        deadline_ts: float = None,
+        ) -> int:
+        """
+        Run iterations (if given), or until deadline_ts (if given), whichever comes first; return how many ran.
+        """
+        if iterations is None and deadline_ts is None:
+            raise Exception("give iterations or a deadline")
+        with span("search", cat="bot"):
+            count = 0
+            while (iterations is None or count < iterations) and (deadline_ts is None or time.time() < deadline_ts):
+                self.run_iteration(deadline_ts)
+                count += 1
+        return count
+
+    def list_top_actions(self, count: int) -> List[Tuple[Tuple[int, int, int, int, int, int], int, float]]:
+        """
+        Return (action, visits, estimated win probability for the seat to move) of the root's count most visited
+        moves, most visited first (and of those, the likeliest to win).
+        """
+        seat = self.root_game.get_current_player_idx()
+        children = sorted(self.root.children.values(), key=lambda child: (child.visits, child.get_value(seat)), reverse=True)
+        return [(child.action, child.visits, child.get_value(seat)) for child in children[:count]]
+
+    def get_best_action(self) -> Tuple[int, int, int, int, int, int]:
+        """
+        Return the root's most visited move, or its first legal move if nothing was searched.
+        """
+        top_actions = self.list_top_actions(1)
+        if len(top_actions) == 0:
+            return self.root_game.list_legal_actions(self.root_game.get_current_player(), prune=True)[0]
+        return top_actions[0][0]
+
+
+def _run_ponder_worker(
+    connection,
+    ponder_nodes_max: int = PONDER_NODES_MAX,
+    ) -> None:
+    """
+    Run in a PonderingBot's worker process: keep a SearchTree over the game, and answer the bot's requests,
+    searching between them while pondering, until pondering is paused or has added ponder_nodes_max nodes.
+    """
+    if hasattr(os, "nice"):
+        os.nice(BOT_WORKER_NICENESS)
+    tree = None
+    is_pondering = False
+    ponder_nodes_left = 0
+    while True:
+        if is_pondering and not connection.poll():
+            iterations = min(PONDER_BATCH_ITERATIONS, ponder_nodes_left)
+            expanded_count = tree.get_expanded_count()
+            tree.run(iterations=iterations)
+            # an iteration reaching the end of the game adds no node, so a finished position stops pondering too
+            ponder_nodes_left -= max(tree.get_expanded_count() - expanded_count, 1)
+            is_pondering = ponder_nodes_left > 0
+            continue
+        request = connection.recv()
+        if request[0] == "stop":
+            break
+        if request[0] == "pause":
+            is_pondering = False
+            continue
+        # the record is already the bot's view (see get_record_view()), so the worker never holds what it can't see
+        a_game = generate_game_from_record(GameRecord.from_bytes(request[1]))
+        if tree is None:
+            tree = SearchTree(a_game, seats=request[2])
+        else:
+            tree.set_root(a_game, request[2])
+        if request[0] == "ponder":
+            is_pondering = True
+            ponder_nodes_left = ponder_nodes_max
+        elif request[0] == "choose":
+            is_pondering = False
+            reused_visits = tree.get_reused_visits()
+            tree.run(deadline_ts=time.time() + request[3])
+            connection.send((tree.get_best_action(), reused_visits))
+    connection.close()
+    return
+
+
+class PonderingBot:
+    """
+    A search policy (see the module docstring) that thinks on the humans' time.  One PonderingBot may play every
+    bot seat of a game.
+    """
+
+    budget_s: float
+
+    def __init__(
+        self,
+        budget_s: float = BOT_MOVE_BUDGET_S,
+        ponder_nodes_max: int = PONDER_NODES_MAX,
+        ) -> None:
+        self.budget_s = budget_s
+        self.connection, worker_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_run_ponder_worker, args=(worker_connection, ponder_nodes_max), daemon=True
+            )
+        self.process.start()
+        worker_connection.close()
+        self.last_reused_visits = 0
+
+    def ponder(
+        self,
+        a_game: Game,
+        seats: Iterable[int],
+        ) -> None:
+        """
+        Start searching a_game's position, as the bot's seats see it, in the background (until the next move is
+        asked for).
+        """
+        self.connection.send(("ponder", get_record_view(a_game, seats).to_bytes(), tuple(seats)))
+        return
+
+    def pause(self) -> None:
+        """
+        Stop searching in the background (until the next ponder()), keeping the tree.
+        """
+        self.connection.send(("pause",))
+        return
+
+    def __call__(
+        self,
+        a_game: Game,
+        player,
+        ) -> Tuple[int, int, int, int, int, int]:
+        """
+        Return the action chosen for player, whose turn it is, after searching for the bot's budget.
+        """
+        seats = (a_game.get_player_idx(player),)
+        self.connection.send(("choose", get_record_view(a_game, seats).to_bytes(), seats, self.budget_s))
+        action, self.last_reused_visits = self.connection.recv()
+        return tuple(action)
+
+    def get_last_reused_visits(self) -> int:
+        """
+        Return how many visits of the last move's search were carried over from before it was asked for.
+        """
+        return self.last_reused_visits
+
+    def close(self) -> None:
+        if self.process.is_alive():
+            self.connection.send(("stop",))
+            self.process.join()
+        self.connection.close()
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+        return
+
+
+class HintEngine:
+    """
+    Suggests moves to a human, from a search of their position bounded to budget_ms (see the module docstring).
+    Searches are kept by position hash, the cache_max most recently asked for, so asking again is instant.
+    """
+
+    budget_ms: int
+    cache_max: int
+    trees_by_hash: "collections.OrderedDict[int, SearchTree]"
+
+    def __init__(
+        self,
+        budget_ms: int = HINT_BUDGET_MS,
+        cache_max: int = HINT_CACHE_MAX,
+        ) -> None:
+        self.budget_ms = budget_ms
+        self.cache_max = cache_max
+        self.trees_by_hash = collections.OrderedDict()
+
+    def list_hints(
+        self,
+        a_game: Game,
+        count: int = HINT_ACTIONS_COUNT,
+        ) -> List[Tuple[Tuple[int, int, int, int, int, int], int, float]]:
+        """
+        Return (action, visits, estimated win probability) of the count best moves for the seat to act in a_game,
+        best first (see SearchTree.list_top_actions()), searched as that seat sees the game.  The win probability of a move with fewer than
+        HINT_VISITS_CONFIDENT visits is None.
+        """
+        seats = (a_game.get_current_player_idx(),)
+        position_hash = get_position_hash(a_game, seats)
+        tree = self.trees_by_hash.pop(position_hash, None)
+        if tree is None:
+            tree = SearchTree(a_game, HINT_ROLLOUT_TURNS_MAX, HINT_ROOT_VISITS_MIN, seats)
+            tree.run(deadline_ts=time.time() + self.budget_ms / 1000)
+        self.trees_by_hash[position_hash] = tree
+        while len(self.trees_by_hash) > self.cache_max:
+            self.trees_by_hash.popitem(last=False)
+        return [
+            (action, visits, win_probability if visits >= HINT_VISITS_CONFIDENT else None)
+            for action, visits, win_probability in tree.list_top_actions(count)
+            ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Play Splendor against search bots that ponder on your time.")
+    parser.add_argument("--budget", type=float, default=BOT_MOVE_BUDGET_S, help="seconds a bot takes per move")
+    parser.add_argument("--hint-ms", type=int, default=HINT_BUDGET_MS, help="milliseconds a hint may search for")
+    args = parser.parse_args()
+
+    with PonderingBot(args.budget) as bot:
+        play_runner_interactive(bot_policy=bot, hint_engine=HintEngine(args.hint_ms))
+    return
+
+if __name__ == "__main__":
+    main()
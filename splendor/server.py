@@ -0,0 +1,771 @@
+"""
+server.py - An asyncio TCP server hosting many concurrent games, over a line-delimited JSON protocol.
+
+    python -m splendor.server --host 127.0.0.1 --port 7474
+
+Each client connection holds one seat.  A client sends one JSON object per line and gets one JSON object per line
+back, in order:
+
+    {"op": "join", "players": 2, "name": "Ava"}     -> {"ok": true, "game": 0, "seat": 0}
+    {"op": "join", "players": 3, "bots": 2}         -> the same, in a new game whose other seats are bots
+    {"op": "state"}                                 -> {"ok": true, "state": {...}} (see get_state_dict())
+    {"op": "state", "wait": true}                   -> the same, once it is the seat's turn or the game is over
+    {"op": "act", "action": [1, 0, 0, 1, 2, 255]}   -> {"ok": true, "over": false}
+
+and, for a lobby placing tables on this server (see splendor.lobby), on a connection of its own:
+
+    {"op": "open", "players": 3, "bots": 1}         -> {"ok": true, "game": 7} (the bots take the first seats)
+    {"op": "ping"}                                  -> {"ok": true, "games": 12}
+
+A join without "game" takes a seat in the oldest game still waiting for players of that count, or opens a new one;
+a game starts once every seat is taken.  A join that brings bots always opens a new game, so it can't name one.  A
+client that disconnects before its game starts gives its seat up, for the next join to take.  An action is one of
+the "legal_actions" of the state, which are only listed to the seat whose turn it is; a waiting state request saves
+polling for it.  Errors come back as {"ok": false, "error": "..."}.
+
+Every game is owned by one GameHost task, which takes the requests for its game off a bounded queue and applies
+them one at a time, so games share no state and need no locks.  Backpressure is end to end: a connection reads
+its next line only after its response has been written and drained, and waits for room on its game's queue.
+A game that gets no request for idle_timeout_s is evicted.
+
+Bots' moves are chosen in the server's BotPool (see splendor.bot_pool), so bot searches don't hold up the event
+loop: a game's task asks for the move and carries on taking its seats' requests until it comes back.  Bots play
+the policy named by "bot_policy" (see splendor.policy) and, if the pool misses the move deadline, the greedy one.
+
+Spectators watch games over HTTP, as server-sent events, from a SpectatorServer (see splendor.spectate).
+
+    >>> async def demo():
+    ...     server = SplendorServer(idle_timeout_s=5)
+    ...     await server.start("127.0.0.1", 0)
+    ...     ava = await connect("127.0.0.1", server.get_port())
+    ...     bernardo = await connect("127.0.0.1", server.get_port())
+    ...     print(await request(ava, {"op": "join", "players": 2, "name": "Ava"}))
+    ...     print(await request(bernardo, {"op": "join", "players": 2, "name": "Bernardo"}))
+    ...     state = (await request(ava, {"op": "state"}))["state"]
+    ...     print(state["current_seat"], len(state["legal_actions"]))
+    ...     print(await request(ava, {"op": "act", "action": state["legal_actions"][0]}))
+    ...     print(await request(ava, {"op": "act", "action": state["legal_actions"][0]}))
+    ...     print((await request(bernardo, {"op": "state"}))["state"]["you"]["tokens"])
+    ...     for client in (ava, bernardo):
+    ...         client[1].close()
+    ...     await server.stop()
+    >>> asyncio.run(demo())
+    {'ok': True, 'game': 0, 'seat': 0}
+    {'ok': True, 'game': 0, 'seat': 1}
+    0 30
+    {'ok': True, 'over': False}
+    {'ok': False, 'error': 'not your turn'}
+    [0, 0, 0, 0, 0, 0]
+
+    >>> async def demo_bots():
+    ...     with BotPool(workers_count=1) as bot_pool:
+    ...         server = SplendorServer(idle_timeout_s=5, bot_pool=bot_pool)
+    ...         await server.start("127.0.0.1", 0)
+    ...         ava = await connect("127.0.0.1", server.get_port())
+    ...         print(await request(ava, {"op": "join", "players": 3, "bots": 2}))
+    ...         state = (await request(ava, {"op": "state", "wait": True}))["state"]
+    ...         await request(ava, {"op": "act", "action": state["legal_actions"][0]})
+    ...         state = (await request(ava, {"op": "state", "wait": True}))["state"]
+    ...         print(state["bot_seats"], state["round"], state["current_seat"])
+    ...         ava[1].close()
+    ...         await server.stop()
+    >>> asyncio.run(demo_bots())
+    {'ok': True, 'game': 0, 'seat': 0}
+    [1, 2] 1 0
+
+A seat given up before its game starts, by a client disconnecting or a join cancelled on its way, is taken by the
+next join:
+
+    >>> async def demo_leave():
+    ...     server = SplendorServer(idle_timeout_s=5)
+    ...     await server.start("127.0.0.1", 0)
+    ...     ava = await connect("127.0.0.1", server.get_port())
+    ...     await request(ava, {"op": "join", "players": 2, "name": "Ava"})
+    ...     await write_line(ava[1], {"op": "state", "wait": True})
+    ...     ava[1].close()
+    ...     host = server.get_host(0)
+    ...     while len(host.vacant_seats) == 0:
+    ...         await asyncio.sleep(0.01)
+    ...     print(host.seats_claimed_count, host.vacant_seats)
+    ...     host.claim_seat()
+    ...     join_task = asyncio.create_task(host.submit(None, {"op": "join", "players": 2}))
+    ...     await asyncio.sleep(0)
+    ...     join_task.cancel()
+    ...     await asyncio.sleep(0.01)
+    ...     print(host.seats_claimed_count)
+    ...     bernardo = await connect("127.0.0.1", server.get_port())
+    ...     print(await request(bernardo, {"op": "join", "players": 2, "name": "Bernardo"}))
+    ...     print(host.game.get_player_by_idx(0).get_name(), host.has_open_seat())
+    ...     carl = await connect("127.0.0.1", server.get_port())
+    ...     print(await request(carl, {"op": "join", "players": 2, "bots": 1, "game": 0}))
+    ...     for client in (bernardo, carl):
+    ...         client[1].close()
+    ...     await server.stop()
+    >>> asyncio.run(demo_leave())
+    0 [0]
+    0
+    {'ok': True, 'game': 0, 'seat': 0}
+    Bernardo True
+    {'ok': False, 'error': "a join that brings bots opens its own game, so it can't name one"}
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+from splendor.broadcast import (
+    GameBroadcast,
+    )
+from splendor.bot_pool import (
+    BOT_DEADLINE_S,
+    BOT_WORKERS_COUNT,
+    BotPool,
+    )
+from splendor.game import (
+    Game,
+    PLAYERS_COUNT_MAX,
+    PLAYERS_COUNT_MIN,
+    )
+from splendor.game_setup import (
+    get_dev_card_id,
+    get_noble_id,
+    )
+from splendor.player import (
+    Player,
+    )
+from splendor.policy import (
+    get_policy_by_name,
+    policy_greedy,
+    )
+from splendor.spectate import (
+    SpectatorServer,
+    )
+from splendor.stream_server import (
+    DEFAULT_HOST,
+    StreamServer,
+    write_line,
+    )
+from typing import Deque, Dict, List, Tuple
+
+DEFAULT_PORT = 7474
+
+# a game that gets no request for this long is evicted
+IDLE_TIMEOUT_S = 600.0
+# requests waiting for a game's task, per game; connections wait for room beyond this
+GAME_QUEUE_MAX = 64
+# the server refuses to open new games beyond this many
+GAMES_MAX = 10000
+# the policy of bot seats whose join doesn't name one
+BOT_POLICY_NAME_DEFAULT = "greedy"
+# plays a bot's turn when its pool move misses the deadline; cheap enough to run on the event loop
+BOT_FALLBACK_POLICY = policy_greedy
+
+
+def get_state_dict(
+    a_game: Game,
+    seat: int,
+    bot_seats: List[int] = (),
+    ) -> Dict:
+    """
+    Return the position of a_game (whose bots play bot_seats) as seen from seat, as a JSON-able dict.
+
+    Cards and nobles are catalog ids, token counts are in gem index order (see splendor.record), and a deck's
+    face-up slots hold None once the deck runs out.  legal_actions is only filled in on seat's turn.
+    """
+    game_state = a_game.get_current_game_state()
+    scoreboard = a_game.get_scoreboard()
+    players_count = len(a_game.players)
+    is_started = players_count == a_game.number_of_players
+    player = a_game.get_player_by_idx(seat)
+    state = {
+        "players": [a_game.get_player_by_idx(idx).get_name() for idx in range(players_count)],
+        "bot_seats": list(bot_seats),
+        "started": is_started,
+        "over": a_game.winning_player_idx != -1,
+        "winner": a_game.winning_player_idx if a_game.winning_player_idx != -1 else None,
+        "round": a_game.get_round_number_idx(),
+        "current_seat": a_game.get_current_player_idx(),
+        "scores": [scoreboard.get_score(idx) for idx in range(players_count)],
+        "tokens": list(game_state.get_token_cache().get_counts()),
+        "decks": [
+            [get_dev_card_id(dev_card) if dev_card is not None else None for dev_card in deck.get_facing()]
+            for deck in game_state.dev_card_decks
+            ],
+        "hidden": [deck.count_hidden() for deck in game_state.dev_card_decks],
+        "nobles": [get_noble_id(noble) for noble in game_state.get_nobles_in_play().get_list()],
+        "you": {
+            "seat": seat,
+            "tokens": list(player.get_current_token_cache().get_counts()),
+            "reserve": [get_dev_card_id(dev_card) for dev_card in player.get_current_dev_card_reserve().get_list()],
+            "dev_cards": player.get_current_dev_card_cache_count(),
+            "nobles": [get_noble_id(noble) for noble in player.get_current_nobles()],
+        },
+        "legal_actions": [],
+    }
+    if is_started and not state["over"] and a_game.get_current_player_idx() == seat:
+        state["legal_actions"] = [list(action) for action in a_game.list_legal_actions(player)]
+    return state
+
+
+class GameHost:
+    """
+    The task that owns one Game: it applies the requests of the game's seats, in the order they arrive.
+    """
+
+    game_id: int
+    game: Game
+    queue: asyncio.Queue
+    idle_timeout_s: float
+    is_waiting: bool # joins without a game id may take seats here
+    seats_claimed_count: int
+    vacant_seats: List[int] # seats given up before the game started, lowest first
+    waiters: List[Tuple[int, asyncio.Future]] # (seat, future) of each waiting state request
+    bot_policy_names: Dict[int, str] # bot seat -> name of its policy
+    bot_turn_actions_count: int # actions in the record when the pending bot turn was asked for, or -1
+    is_last_turns: bool
+    is_closed: bool
+
+    def __init__(
+        self,
+        server,
+        game_id: int,
+        players_count: int,
+        idle_timeout_s: float = IDLE_TIMEOUT_S,
+        is_waiting: bool = True,
+        ) -> None:
+        self.server = server
+        self.game_id = game_id
+        self.game = Game(players_count)
+        self.queue = asyncio.Queue(GAME_QUEUE_MAX)
+        self.idle_timeout_s = idle_timeout_s
+        self.is_waiting = is_waiting
+        self.seats_claimed_count = 0
+        self.vacant_seats = []
+        self.waiters = []
+        self.bot_policy_names = {}
+        self.bot_turn_actions_count = -1
+        self.is_last_turns = False
+        self.is_closed = False
+        self.task = None
+        self.bot_task = None
+        self.broadcast = None
+
+    def start(self) -> None:
+        self.task = asyncio.get_running_loop().create_task(self.run())
+        return
+
+    def has_open_seat(self) -> bool:
+        return len(self.game.players) < self.game.number_of_players or len(self.vacant_seats) > 0
+
+    def claim_seat(self, count: int = 1) -> bool:
+        """
+        Hold count seats for a join on its way to this game's queue; return False if there aren't that many left.
+        """
+        if self.is_closed or self.seats_claimed_count + count > self.game.number_of_players:
+            return False
+        self.seats_claimed_count += count
+        return True
+
+    def release_seats(self, count: int = 1) -> None:
+        """
+        Give back count claimed seats, of a join that won't take them, so other joins may.
+        """
+        self.seats_claimed_count -= count
+        if self.is_waiting and not self.is_closed:
+            self.server.wait_for_players(self)
+        return
+
+    def leave(self, seat: int) -> None:
+        """
+        Give up seat, whose client disconnected, if the game hasn't started: the next join takes it over.  A
+        started game keeps the seat (it is evicted once idle).  As it doesn't wait, this is safe from any task.
+        """
+        if self.is_closed or not self.has_open_seat() or seat in self.vacant_seats:
+            return
+        self.vacant_seats.append(seat)
+        self.vacant_seats.sort()
+        self.release_seats()
+        return
+
+    def is_over(self) -> bool:
+        return self.game.winning_player_idx != -1
+
+    async def submit(
+        self,
+        seat: int,
+        request: Dict,
+        ) -> Dict:
+        """
+        Queue a request from seat (None before joining) for this game's task, and wait for its response.
+        """
+        if self.is_closed:
+            return {"ok": False, "error": "game was evicted"}
+        future = asyncio.get_running_loop().create_future()
+        try:
+            await self.queue.put((seat, request, future))
+        except asyncio.CancelledError:
+            if request.get("op") == "join":
+                self.release_seats(1 + request.get("bots", 0))
+            raise
+        return await future
+
+    async def run(self) -> None:
+        while True:
+            try:
+                seat, request, future = await asyncio.wait_for(self.queue.get(), self.idle_timeout_s)
+            except asyncio.TimeoutError:
+                break
+            if future.cancelled():
+                # a join given up on before it was handled never takes the seats it claimed
+                if request.get("op") == "join":
+                    self.release_seats(1 + request.get("bots", 0))
+                continue
+            try:
+                response = self.handle_request(seat, request)
+            except Exception as e:
+                response = {"ok": False, "error": str(e)}
+            if response is None:
+                self.waiters.append((seat, future))
+            else:
+                future.set_result(response)
+            self.wake_waiters()
+            self.start_bot_turn()
+        self.close()
+        return
+
+    def close(self) -> None:
+        """
+        Stop taking requests (failing any still queued) and leave the server.
+        """
+        self.is_closed = True
+        while not self.queue.empty():
+            seat, request, future = self.queue.get_nowait()
+            if not future.done():
+                future.set_result({"ok": False, "error": "game was evicted"})
+        for seat, future in self.waiters:
+            if not future.done():
+                future.set_result({"ok": False, "error": "game was evicted"})
+        self.waiters = []
+        if self.bot_task is not None:
+            self.bot_task.cancel()
+        if self.broadcast is not None:
+            self.broadcast.close()
+        self.server.evict_game(self.game_id)
+        return
+
+    def add_bots(
+        self,
+        count: int,
+        policy_name: str,
+        ) -> None:
+        """
+        Seat count bots playing policy_name, in the next seats (already claimed).
+        """
+        for i in range(count):
+            self.bot_policy_names[len(self.game.players)] = policy_name
+            self.game.add_player_by_name(f"bot_{len(self.game.players) + 1}")
+        return
+
+    def seat_player(
+        self,
+        seat: int,
+        name: str,
+        ) -> None:
+        """
+        Seat a new player named name in seat, which was given up before the game started.
+        """
+        self.game.players[seat] = Player(name)
+        self.game.get_game_record().get_player_names()[seat] = name
+        return
+
+    def get_broadcast(self) -> GameBroadcast:
+        """
+        Return the game's broadcast to spectators, starting it on the first call.
+        """
+        if self.broadcast is None:
+            self.broadcast = GameBroadcast(self.game)
+            if self.is_over():
+                self.broadcast.end(self.game.winning_player_idx)
+        return self.broadcast
+
+    def is_turn_of(self, seat: int) -> bool:
+        return not self.has_open_seat() and self.game.get_current_player_idx() == seat
+
+    def wake_waiters(self) -> None:
+        """
+        Answer the waiting state requests of the seat whose turn it is, or all of them once the game is over.
+        """
+        if len(self.waiters) == 0:
+            return
+        waiters = []
+        for seat, future in self.waiters:
+            if future.done():
+                continue
+            if self.is_over() or self.is_turn_of(seat):
+                future.set_result({"ok": True, "state": self.get_state(seat)})
+            else:
+                waiters.append((seat, future))
+        self.waiters = waiters
+        return
+
+    def get_state(self, seat: int) -> Dict:
+        return get_state_dict(self.game, seat, sorted(self.bot_policy_names.keys()))
+
+    def start_bot_turn(self) -> None:
+        """
+        If it is a bot seat's turn, and its move hasn't been asked for yet, ask for it (see play_bot_turn()).
+        """
+        if self.has_open_seat() or self.is_over() or self.is_closed:
+            return
+        seat = self.game.get_current_player_idx()
+        actions_count = self.game.get_game_record().count_actions()
+        if seat not in self.bot_policy_names or self.bot_turn_actions_count == actions_count:
+            return
+        self.bot_turn_actions_count = actions_count
+        self.bot_task = asyncio.get_running_loop().create_task(self.play_bot_turn(seat))
+        return
+
+    async def play_bot_turn(self, seat: int) -> None:
+        """
+        Have the server's bot pool choose seat's move, then submit it like any other seat's.  If the pool misses
+        the deadline, or its move is turned down, the move comes from BOT_FALLBACK_POLICY instead.
+        """
+        try:
+            action = await self.server.bot_pool.choose_action(
+                self.game_id, self.game.get_game_record(), seat, self.bot_policy_names[seat],
+                )
+        except Exception:
+            action = None
+        if action is not None:
+            response = await self.submit(seat, {"op": "act", "action": list(action)})
+            if response["ok"] or self.is_closed:
+                return
+        # no other seat can change the game before this move, so reading it from here is safe
+        action = BOT_FALLBACK_POLICY(self.game, self.game.get_player_by_idx(seat))
+        await self.submit(seat, {"op": "act", "action": list(action)})
+        return
+
+    def handle_request(
+        self,
+        seat: int,
+        request: Dict,
+        ) -> Dict:
+        """
+        Return the response to seat's request, or None for a state request that waits (see wake_waiters()).
+        """
+        op = request.get("op")
+        if op == "join":
+            if not self.has_open_seat():
+                raise Exception("game is full")
+            if len(self.vacant_seats) > 0:
+                seat = self.vacant_seats.pop(0)
+                self.seat_player(seat, str(request.get("name") or f"player_{seat + 1}"))
+            else:
+                self.game.add_player_by_name(str(request.get("name") or f"player_{len(self.game.players) + 1}"))
+                seat = len(self.game.players) - 1
+            self.add_bots(request.get("bots", 0), request.get("bot_policy", BOT_POLICY_NAME_DEFAULT))
+            return {"ok": True, "game": self.game_id, "seat": seat}
+        if seat is None:
+            raise Exception("join a game first")
+        if op == "state":
+            if request.get("wait") and not (self.is_over() or self.is_turn_of(seat)):
+                return None
+            return {"ok": True, "state": self.get_state(seat)}
+        if op == "act":
+            self.act(seat, request.get("action"))
+            return {"ok": True, "over": self.is_over()}
+        raise Exception(f"unknown op: {op}")
+
+    def act(
+        self,
+        seat: int,
+        action: List[int],
+        ) -> None:
+        """
+        Apply seat's action, if it is seat's turn and the action is legal, then end the turn.
+        """
+        if self.has_open_seat():
+            raise Exception("game has not started")
+        if self.is_over():
+            raise Exception("game is over")
+        if self.game.get_current_player_idx() != seat:
+            raise Exception("not your turn")
+        player = self.game.get_player_by_idx(seat)
+        action = tuple(action) if isinstance(action, list) else None
+        if action not in self.game.list_legal_actions(player):
+            raise Exception(f"illegal action: {action}")
+        self.game.apply_action(action)
+        self.end_turn(player)
+        return
+
+    def end_turn(self, player) -> None:
+        """
+        Move play to the next seat and, as in Game.play(), end the game once the round in which a player reached
+        the winning score is complete, or once every player passed in turn.
+        """
+        a_game = self.game
+        if a_game.player_has_winning_score(player):
+            self.is_last_turns = True
+        a_game.go_to_next_player()
+        is_round_complete = a_game.get_current_player_idx() == a_game.start_player_idx
+        if a_game.is_stalled() or (self.is_last_turns and is_round_complete):
+            a_game.winning_player_idx = a_game.determine_winning_player()
+            if self.broadcast is not None:
+                self.broadcast.end(a_game.winning_player_idx)
+        return
+
+
+class SplendorServer(StreamServer):
+    """
+    The TCP server: accepts connections, and routes each connection's requests to its game's GameHost.
+    """
+
+    hosts: Dict[int, GameHost]
+    waiting_game_ids: Dict[int, Deque[int]] # players count -> ids of the games with open seats, oldest first
+    next_game_id: int
+    idle_timeout_s: float
+    bot_pool: BotPool
+
+    default_port = DEFAULT_PORT
+
+    def __init__(
+        self,
+        idle_timeout_s: float = IDLE_TIMEOUT_S,
+        games_max: int = GAMES_MAX,
+        bot_pool: BotPool = None,
+        ) -> None:
+        self.hosts = {}
+        self.waiting_game_ids = {
+            players_count: collections.deque() for players_count in range(PLAYERS_COUNT_MIN, PLAYERS_COUNT_MAX + 1)
+            }
+        self.next_game_id = 0
+        self.idle_timeout_s = idle_timeout_s
+        self.games_max = games_max
+        self.bot_pool = bot_pool
+        super().__init__()
+
+    async def stop(self) -> None:
+        """
+        Stop accepting connections, close the open ones, and end every game.
+        """
+        await super().stop()
+        for host in list(self.hosts.values()):
+            host.task.cancel()
+            host.close()
+        return
+
+    def count_games(self) -> int:
+        return len(self.hosts)
+
+    def get_host(self, game_id: int) -> GameHost:
+        return self.hosts.get(game_id)
+
+    def open_game(
+        self,
+        players_count: int,
+        is_waiting: bool = True,
+        ) -> GameHost:
+        """
+        Open a game for players_count players, which joins without a game id may take seats in if is_waiting.
+        """
+        if len(self.hosts) >= self.games_max:
+            raise Exception("server is full")
+        host = GameHost(self, self.next_game_id, players_count, self.idle_timeout_s, is_waiting)
+        self.next_game_id += 1
+        self.hosts[host.game_id] = host
+        if is_waiting:
+            self.waiting_game_ids[players_count].append(host.game_id)
+        host.start()
+        return host
+
+    def wait_for_players(self, host: GameHost) -> None:
+        """
+        Put host's game back among those joins without a game id may take seats in, if it isn't already.
+        """
+        waiting = self.waiting_game_ids[host.game.number_of_players]
+        if host.game_id not in waiting:
+            waiting.append(host.game_id)
+        return
+
+    def evict_game(self, game_id: int) -> None:
+        host = self.hosts.pop(game_id, None)
+        if host is not None and game_id in self.waiting_game_ids[host.game.number_of_players]:
+            self.waiting_game_ids[host.game.number_of_players].remove(game_id)
+        return
+
+    def check_bots(self, request: Dict) -> int:
+        """
+        Return how many bots a join or open request brings, making sure they fit and can be played.
+        """
+        bots_count = request.get("bots", 0)
+        if bots_count == 0:
+            return 0
+        if not isinstance(bots_count, int) or bots_count < 0:
+            raise Exception("bots must be a count")
+        if self.bot_pool is None:
+            raise Exception("this server has no bots")
+        get_policy_by_name(request.get("bot_policy", BOT_POLICY_NAME_DEFAULT))
+        if request.get("players") not in self.waiting_game_ids or bots_count >= request["players"]:
+            raise Exception(f"players must be {PLAYERS_COUNT_MIN} to {PLAYERS_COUNT_MAX}, and more than bots")
+        return bots_count
+
+    def open_game_for_table(self, request: Dict) -> int:
+        """
+        Open a game for a table formed elsewhere (see splendor.lobby), seat its bots, and return its id.  Its
+        players join it by id.
+        """
+        bots_count = self.check_bots(request)
+        if request.get("players") not in self.waiting_game_ids:
+            raise Exception(f"players must be {PLAYERS_COUNT_MIN} to {PLAYERS_COUNT_MAX}")
+        host = self.open_game(request["players"], is_waiting=False)
+        host.claim_seat(bots_count)
+        host.add_bots(bots_count, request.get("bot_policy", BOT_POLICY_NAME_DEFAULT))
+        return host.game_id
+
+    def find_game_to_join(self, request: Dict) -> GameHost:
+        """
+        Return the host of the game request asks to join, with a seat claimed there: the game it names, or else the
+        oldest one waiting for players of its count (opening one if there is none).  A join that brings bots
+        always opens a game, and claims their seats too; it may not name a game.
+        """
+        if request.get("bots", 0) != 0 and request.get("game") is not None:
+            raise Exception("a join that brings bots opens its own game, so it can't name one")
+        bots_count = self.check_bots(request)
+        if bots_count != 0:
+            host = self.open_game(request["players"])
+            host.claim_seat(1 + bots_count)
+            return host
+        if request.get("game") is not None:
+            host = self.hosts.get(request["game"])
+            if host is None:
+                raise Exception(f"no such game: {request['game']}")
+            if not host.claim_seat():
+                raise Exception("game is full")
+            return host
+        players_count = request.get("players")
+        if players_count not in self.waiting_game_ids:
+            raise Exception(f"players must be {PLAYERS_COUNT_MIN} to {PLAYERS_COUNT_MAX}")
+        waiting = self.waiting_game_ids[players_count]
+        while len(waiting) > 0:
+            host = self.hosts.get(waiting[0])
+            if host is not None and host.claim_seat():
+                return host
+            waiting.popleft()
+        host = self.open_game(players_count)
+        host.claim_seat()
+        return host
+
+    async def handle_request(
+        self,
+        reader: asyncio.StreamReader,
+        seat_ref: List,
+        request: Dict,
+        ) -> Dict:
+        """
+        Handle one request of a connection, whose [game host, seat] (both None before joining) is seat_ref.  A
+        waiting state request returns None if the client disconnects before it is answered.
+        """
+        host, seat = seat_ref
+        if request.get("op") == "ping":
+            return {"ok": True, "games": self.count_games()}
+        if request.get("op") == "open":
+            return {"ok": True, "game": self.open_game_for_table(request)}
+        if request.get("op") == "join":
+            if host is not None:
+                raise Exception("already joined a game")
+            host = self.find_game_to_join(request)
+            response = await host.submit(None, request)
+            if response.get("ok"):
+                seat_ref[0], seat_ref[1] = host, response["seat"]
+            return response
+        if host is None:
+            raise Exception("join a game first")
+        if not request.get("wait"):
+            return await host.submit(seat, request)
+        # the client isn't meant to send anything while it waits, so reading only ends when it disconnects
+        response_task = asyncio.get_running_loop().create_task(host.submit(seat, request))
+        disconnect_task = asyncio.get_running_loop().create_task(reader.read(1))
+        await asyncio.wait((response_task, disconnect_task), return_when=asyncio.FIRST_COMPLETED)
+        if response_task.done():
+            disconnect_task.cancel()
+            try:
+                await disconnect_task
+            except asyncio.CancelledError:
+                pass
+            return response_task.result()
+        response_task.cancel()
+        return None
+
+    async def handle_stream(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        ) -> None:
+        seat_ref = [None, None]
+        try:
+            await self.serve_lines(reader, writer, lambda request: self.handle_request(reader, seat_ref, request))
+        finally:
+            if seat_ref[0] is not None:
+                seat_ref[0].leave(seat_ref[1])
+        return
+
+
+async def connect(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    ) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """
+    Open a client connection to a server.
+    """
+    return await asyncio.open_connection(host, port, limit=2 ** 20)
+
+async def request(
+    client: Tuple[asyncio.StreamReader, asyncio.StreamWriter],
+    obj: Dict,
+    ) -> Dict:
+    """
+    Send one request over a client connection (see connect()) and return the response.
+    """
+    reader, writer = client
+    await write_line(writer, obj)
+    line = await reader.readline()
+    if not line:
+        raise Exception("server closed the connection")
+    return json.loads(line)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Host Splendor games over TCP (line-delimited JSON).")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT_S, help="seconds before an idle game is evicted")
+    parser.add_argument("--games-max", type=int, default=GAMES_MAX)
+    parser.add_argument("--bot-workers", type=int, default=BOT_WORKERS_COUNT, help="bot worker processes (0: no bots)")
+    parser.add_argument("--bot-deadline", type=float, default=BOT_DEADLINE_S, help="seconds allowed for a bot move")
+    parser.add_argument("--spectate-port", type=int, default=None, help="also stream games to spectators (SSE) on this port")
+    args = parser.parse_args()
+
+    bot_pool = BotPool(args.bot_workers, args.bot_deadline) if args.bot_workers > 0 else None
+
+    async def serve() -> None:
+        server = SplendorServer(args.idle_timeout, args.games_max, bot_pool)
+        if bot_pool is not None:
+            await bot_pool.warm_up()
+        await server.start(args.host, args.port)
+        print(f"serving on {args.host}:{server.get_port()}", flush=True)
+        if args.spectate_port is not None:
+            spectator_server = SpectatorServer(server)
+            await spectator_server.start(args.host, args.spectate_port)
+            print(f"spectators on http://{args.host}:{spectator_server.get_port()}/games/<game id>/events", flush=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if bot_pool is not None:
+            bot_pool.shutdown()
+    return
+
+if __name__ == "__main__":
+    main()
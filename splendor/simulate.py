@@ -0,0 +1,122 @@
+"""
+simulate.py - Run many headless games across worker processes and store their results.
+
+    python -m splendor.simulate --games 1000 --players 2 --policy greedy --workers 4 --results results.sqlite
+"""
+
+import argparse
+import multiprocessing
+import random
+from splendor.game import (
+    MAX_ROUNDS_HEADLESS,
+    play_runner_headless,
+    )
+from splendor.policy import (
+    get_policy_by_name,
+    POLICIES_DICT,
+    )
+from splendor.results import (
+    game_result_from_game,
+    GameResult,
+    ResultsStore,
+    ResultsWriter,
+    )
+from typing import Tuple
+
+SIMULATE_CHUNK_SIZE = 16
+
+def play_game_result(
+    players_count: int,
+    policy_name: str,
+    seed: int = None,
+    max_rounds: int = MAX_ROUNDS_HEADLESS,
+    ) -> GameResult:
+    """
+    Play one headless game (seeded, if seed is given) and return its GameResult.
+
+    >>> play_game_result(2, "greedy", seed=1) #doctest: +ELLIPSIS
+    <GameResult: 2 players, ... turns, winner seat ...>
+    """
+    if seed is not None:
+        random.seed(seed)
+    a_game = play_runner_headless(players_count, get_policy_by_name(policy_name), max_rounds=max_rounds)
+    return game_result_from_game(a_game, policy_name)
+
+# the writer queue, in each worker process
+_worker_results_queue = None
+
+def _init_worker(results_queue) -> None:
+    global _worker_results_queue
+    _worker_results_queue = results_queue
+    return
+
+def _play_game_into_queue(args: Tuple[int, str, int]) -> None:
+    _worker_results_queue.put(play_game_result(*args))
+    return
+
+def simulate_games(
+    games_count: int,
+    players_count: int,
+    policy_name: str,
+    results_path: str,
+    workers: int = 1,
+    seed: int = None,
+    ) -> None:
+    """
+    Play games_count headless games on workers processes, storing their results at results_path.
+
+    Workers put their GameResults straight onto the queue of a single ResultsWriter process, which batches the
+    inserts.  If seed is given, game i is seeded with seed + i, so a run is reproducible.
+
+    >>> import os, tempfile
+    >>> tmp_dir = tempfile.TemporaryDirectory()
+    >>> path = os.path.join(tmp_dir.name, "results.sqlite")
+    >>> simulate_games(6, 3, "greedy", path, workers=2, seed=0)
+    >>> store = ResultsStore(path)
+    >>> store.count_games()
+    6
+    >>> sum(row[3] for row in store.query_win_rate_by_seat())
+    6
+    >>> store.close()
+    >>> tmp_dir.cleanup()
+    """
+    game_args = [
+        (players_count, policy_name, None if seed is None else seed + i)
+        for i in range(games_count)
+        ]
+    with ResultsWriter(results_path) as writer:
+        if workers <= 1:
+            _init_worker(writer.get_queue())
+            for args in game_args:
+                _play_game_into_queue(args)
+        else:
+            with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(writer.get_queue(),)) as pool:
+                for _ in pool.imap_unordered(_play_game_into_queue, game_args, SIMULATE_CHUNK_SIZE):
+                    pass
+    return
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulate headless Splendor games and store their results.")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--players", type=int, default=2, choices=(2, 3, 4))
+    parser.add_argument("--policy", default="greedy", choices=sorted(POLICIES_DICT.keys()))
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--results", default="results.sqlite", help="path of the SQLite results store")
+    args = parser.parse_args()
+
+    simulate_games(args.games, args.players, args.policy, args.results, args.workers, args.seed)
+
+    store = ResultsStore(args.results)
+    print(f"games stored: {store.count_games()}")
+    print("win rate by seat (players, seat, games, wins, rate):")
+    for row in store.query_win_rate_by_seat():
+        print(f"  {row[0]} {row[1]} {row[2]} {row[3]} {row[4]:.3f}")
+    print("game length (players, games, mean turns, min, max, mean rounds):")
+    for row in store.query_game_length():
+        print(f"  {row[0]} {row[1]} {row[2]:.1f} {row[3]} {row[4]} {row[5]:.1f}")
+    store.close()
+    return
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+spectate.py - A local HTTP endpoint streaming live games to spectators as server-sent events.
+
+    GET /games/<game id>/events    ->    text/event-stream
+
+Each event's data is one splendor.broadcast message: the game's latest keyframe and the diffs since, then every
+diff as it is played, then its end.  The stream closes once the game ends or is evicted.
+
+A spectator is a subscriber of its game's GameBroadcast whose callback only appends the message, framed for SSE,
+to the spectator's buffer; the spectator's own task writes out everything buffered in one write, and waits for
+the socket to drain.  So the game's task never waits on a spectator.  A spectator whose buffer fills up (more
+than buffer_max messages behind) is dropped; if it reconnects, the keyframe catches it up.
+
+    >>> from splendor.game import Game
+    >>> from splendor.broadcast import GameBroadcast
+    >>> a_game = Game(2)
+    >>> a_game.add_player_by_name("Ava")
+    >>> a_game.add_player_by_name("Bernardo")
+    >>> broadcast = GameBroadcast(a_game)
+    >>> async def demo():
+    ...     stream = SpectatorStream(broadcast, buffer_max=2)
+    ...     print(stream.get_frames()[:24])
+    ...     stream.on_message(b'{"type":"diff"}')
+    ...     print(stream.get_frames(), stream.is_dropped)
+    ...     for i in range(3):
+    ...         stream.on_message(b'{"type":"diff"}')
+    ...     print(stream.is_dropped, broadcast.count_subscribers())
+    >>> asyncio.run(demo())
+    b'data: {"type":"keyframe"'
+    b'data: {"type":"diff"}\\n\\n' False
+    True 0
+
+Dropping a spectator doesn't cost the subscribers after it a message:
+
+    >>> async def demo_drop():
+    ...     stream = SpectatorStream(broadcast, buffer_max=1)
+    ...     messages = []
+    ...     broadcast.subscribe(messages.append)
+    ...     for gem_name in ("green", "red"):
+    ...         a_game.action_take_two_tokens(a_game.get_current_player(), gem_name)
+    ...     print(stream.is_dropped, [json.loads(message)["type"] for message in messages])
+    >>> asyncio.run(demo_drop())
+    True ['keyframe', 'diff', 'diff']
+
+End to end, next to a game server:
+
+    >>> from splendor.server import SplendorServer, connect, request
+    >>> async def demo_server():
+    ...     server = SplendorServer(idle_timeout_s=5)
+    ...     await server.start("127.0.0.1", 0)
+    ...     spectator_server = SpectatorServer(server)
+    ...     await spectator_server.start("127.0.0.1", 0)
+    ...     ava = await connect("127.0.0.1", server.get_port())
+    ...     bernardo = await connect("127.0.0.1", server.get_port())
+    ...     game_id = (await request(ava, {"op": "join", "players": 2}))["game"]
+    ...     await request(bernardo, {"op": "join", "players": 2})
+    ...     reader, writer = await asyncio.open_connection("127.0.0.1", spectator_server.get_port(), limit=2 ** 20)
+    ...     writer.write(f"GET /games/{game_id}/events HTTP/1.1\\r\\nHost: localhost\\r\\n\\r\\n".encode())
+    ...     print((await reader.readline()).strip())
+    ...     while (await reader.readline()).strip():
+    ...         pass
+    ...     print((await reader.readline())[:24])
+    ...     state = (await request(ava, {"op": "state"}))["state"]
+    ...     await request(ava, {"op": "act", "action": state["legal_actions"][0]})
+    ...     await reader.readline()
+    ...     print((await reader.readline())[:30])
+    ...     writer.close()
+    ...     for client in (ava, bernardo):
+    ...         client[1].close()
+    ...     await spectator_server.stop()
+    ...     await server.stop()
+    >>> asyncio.run(demo_server())
+    b'HTTP/1.1 200 OK'
+    b'data: {"type":"keyframe"'
+    b'data: {"type":"diff","turn":0,'
+"""
+
+import asyncio
+import collections
+import json
+from splendor.broadcast import (
+    GameBroadcast,
+    )
+from splendor.stream_server import (
+    StreamServer,
+    )
+from typing import Deque
+
+DEFAULT_PORT = 7475
+
+# messages a spectator may fall behind by before it is dropped
+SPECTATOR_BUFFER_MAX = 256
+
+EVENT_STREAM_HEADER = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: text/event-stream\r\n"
+    b"Cache-Control: no-cache\r\n"
+    b"Connection: keep-alive\r\n"
+    b"\r\n"
+    )
+NOT_FOUND_RESPONSE = (
+    b"HTTP/1.1 404 Not Found\r\n"
+    b"Content-Type: text/plain\r\n"
+    b"Content-Length: 10\r\n"
+    b"Connection: close\r\n"
+    b"\r\n"
+    b"not found\n"
+    )
+
+# the last message framed, and its frame: a broadcast hands the same message to every spectator in turn
+_last_frame = (None, None)
+
+
+def get_sse_frame(message: bytes) -> bytes:
+    """
+    Return message framed as a server-sent event.
+
+    >>> get_sse_frame(b'{"type":"end"}')
+    b'data: {"type":"end"}\\n\\n'
+    """
+    global _last_frame
+    if _last_frame[0] is not message:
+        _last_frame = (message, b"data: " + message + b"\n\n")
+    return _last_frame[1]
+
+
+class SpectatorStream:
+    """
+    One spectator's subscription to a GameBroadcast, with a bounded buffer of frames not yet written.
+    """
+
+    broadcast: GameBroadcast
+    buffer_max: int
+    frames: Deque[bytes]
+    is_subscribed: bool
+    is_dropped: bool
+    is_ended: bool
+
+    def __init__(
+        self,
+        broadcast: GameBroadcast,
+        buffer_max: int = SPECTATOR_BUFFER_MAX,
+        ) -> None:
+        self.broadcast = broadcast
+        self.buffer_max = buffer_max
+        self.frames = collections.deque()
+        self.is_subscribed = True
+        self.is_dropped = False
+        self.is_ended = False
+        self.ready = asyncio.Event()
+        broadcast.subscribe(self.on_message)
+
+    def on_message(self, message: bytes) -> None:
+        """
+        The subscriber callback (see GameBroadcast.subscribe()): buffer message, or drop this spectator if its
+        buffer is full.  None means the broadcast closed.
+        """
+        if message is None:
+            self.is_subscribed = False
+            self.is_ended = True
+        elif len(self.frames) >= self.buffer_max:
+            self.is_subscribed = False
+            self.is_dropped = True
+            self.broadcast.unsubscribe(self.on_message)
+        else:
+            self.frames.append(get_sse_frame(message))
+            self.is_ended = self.broadcast.is_ended
+        self.ready.set()
+        return
+
+    def get_frames(self) -> bytes:
+        """
+        Return (and clear) everything buffered, as one chunk.
+        """
+        frames = b"".join(self.frames)
+        self.frames.clear()
+        self.ready.clear()
+        return frames
+
+    async def write_to(self, writer: asyncio.StreamWriter) -> None:
+        """
+        Write out the buffered frames as they come, until the game ends or this spectator is dropped.
+        """
+        try:
+            while not self.is_dropped:
+                await self.ready.wait()
+                frames = self.get_frames()
+                if len(frames) > 0:
+                    writer.write(frames)
+                    await writer.drain()
+                if self.is_ended:
+                    break
+        finally:
+            if self.is_subscribed:
+                self.is_subscribed = False
+                self.broadcast.unsubscribe(self.on_message)
+        return
+
+
+class SpectatorServer(StreamServer):
+    """
+    The HTTP server streaming the games of a splendor.server.SplendorServer to spectators.
+    """
+
+    buffer_max: int
+
+    default_port = DEFAULT_PORT
+
+    def __init__(
+        self,
+        game_server,
+        buffer_max: int = SPECTATOR_BUFFER_MAX,
+        ) -> None:
+        self.game_server = game_server
+        self.buffer_max = buffer_max
+        super().__init__()
+
+    def find_broadcast(self, path: str) -> GameBroadcast:
+        """
+        Return the broadcast of the game named by path (/games/<game id>/events), or None.
+        """
+        parts = path.split("/")
+        if len(parts) != 4 or parts[0] != "" or parts[1] != "games" or parts[3] != "events" or not parts[2].isdigit():
+            return None
+        host = self.game_server.get_host(int(parts[2]))
+        if host is None or host.is_closed:
+            return None
+        return host.get_broadcast()
+
+    async def handle_stream(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        ) -> None:
+        try:
+            request_line = await reader.readline()
+            while True:
+                header_line = await reader.readline()
+                if header_line in (b"\r\n", b"\n", b""):
+                    break
+            parts = request_line.decode("latin-1").split()
+            broadcast = None
+            if len(parts) == 3 and parts[0] == "GET":
+                broadcast = self.find_broadcast(parts[1])
+            if broadcast is None:
+                writer.write(NOT_FOUND_RESPONSE)
+                await writer.drain()
+                return
+            writer.write(EVENT_STREAM_HEADER)
+            await SpectatorStream(broadcast, self.buffer_max).write_to(writer)
+        except (ValueError, asyncio.LimitOverrunError):
+            pass
+        return
@@ -0,0 +1,148 @@
+"""
+stream_server.py - The accept loop shared by the servers (splendor.server, splendor.spectate and splendor.lobby).
+
+A StreamServer listens on a host and port, and keeps every open connection's task and writer, so stop() can close
+them all and wait for their tasks to end.  A subclass handles each connection in handle_stream(); serve_lines()
+handles one that speaks line-delimited JSON, one request per line and one response per request.
+
+    >>> class EchoServer(StreamServer):
+    ...     default_port = 0
+    ...     async def handle_stream(self, reader, writer):
+    ...         async def echo(request):
+    ...             return None if request.get("op") == "bye" else {"ok": True, "echo": request}
+    ...         await self.serve_lines(reader, writer, echo)
+    >>> async def demo():
+    ...     server = EchoServer()
+    ...     await server.start()
+    ...     reader, writer = await asyncio.open_connection(DEFAULT_HOST, server.get_port())
+    ...     for line in (b'{"op": "hi"}\\n', b'[1]\\n', b'x' * 2 * LINE_LIMIT_BYTES + b'\\n'):
+    ...         writer.write(line)
+    ...         print((await reader.readline()).decode().strip())
+    ...     other_reader, other_writer = await asyncio.open_connection(DEFAULT_HOST, server.get_port())
+    ...     other_writer.write(b'{"op": "bye"}\\n')
+    ...     print(await other_reader.readline(), len(server.connections))
+    ...     await server.stop()
+    ...     print(len(server.connections))
+    >>> asyncio.run(demo())
+    {"ok":true,"echo":{"op":"hi"}}
+    {"ok":false,"error":"request must be a JSON object"}
+    {"ok":false,"error":"request line too long"}
+    b'' 0
+    0
+"""
+
+import asyncio
+import json
+from typing import Awaitable, Callable, Dict
+
+DEFAULT_HOST = "127.0.0.1"
+
+# longest request line (or HTTP header line) accepted, in bytes
+LINE_LIMIT_BYTES = 4096
+# connections the kernel may queue before they are accepted
+LISTEN_BACKLOG = 4096
+
+
+class StreamServer:
+    """
+    A TCP server whose subclass handles each connection in handle_stream().
+    """
+
+    default_port: int
+    connections: Dict[asyncio.Task, asyncio.StreamWriter] # connection handler task -> its writer
+
+    def __init__(self) -> None:
+        self.server = None
+        self.connections = {}
+
+    async def start(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = None,
+        ) -> None:
+        port = self.default_port if port is None else port
+        self.server = await asyncio.start_server(self.handle_connection, host, port, limit=LINE_LIMIT_BYTES, backlog=LISTEN_BACKLOG)
+        return
+
+    def get_port(self) -> int:
+        return self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        async with self.server:
+            await self.server.serve_forever()
+        return
+
+    async def stop(self) -> None:
+        """
+        Stop accepting connections, close the open ones, and wait for their tasks to end.
+        """
+        self.server.close()
+        for writer in self.connections.values():
+            writer.close()
+        await asyncio.gather(*self.connections.keys(), return_exceptions=True)
+        await self.server.wait_closed()
+        return
+
+    async def handle_connection(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        ) -> None:
+        self.connections[asyncio.current_task()] = writer
+        try:
+            await self.handle_stream(reader, writer)
+        except ConnectionError:
+            pass
+        finally:
+            del self.connections[asyncio.current_task()]
+            writer.close()
+        return
+
+    async def handle_stream(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        ) -> None:
+        raise NotImplementedError
+
+    async def serve_lines(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        handle_request: Callable[[Dict], Awaitable[Dict]],
+        ) -> None:
+        """
+        Answer each JSON line read with handle_request(request), until the client disconnects, sends a line that
+        is too long, or handle_request returns None.  A request that raises is answered with its error.
+        """
+        while True:
+            try:
+                line = await reader.readline()
+            except (ValueError, asyncio.LimitOverrunError):
+                await write_line(writer, {"ok": False, "error": "request line too long"})
+                break
+            if not line:
+                break
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise Exception("request must be a JSON object")
+                response = await handle_request(request)
+            except Exception as e:
+                response = {"ok": False, "error": str(e)}
+            if response is None:
+                break
+            await write_line(writer, response)
+        return
+
+
+async def write_line(
+    writer: asyncio.StreamWriter,
+    obj: Dict,
+    ) -> None:
+    """
+    Write obj as one JSON line, and wait until the transport's buffer has drained.
+    """
+    writer.write(json.dumps(obj, separators=(",", ":")).encode("utf-8") + b"\n")
+    await writer.drain()
+    return
@@ -0,0 +1,262 @@
+"""
+trace.py - Optional tracing spans, exported as Chrome trace-event JSON (chrome://tracing, Perfetto, speedscope).
+
+    python -m splendor.trace --games 1 --players 2 --policy greedy --output trace.json
+
+Tracing is off by default.  start_tracing() swaps traced wrappers in for Game.play_turn (one "turn" span per
+turn, whose args name the round and seat), the Game.action_* methods and Game.list_legal_actions, and
+stop_tracing() takes them out again.  Other code, such as a bot's search phases, opens its own spans
+with span(); while tracing is off, span() hands back a shared do-nothing context manager.
+
+Each span becomes a complete ("X") event; nested spans nest in the viewer.  splendor.instrument wraps some of
+the same methods; both go through splendor.hooks, so either may be turned off first.
+
+    >>> from splendor.game import Game
+    >>> start_tracing()
+    >>> a_game = Game(2)
+    >>> a_game.add_player_by_name("alice")
+    >>> a_game.add_player_by_name("bob")
+    >>> with span("search", cat="bot", iterations=10):
+    ...     a_game.action_take_two_tokens(a_game.get_current_player(), "green")
+    >>> stop_tracing()
+    >>> [event["name"] for event in get_events()]
+    ['Game.action_take_two_tokens', 'search']
+    >>> get_events()[1]["args"]
+    {'iterations': 10}
+    >>> get_events()[0]["ts"] >= get_events()[1]["ts"]
+    True
+    >>> span("ignored") is _NULL_SPAN
+    True
+
+    >>> from splendor import instrument
+    >>> original = Game.action_take_two_tokens
+    >>> instrument.enable()
+    >>> start_tracing()
+    >>> instrument.disable()
+    >>> a_game.action_take_two_tokens(a_game.get_current_player(), "red")
+    >>> [event["name"] for event in get_events()], instrument.get_snapshot()["Game.action_take_two_tokens"]["calls"]
+    (['Game.action_take_two_tokens'], 0)
+    >>> stop_tracing()
+    >>> Game.action_take_two_tokens is original
+    True
+"""
+
+import argparse
+import functools
+import json
+import os
+import random
+from splendor import (
+    hooks,
+    )
+from splendor.game import (
+    Game,
+    play_runner_headless,
+    )
+from splendor.policy import (
+    get_policy_by_name,
+    POLICIES_DICT,
+    )
+import threading
+import time
+from typing import Callable, Dict, List
+
+# (class, method name) of every method traced while tracing is on, besides Game.play_turn
+TRACED_METHODS = (
+    (Game, "action_take_three_tokens"),
+    (Game, "action_take_two_tokens"),
+    (Game, "action_reserve_dev_card"),
+    (Game, "action_reserve_hidden_dev_card"),
+    (Game, "action_purchase_dev_card"),
+    (Game, "action_pass"),
+    (Game, "list_legal_actions"),
+    )
+
+TRACE_CATEGORY = "splendor"
+TRACE_MAX_EVENTS = 1000000
+
+# the owner of this module's wrappers, in splendor.hooks
+HOOKS_OWNER = "trace"
+
+_tracing = False
+_t0_ns = 0
+_events: List[Dict] = []
+_dropped_events_count = 0
+
+
+class _Span:
+    """
+    An open span; appends its complete event on exit.
+    """
+
+    __slots__ = ("name", "cat", "args", "t_start_ns")
+
+    def __init__(self, name: str, cat: str, args: Dict) -> None:
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.t_start_ns = 0
+
+    def __enter__(self):
+        self.t_start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        t_end_ns = time.perf_counter_ns()
+        _add_event(self.name, self.cat, self.t_start_ns, t_end_ns, self.args)
+        return
+
+
+class _NullSpan:
+    """
+    The span handed out while tracing is off.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        return
+
+
+_NULL_SPAN = _NullSpan()
+
+def _add_event(
+    name: str,
+    cat: str,
+    t_start_ns: int,
+    t_end_ns: int,
+    args: Dict,
+    ) -> None:
+    global _dropped_events_count
+    if len(_events) >= TRACE_MAX_EVENTS:
+        _dropped_events_count += 1
+        return
+    event = {
+        "name": name,
+        "cat": cat,
+        "ph": "X",
+        "ts": (t_start_ns - _t0_ns) / 1000.0,
+        "dur": (t_end_ns - t_start_ns) / 1000.0,
+        "pid": os.getpid(),
+        "tid": threading.get_native_id(),
+    }
+    if args:
+        event["args"] = args
+    _events.append(event)
+    return
+
+def span(name: str, cat: str = TRACE_CATEGORY, **args):
+    """
+    Return a context manager timing a span named name, with optional args shown in the viewer.
+    """
+    if not _tracing:
+        return _NULL_SPAN
+    return _Span(name, cat, args)
+
+def _make_traced(op_name: str, method: Callable) -> Callable:
+    @functools.wraps(method)
+    def traced(*args, **kwargs):
+        with _Span(op_name, TRACE_CATEGORY, None):
+            return method(*args, **kwargs)
+    return traced
+
+def _make_traced_play_turn(method: Callable) -> Callable:
+    @functools.wraps(method)
+    def traced_play_turn(self, player, *args, **kwargs):
+        with _Span("turn", TRACE_CATEGORY, {"round": self.get_round_number_idx(), "seat": self.get_player_idx(player)}):
+            return method(self, player, *args, **kwargs)
+    return traced_play_turn
+
+def is_tracing() -> bool:
+    return _tracing
+
+def start_tracing() -> None:
+    """
+    Start recording spans (after clearing any previous ones), and trace the Game's turns and actions.
+    """
+    global _tracing, _t0_ns
+    if _tracing:
+        return
+    clear_events()
+    _t0_ns = time.perf_counter_ns()
+    hooks.add_wrapper(HOOKS_OWNER, Game, "play_turn", _make_traced_play_turn)
+    for cls, method_name in TRACED_METHODS:
+        hooks.add_wrapper(HOOKS_OWNER, cls, method_name, functools.partial(_make_traced, f"{cls.__name__}.{method_name}"))
+    _tracing = True
+    return
+
+def stop_tracing() -> None:
+    """
+    Stop recording spans and take the traced wrappers out (leaving any other module's wrappers in).  The
+    recorded events are kept.
+    """
+    global _tracing
+    hooks.remove_wrappers(HOOKS_OWNER)
+    _tracing = False
+    return
+
+def get_events() -> List[Dict]:
+    return _events
+
+def get_dropped_events_count() -> int:
+    return _dropped_events_count
+
+def clear_events() -> None:
+    global _dropped_events_count
+    _events.clear()
+    _dropped_events_count = 0
+    return
+
+def write_chrome_trace(
+    path: str,
+    events: List[Dict] = None,
+    ) -> None:
+    """
+    Write events (default: the recorded ones) to path as a Chrome trace-event JSON object.
+
+    >>> import tempfile
+    >>> tmp_file = tempfile.NamedTemporaryFile(suffix=".json")
+    >>> write_chrome_trace(tmp_file.name, [{"name": "turn", "ph": "X", "ts": 0.0, "dur": 5.0, "pid": 1, "tid": 1}])
+    >>> doc = json.load(open(tmp_file.name))
+    >>> doc["traceEvents"][0]["name"], doc["displayTimeUnit"]
+    ('turn', 'ms')
+    >>> tmp_file.close()
+    """
+    if events is None:
+        events = _events
+    doc = {
+        "traceEvents": events,
+        "displayTimeUnit": "ms",
+        "otherData": {"dropped_events": _dropped_events_count},
+    }
+    with open(path, "w") as f:
+        json.dump(doc, f)
+    return
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Trace headless Splendor games as Chrome trace-event JSON.")
+    parser.add_argument("--games", type=int, default=1)
+    parser.add_argument("--players", type=int, default=2, choices=(2, 3, 4))
+    parser.add_argument("--policy", default="greedy", choices=sorted(POLICIES_DICT.keys()))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="trace.json")
+    args = parser.parse_args()
+
+    policy = get_policy_by_name(args.policy)
+    start_tracing()
+    try:
+        for i in range(args.games):
+            random.seed(args.seed + i)
+            with span("game", game=i, players=args.players, policy=args.policy):
+                play_runner_headless(args.players, policy)
+    finally:
+        stop_tracing()
+    write_chrome_trace(args.output)
+    print(f"{len(get_events())} events ({get_dropped_events_count()} dropped) written to {args.output}")
+    return
+
+if __name__ == "__main__":
+    main()
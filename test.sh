@@ -42,6 +42,12 @@ function doctest_module () {
 	python3 -m doctest $1 $VERBOSE_FLAG
 }
 
+# args: module_name
+# for modules whose name shadows a stdlib module (splendor.profile), so they must be imported via the package
+function doctest_package_module () {
+	python3 -c "import doctest, importlib; doctest.testmod(importlib.import_module('$1'))" $VERBOSE_FLAG
+}
+
 #
 # start testing
 #
@@ -52,6 +58,28 @@ doctest_module splendor/game.py
 doctest_module splendor/game_setup.py
 doctest_module splendor/player.py
 doctest_module splendor/interactive.py
+doctest_module splendor/render.py
+doctest_module splendor/search.py
+doctest_module splendor/record.py
+doctest_module splendor/archive.py
+doctest_module splendor/replay.py
+doctest_module splendor/policy.py
+doctest_module splendor/results.py
+doctest_module splendor/simulate.py
+doctest_module splendor/hooks.py
+doctest_module splendor/instrument.py
+doctest_package_module splendor.profile
+doctest_module splendor/trace.py
+doctest_module splendor/memory.py
+doctest_module splendor/broadcast.py
+doctest_module splendor/bot_pool.py
+doctest_module splendor/stream_server.py
+doctest_module splendor/server.py
+doctest_module splendor/spectate.py
+doctest_module splendor/lobby.py
+doctest_module benchmarks/harness.py
+doctest_module benchmarks/cases.py
+doctest_module benchmarks/compare.py
 
 # unittests
 #python3 -m unittest